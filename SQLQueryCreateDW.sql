@@ -33,6 +33,28 @@ BEGIN
 END
 GO
 
+-- Tablas de staging de particiones que hayan quedado de una carga fallida
+DECLARE @stage_sql NVARCHAR(MAX) = N'';
+SELECT @stage_sql = @stage_sql + N'DROP TABLE ' + QUOTENAME(name) + N'; '
+FROM sys.tables WHERE name LIKE 'Fact[_]Ventas[_]Stage[_]%' OR name LIKE 'Fact[_]Ventas[_]Old[_]%';
+EXEC sp_executesql @stage_sql;
+GO
+
+-- Esquema y función de partición (después de Fact_Ventas, que los usa)
+IF EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = 'PS_Fact_Ventas_Mes')
+BEGIN
+    DROP PARTITION SCHEME PS_Fact_Ventas_Mes;
+    PRINT 'Esquema de partición PS_Fact_Ventas_Mes eliminado.';
+END
+GO
+
+IF EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = 'PF_Fact_Ventas_Mes')
+BEGIN
+    DROP PARTITION FUNCTION PF_Fact_Ventas_Mes;
+    PRINT 'Función de partición PF_Fact_Ventas_Mes eliminada.';
+END
+GO
+
 -- Eliminar procedures
 IF OBJECT_ID('[dbo].[Sp_Genera_Dim_Tiempo]') IS NOT NULL
 BEGIN
@@ -41,6 +63,13 @@ BEGIN
 END
 GO
 
+IF OBJECT_ID('[dbo].[Sp_Genera_Dim_Tiempo_Rango]') IS NOT NULL
+BEGIN
+    DROP PROCEDURE [dbo].[Sp_Genera_Dim_Tiempo_Rango];
+    PRINT 'Stored Procedure Sp_Genera_Dim_Tiempo_Rango eliminado.';
+END
+GO
+
 IF OBJECT_ID('[dbo].[usp_Poblar_Dimension_Tiempo]') IS NOT NULL
 BEGIN
     DROP PROCEDURE [dbo].[usp_Poblar_Dimension_Tiempo];
@@ -105,7 +134,10 @@ CREATE TABLE Dim_Producto (
     Marca VARCHAR(100) NOT NULL,
     PrecioCosto DECIMAL(18,2) NOT NULL DEFAULT 0,
     PrecioVentaSugerido DECIMAL(18,2) NOT NULL DEFAULT 0,
-    FechaCreacion DATETIME DEFAULT GETDATE()
+    FechaCreacion DATETIME DEFAULT GETDATE(),
+    -- Mismo hash que INT_Producto.RowHash: el MERGE solo actualiza si cambió
+    RowHash AS CAST(HASHBYTES('SHA2_256', CONCAT(Descripcion, '|', Categoria, '|', Marca, '|',
+        PrecioCosto, '|', PrecioVentaSugerido)) AS VARBINARY(32)) PERSISTED
 );
 
 CREATE INDEX IDX_CodigoProducto ON Dim_Producto (CodigoProducto);
@@ -123,7 +155,10 @@ CREATE TABLE Dim_Cliente (
     Localidad VARCHAR(100) NOT NULL,
     Provincia VARCHAR(100) NOT NULL,
     CP VARCHAR(20) NULL,
-    FechaCreacion DATETIME DEFAULT GETDATE()
+    FechaCreacion DATETIME DEFAULT GETDATE(),
+    -- Mismo hash que INT_Cliente.RowHash: el MERGE solo actualiza si cambió
+    RowHash AS CAST(HASHBYTES('SHA2_256', CONCAT(RazonSocial, '|', ISNULL(Telefono, CHAR(0)), '|', ISNULL(Mail, CHAR(0)), '|',
+        ISNULL(Direccion, CHAR(0)), '|', Localidad, '|', Provincia, '|', ISNULL(CP, CHAR(0)))) AS VARBINARY(32)) PERSISTED
 );
 
 CREATE INDEX IDX_CodCliente ON Dim_Cliente (CodCliente);
@@ -140,7 +175,10 @@ CREATE TABLE Dim_Tienda (
     Provincia VARCHAR(100) NOT NULL,
     CP VARCHAR(20) NULL,
     TipoTienda VARCHAR(50) NOT NULL,
-    FechaCreacion DATETIME DEFAULT GETDATE()
+    FechaCreacion DATETIME DEFAULT GETDATE(),
+    -- Mismo hash que INT_Tienda.RowHash: el MERGE solo actualiza si cambió
+    RowHash AS CAST(HASHBYTES('SHA2_256', CONCAT(Descripcion, '|', ISNULL(Direccion, CHAR(0)), '|', Localidad, '|',
+        Provincia, '|', ISNULL(CP, CHAR(0)), '|', TipoTienda)) AS VARBINARY(32)) PERSISTED
 );
 
 CREATE INDEX IDX_CodigoTienda ON Dim_Tienda (CodigoTienda);
@@ -148,11 +186,31 @@ PRINT 'Tabla Dim_Tienda creada.';
 GO
 
 -- PASO 3: CREACIÓN DE LA TABLA DE HECHOS
-PRINT '3. Creando Fact_Ventas...';
+PRINT '3. Creando Fact_Ventas particionada por mes...';
+GO
+
+-- Una partición por mes de Tiempo_Key (RANGE RIGHT: cada límite es el primer
+-- día del mes). Los meses posteriores los agrega el loader con SPLIT RANGE.
+DECLARE @limites NVARCHAR(MAX);
+WITH Meses(n) AS (
+    SELECT TOP (73) CAST(ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS INT) - 1 FROM sys.all_objects
+)
+SELECT @limites = STRING_AGG(CAST('''' + CONVERT(VARCHAR(10), DATEADD(MONTH, n, '2020-01-01'), 120) + '''' AS NVARCHAR(MAX)), ', ')
+    WITHIN GROUP (ORDER BY n)
+FROM Meses;
+
+EXEC('CREATE PARTITION FUNCTION PF_Fact_Ventas_Mes (smalldatetime) AS RANGE RIGHT FOR VALUES (' + @limites + ')');
+PRINT 'Función de partición PF_Fact_Ventas_Mes creada (2020-01 a 2026-01).';
 GO
 
+CREATE PARTITION SCHEME PS_Fact_Ventas_Mes AS PARTITION PF_Fact_Ventas_Mes ALL TO ([PRIMARY]);
+PRINT 'Esquema de partición PS_Fact_Ventas_Mes creado.';
+GO
+
+-- La PK incluye Tiempo_Key (columna de partición) para que todos los índices
+-- queden alineados y cada mes se pueda cargar con ALTER TABLE ... SWITCH
 CREATE TABLE Fact_Ventas (
-    ID_Venta BIGINT PRIMARY KEY IDENTITY(1,1),
+    ID_Venta BIGINT IDENTITY(1,1) NOT NULL,
     Tiempo_Key smalldatetime NOT NULL,
     ID_Producto INT NOT NULL,
     ID_Cliente INT NOT NULL,
@@ -162,53 +220,207 @@ CREATE TABLE Fact_Ventas (
     Total_IVA DECIMAL(18,2) NOT NULL,
     FechaCarga DATETIME DEFAULT GETDATE(),
 
+    CONSTRAINT PK_Fact_Ventas PRIMARY KEY CLUSTERED (Tiempo_Key, ID_Venta),
     FOREIGN KEY (Tiempo_Key) REFERENCES Dim_Tiempo(Tiempo_Key),
     FOREIGN KEY (ID_Producto) REFERENCES Dim_Producto(ID_Producto),
     FOREIGN KEY (ID_Cliente) REFERENCES Dim_Cliente(ID_Cliente),
     FOREIGN KEY (ID_Tienda) REFERENCES Dim_Tienda(ID_Tienda)
-);
+) ON PS_Fact_Ventas_Mes (Tiempo_Key);
 
-CREATE INDEX IDX_Fecha ON Fact_Ventas (Tiempo_Key);
+-- IDX_Fecha ya no hace falta: Tiempo_Key encabeza el índice clustered
 CREATE INDEX IDX_Producto ON Fact_Ventas (ID_Producto);
 CREATE INDEX IDX_Cliente ON Fact_Ventas (ID_Cliente);
 CREATE INDEX IDX_Tienda ON Fact_Ventas (ID_Tienda);
 PRINT 'Tabla Fact_Ventas creada.';
 GO
 
--- PASO 4: CREACIÓN DEL STORED PROCEDURE DIM TIEMPO
-PRINT '4. Creando Stored Procedure Sp_Genera_Dim_Tiempo...';
+-- Ventas agregadas a Fact_Ventas desde la última actualización de los cubos
+-- (Signo = -1: ventas que salieron al reemplazar un mes). sp_Agg_ActualizarCubos
+-- la consume y la vacía. El delta y los cubos no se borran con el DW: solo se
+-- crean si faltan y se recalculan con sp_Agg_ReconstruirCubos (ver abajo)
+IF OBJECT_ID('Fact_Ventas_Delta') IS NULL
+BEGIN
+    CREATE TABLE Fact_Ventas_Delta (
+        Tiempo_Key smalldatetime NOT NULL,
+        ID_Producto INT NOT NULL,
+        ID_Cliente INT NOT NULL,
+        ID_Tienda INT NOT NULL,
+        Cantidad INT NOT NULL,
+        PrecioVenta DECIMAL(18,2) NOT NULL,
+        Total_IVA DECIMAL(18,2) NOT NULL,
+        FechaCarga DATETIME NULL,
+        Signo SMALLINT NOT NULL DEFAULT 1
+    );
+    PRINT 'Tabla Fact_Ventas_Delta creada.';
+END
+GO
+
+-- Cubos: Fact_Ventas resumida por mes para las consultas habituales de los
+-- tableros (cubos.py elige el más chico que responde cada consulta)
+IF OBJECT_ID('Agg_Ventas_Mes') IS NULL
+    CREATE TABLE Agg_Ventas_Mes (
+        Anio INT NOT NULL,
+        Mes INT NOT NULL,
+        Cantidad BIGINT NOT NULL,
+        PrecioVenta DECIMAL(38,2) NOT NULL,
+        Total_IVA DECIMAL(38,2) NOT NULL,
+        Ventas BIGINT NOT NULL,
+        CONSTRAINT PK_Agg_Ventas_Mes PRIMARY KEY CLUSTERED (Anio, Mes)
+    );
+
+IF OBJECT_ID('Agg_Ventas_Mes_Producto') IS NULL
+    CREATE TABLE Agg_Ventas_Mes_Producto (
+        Anio INT NOT NULL,
+        Mes INT NOT NULL,
+        ID_Producto INT NOT NULL,
+        Cantidad BIGINT NOT NULL,
+        PrecioVenta DECIMAL(38,2) NOT NULL,
+        Total_IVA DECIMAL(38,2) NOT NULL,
+        Ventas BIGINT NOT NULL,
+        CONSTRAINT PK_Agg_Ventas_Mes_Producto PRIMARY KEY CLUSTERED (Anio, Mes, ID_Producto)
+    );
+
+IF OBJECT_ID('Agg_Ventas_Mes_Producto_Tienda') IS NULL
+    CREATE TABLE Agg_Ventas_Mes_Producto_Tienda (
+        Anio INT NOT NULL,
+        Mes INT NOT NULL,
+        ID_Producto INT NOT NULL,
+        ID_Tienda INT NOT NULL,
+        Cantidad BIGINT NOT NULL,
+        PrecioVenta DECIMAL(38,2) NOT NULL,
+        Total_IVA DECIMAL(38,2) NOT NULL,
+        Ventas BIGINT NOT NULL,
+        CONSTRAINT PK_Agg_Ventas_Mes_Producto_Tienda PRIMARY KEY CLUSTERED (Anio, Mes, ID_Producto, ID_Tienda)
+    );
+
+IF OBJECT_ID('Agg_Ventas_Mes_Cliente') IS NULL
+    CREATE TABLE Agg_Ventas_Mes_Cliente (
+        Anio INT NOT NULL,
+        Mes INT NOT NULL,
+        ID_Cliente INT NOT NULL,
+        Cantidad BIGINT NOT NULL,
+        PrecioVenta DECIMAL(38,2) NOT NULL,
+        Total_IVA DECIMAL(38,2) NOT NULL,
+        Ventas BIGINT NOT NULL,
+        CONSTRAINT PK_Agg_Ventas_Mes_Cliente PRIMARY KEY CLUSTERED (Anio, Mes, ID_Cliente)
+    );
+PRINT 'Tablas de resumen Agg_Ventas_* listas.';
+GO
+
+-- Los cubos siguen a Fact_Ventas, que se acaba de recrear vacía (y con claves
+-- de dimensión nuevas): se reconstruyen con el único recálculo explícito,
+-- sp_Agg_ReconstruirCubos. En la primera instalación el procedure todavía no
+-- existe y los cubos recién creados ya están vacíos. Con la carga incremental
+-- el orquestador no ejecuta este script y los cubos solo suman el delta.
+IF OBJECT_ID('dbo.sp_Agg_ReconstruirCubos') IS NOT NULL
+BEGIN
+    EXEC dbo.sp_Agg_ReconstruirCubos;
+    PRINT 'Cubos Agg_Ventas_* reconstruidos con Fact_Ventas.';
+END
+GO
+
+-- PASO 4: CREACIÓN DE LOS STORED PROCEDURES DIM TIEMPO
+PRINT '4. Creando Stored Procedures Sp_Genera_Dim_Tiempo_Rango y Sp_Genera_Dim_Tiempo...';
+GO
+
+IF OBJECT_ID('[dbo].[Sp_Genera_Dim_Tiempo_Rango]') IS NOT NULL
+    DROP PROCEDURE [dbo].[Sp_Genera_Dim_Tiempo_Rango];
+GO
+
+-- Inserta en una sola sentencia todas las fechas entre @desde y @hasta que
+-- falten en Dim_Tiempo (las existentes no se tocan, se puede ejecutar varias veces).
+-- Devuelve la cantidad de fechas insertadas.
+CREATE PROCEDURE [dbo].[Sp_Genera_Dim_Tiempo_Rango]
+    @desde DATE,
+    @hasta DATE
+AS
+BEGIN
+SET NOCOUNT ON;
+SET DATEFIRST 1;
+
+IF @desde IS NULL OR @hasta IS NULL OR @desde > @hasta
+BEGIN
+    PRINT 'Rango de fechas inválido para Dim_Tiempo.';
+    SELECT 0 AS Fechas_Insertadas;
+    RETURN 0;
+END;
+
+DECLARE @dias INT = DATEDIFF(DAY, @desde, @hasta) + 1;
+
+/****************************************/
+/* Tabla de números (tally) sin bucles: */
+/* 10^8 filas posibles, se toman @dias  */
+/****************************************/
+WITH E1(n) AS (
+    SELECT 1 FROM (VALUES (1),(1),(1),(1),(1),(1),(1),(1),(1),(1)) AS t(n)
+),
+E4(n) AS (SELECT 1 FROM E1 a CROSS JOIN E1 b CROSS JOIN E1 c CROSS JOIN E1 d),
+E8(n) AS (SELECT 1 FROM E4 a CROSS JOIN E4 b),
+Numeros(n) AS (
+    SELECT TOP (@dias) CAST(ROW_NUMBER() OVER (ORDER BY (SELECT NULL)) AS INT) - 1 FROM E8
+),
+Fechas(fecha) AS (
+    SELECT CONVERT(smalldatetime, DATEADD(DAY, n, @desde)) FROM Numeros
+)
+INSERT Dim_Tiempo (Tiempo_Key, Anio, Mes, Mes_Nombre, Semestre,
+Trimestre, Semana_Anio, Semana_Nro_Mes, Dia, Dia_Nombre,
+Dia_Semana_Nro)
+SELECT
+tiempo_key = f.fecha,
+anio = Datepart(yyyy, f.fecha),
+mes = Datepart(mm, f.fecha),
+-- Por número y no por Datename: no depende del idioma de la sesión
+mes_nombre = CASE Datepart(mm, f.fecha)
+WHEN 1 THEN 'Enero'
+WHEN 2 THEN 'Febrero'
+WHEN 3 THEN 'Marzo'
+WHEN 4 THEN 'Abril'
+WHEN 5 THEN 'Mayo'
+WHEN 6 THEN 'Junio'
+WHEN 7 THEN 'Julio'
+WHEN 8 THEN 'Agosto'
+WHEN 9 THEN 'Septiembre'
+WHEN 10 THEN 'Octubre'
+WHEN 11 THEN 'Noviembre'
+ELSE 'Diciembre'
+END,
+semestre = CASE WHEN Datepart(mm, f.fecha) BETWEEN 1 AND 6 THEN 1 ELSE
+2 END,
+trimestre = Datepart(qq, f.fecha),
+semana_anio = Datepart(wk, f.fecha),
+semana_nro_mes = Datepart(wk, f.fecha) - Datepart(week, Dateadd(dd,
+-Day(f.fecha)+1, f.fecha)) + 1,
+dia = Datepart(dd, f.fecha),
+dia_nombre = CASE Datepart(dw, f.fecha)
+WHEN 1 THEN 'Lunes'
+WHEN 2 THEN 'Martes'
+WHEN 3 THEN 'Miércoles'
+WHEN 4 THEN 'Jueves'
+WHEN 5 THEN 'Viernes'
+WHEN 6 THEN 'Sábado'
+ELSE 'Domingo'
+END,
+dia_semana_nro = Datepart(dw, f.fecha)
+FROM Fechas f
+WHERE NOT EXISTS (SELECT 1 FROM Dim_Tiempo d WHERE d.Tiempo_Key = f.fecha);
+
+DECLARE @insertados INT = @@ROWCOUNT;
+PRINT 'Dim_Tiempo: ' + CAST(@insertados AS VARCHAR) + ' fechas insertadas entre '
+    + CONVERT(VARCHAR(10), @desde, 120) + ' y ' + CONVERT(VARCHAR(10), @hasta, 120);
+SELECT @insertados AS Fechas_Insertadas;
+END;
 GO
 
 IF OBJECT_ID('[dbo].[Sp_Genera_Dim_Tiempo]') IS NOT NULL
     DROP PROCEDURE [dbo].[Sp_Genera_Dim_Tiempo];
 GO
 
+-- Se mantiene para compatibilidad: genera un año completo usando el rango
 CREATE PROCEDURE [dbo].[Sp_Genera_Dim_Tiempo]
     @anio INT
 AS
 BEGIN
 SET NOCOUNT ON;
-SET ARITHABORT OFF;
-SET ARITHIGNORE ON;
-SET DATEFIRST 1;
-SET DATEFORMAT mdy;
-/**************/
-/* Variables */
-/**************/
-DECLARE @dia smallint;
-DECLARE @mes smallint;
-DECLARE @f_txt varchar(10);
-DECLARE @fecha smalldatetime;
-DECLARE @key int;
-DECLARE @vacio smallint;
-DECLARE @fin smallint;
-DECLARE @fin_mes int;
-DECLARE @anioperiodicidad int;
-SELECT @dia = 1, @mes = 1;
-SELECT @f_txt = Convert(char(2), @mes) + '/' + Convert(char(2), @dia) + '/' +
-Convert(char(4), @anio);
-SELECT @fecha = Convert(smalldatetime, @f_txt);
-SELECT @anioperiodicidad = @anio;
 
 /************************************/
 /* Se chequea que el año a procesar */
@@ -220,97 +432,20 @@ PRINT 'El año que ingresó ya existe en la tabla Dim_Tiempo.';
 PRINT 'Procedimiento CANCELADO.................';
 RETURN 0;
 END;
-/*************************/
-/* Se inserta día a día */
-/* hasta terminar el año */
-/*************************/
-SELECT @fin = @anio + 1;
-WHILE (Year(@fecha) < @fin)
-BEGIN
---Armo la fecha
-SET @f_txt = Convert(char(4), Datepart(yyyy, @fecha)) +
-RIGHT('0' + Convert(varchar(2), Datepart(mm, @fecha)), 2) +
-RIGHT('0' + Convert(varchar(2), Datepart(dd, @fecha)), 2);
---Calculo el último día del mes
-SET @fin_mes = Day(Dateadd(d, -1, Dateadd(m, 1, Dateadd(d, - Day(@fecha)
-+ 1, @fecha))));
---Inserto el registro
-INSERT Dim_Tiempo (Tiempo_Key, Anio, Mes, Mes_Nombre, Semestre,
-Trimestre, Semana_Anio ,Semana_Nro_Mes, Dia, Dia_Nombre,
-Dia_Semana_Nro)
-SELECT
-tiempo_key = @fecha,
-anio = Datepart(yyyy, @fecha),
-mes = Datepart(mm, @fecha),
-
-mes_nombre = CASE Datename(mm, @fecha)
-WHEN 'January' THEN 'Enero'
-WHEN 'February' THEN 'Febrero'
-WHEN 'March' THEN 'Marzo'
-WHEN 'April' THEN 'Abril'
-WHEN 'May' THEN 'Mayo'
-WHEN 'June' THEN 'Junio'
-WHEN 'July' THEN 'Julio'
-WHEN 'August' THEN 'Agosto'
-WHEN 'September' THEN 'Septiembre'
-WHEN 'October' THEN 'Octubre'
-WHEN 'November' THEN 'Noviembre'
-WHEN 'December' THEN 'Diciembre'
-ELSE Datename(mm, @fecha)
-END,
-semestre = CASE WHEN Datepart(mm, @fecha) BETWEEN 1 AND 6 THEN 1 ELSE
-2 END,
-trimestre = Datepart(qq, @fecha),
-semana_anio = Datepart(wk, @fecha),
-semana_nro_mes = Datepart(wk, @fecha) - Datepart(week, Dateadd(dd,
--Day(@fecha)+1, @fecha)) + 1,
-dia = Datepart(dd, @fecha),
-dia_nombre = CASE Datename(dw, @fecha)
-WHEN 'Monday' THEN 'Lunes'
-WHEN 'Tuesday' THEN 'Martes'
-WHEN 'Wednesday' THEN 'Miércoles'
-WHEN 'Thursday' THEN 'Jueves'
-WHEN 'Friday' THEN 'Viernes'
-WHEN 'Saturday' THEN 'Sábado'
-WHEN 'Sunday' THEN 'Domingo'
-ELSE Datename(dw, @fecha)
-END,
-dia_semana_nro = Datepart(dw, @fecha);
--- Incremento la fecha
-SELECT @fecha = Dateadd(dd, 1, @fecha);
-END;
+
+DECLARE @desde DATE = DATEFROMPARTS(@anio, 1, 1);
+DECLARE @hasta DATE = DATEFROMPARTS(@anio, 12, 31);
+EXEC dbo.Sp_Genera_Dim_Tiempo_Rango @desde = @desde, @hasta = @hasta;
 END;
 GO
 
--- PASO 5: EJECUCIÓN CON MANEJO DE ERRORES
-PRINT '5. Ejecutando procedimiento para poblar Dim_Tiempo (2020 a 2025)...';
+-- PASO 5: POBLAR Dim_Tiempo
+-- Todos los años en una sola sentencia. Las fechas de ventas fuera de este rango
+-- las agrega dw_loader.py antes de cargar Fact_Ventas.
+PRINT '5. Poblando Dim_Tiempo (2020 a 2025)...';
 GO
 
-DECLARE @Years TABLE (YearValue INT);
-
--- Inserción de todos los años requeridos para la carga de Fact_Ventas
-INSERT INTO @Years VALUES (2020), (2021), (2022), (2023), (2024), (2025);
-
-DECLARE @CurrentYear INT;
-DECLARE year_cursor CURSOR FOR SELECT YearValue FROM @Years;
-
-OPEN year_cursor;
-FETCH NEXT FROM year_cursor INTO @CurrentYear;
-
-WHILE @@FETCH_STATUS = 0
-BEGIN
-    BEGIN TRY
-        EXEC dbo.Sp_Genera_Dim_Tiempo @anio = @CurrentYear;
-    END TRY
-    BEGIN CATCH
-        PRINT 'Error procesando año ' + CAST(@CurrentYear AS VARCHAR) + ': ' + ERROR_MESSAGE();
-    END CATCH
-    
-    FETCH NEXT FROM year_cursor INTO @CurrentYear;
-END
-
-CLOSE year_cursor;
-DEALLOCATE year_cursor;
+EXEC dbo.Sp_Genera_Dim_Tiempo_Rango @desde = '2020-01-01', @hasta = '2025-12-31';
 GO
 
 PRINT '6. Dim_Tiempo poblada exitosamente para el rango 2020-2025.';
\ No newline at end of file
@@ -21,6 +21,15 @@ ELSE
     PRINT '  Tabla INT_Cliente ya existe.';
 GO
 
+-- RowHash: hash de las columnas no clave, para que los MERGE solo actualicen filas que cambiaron
+IF COL_LENGTH('INT_Cliente', 'RowHash') IS NULL
+BEGIN
+    ALTER TABLE INT_Cliente ADD RowHash AS CAST(HASHBYTES('SHA2_256', CONCAT(RazonSocial, '|', ISNULL(Telefono, CHAR(0)), '|', ISNULL(Mail, CHAR(0)), '|',
+            ISNULL(Direccion, CHAR(0)), '|', Localidad, '|', Provincia, '|', ISNULL(CP, CHAR(0)))) AS VARBINARY(32)) PERSISTED;
+    PRINT ' Columna RowHash agregada a INT_Cliente.';
+END
+GO
+
 
 -- TABLA INT: PRODUCTOS
 -- Destino: Dim_Producto
@@ -41,6 +50,15 @@ ELSE
     PRINT '  Tabla INT_Producto ya existe.';
 GO
 
+-- RowHash: hash de las columnas no clave, para que los MERGE solo actualicen filas que cambiaron
+IF COL_LENGTH('INT_Producto', 'RowHash') IS NULL
+BEGIN
+    ALTER TABLE INT_Producto ADD RowHash AS CAST(HASHBYTES('SHA2_256', CONCAT(Descripcion, '|', Categoria, '|', Marca, '|',
+            PrecioCosto, '|', PrecioVentaSugerido)) AS VARBINARY(32)) PERSISTED;
+    PRINT ' Columna RowHash agregada a INT_Producto.';
+END
+GO
+
 
 -- TABLA INT: TIENDAS
 -- Destino: Dim_Tienda
@@ -62,6 +80,15 @@ ELSE
     PRINT '  Tabla INT_Tienda ya existe.';
 GO
 
+-- RowHash: hash de las columnas no clave, para que los MERGE solo actualicen filas que cambiaron
+IF COL_LENGTH('INT_Tienda', 'RowHash') IS NULL
+BEGIN
+    ALTER TABLE INT_Tienda ADD RowHash AS CAST(HASHBYTES('SHA2_256', CONCAT(Descripcion, '|', ISNULL(Direccion, CHAR(0)), '|', Localidad, '|',
+            Provincia, '|', ISNULL(CP, CHAR(0)), '|', TipoTienda)) AS VARBINARY(32)) PERSISTED;
+    PRINT ' Columna RowHash agregada a INT_Tienda.';
+END
+GO
+
 
 -- TABLA INT: VENTAS
 -- Destino: Fact_Ventas
@@ -1,100 +1,186 @@
--- STAGING: Clientes
-IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'STG_Clientes')
-BEGIN
-    CREATE TABLE STG_Clientes (
-        CodCliente VARCHAR(100),
-        RazonSocial VARCHAR(500),
-        Telefono VARCHAR(100),
-        Mail VARCHAR(500),
-        Direccion VARCHAR(500),
-        Localidad VARCHAR(200),
-        Provincia VARCHAR(200),
-        CP VARCHAR(50),
-        Fecha_Carga DATETIME DEFAULT GETDATE()
-    );
-    PRINT ' Tabla STG_Clientes creada exitosamente.';
-END
-ELSE
-    PRINT '  Tabla STG_Clientes ya existe.';
-GO
-
--- STAGING: Productos
-IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'STG_Productos')
-BEGIN
-    CREATE TABLE STG_Productos (
-        CodigoProducto VARCHAR(100),
-        Descripcion VARCHAR(500),
-        Categoria VARCHAR(200),
-        Marca VARCHAR(200),
-        PrecioCosto VARCHAR(100),  -- Se guarda como texto inicialmente
-        PrecioVentaSugerido VARCHAR(100),
-        Fecha_Carga DATETIME DEFAULT GETDATE()
-    );
-    PRINT ' Tabla STG_Productos creada exitosamente.';
-END
-ELSE
-    PRINT '  Tabla STG_Productos ya existe.';
-GO
-
--- STAGING: Tiendas
-IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'STG_Tiendas')
-BEGIN
-    CREATE TABLE STG_Tiendas (
-        CodigoTienda VARCHAR(100),
-        Descripcion VARCHAR(500),
-        Direccion VARCHAR(500),
-        Localidad VARCHAR(500),
-        Provincia VARCHAR(200),
-        CP VARCHAR(50),
-        TipoTienda VARCHAR(100),
-        Fecha_Carga DATETIME DEFAULT GETDATE()
-    );
-    PRINT ' Tabla STG_Tiendas creada exitosamente.';
-END
-ELSE
-    PRINT '  Tabla STG_Tiendas ya existe.';
-GO
-
--- STAGING: Ventas
-IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'STG_Ventas')
-BEGIN
-    CREATE TABLE STG_Ventas (
-        FechaVenta VARCHAR(100),  -- Texto para manejar diferentes formatos
-        CodigoProducto VARCHAR(100),
-        Producto VARCHAR(500),   -- Descripción redundante
-        Cantidad VARCHAR(50),    -- Texto para manejar posibles errores
-        PrecioVenta VARCHAR(100), -- Texto para manejar decimales/formato
-        CodigoCliente VARCHAR(100),
-        Cliente VARCHAR(500),    -- Descripción redundante
-        CodigoTienda VARCHAR(100),
-        Tienda VARCHAR(500),     -- Descripción redundante
-        Fecha_Carga DATETIME DEFAULT GETDATE()
-    );
-    PRINT ' Tabla STG_Ventas creada exitosamente.';
-END
-ELSE
-    PRINT ' Tabla STG_Ventas ya existe.';
-GO
-
--- STAGING: Ventas_Add (estructura idéntica a Ventas)
-IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'STG_Ventas_Add')
-BEGIN
-    CREATE TABLE STG_Ventas_Add (
-        FechaVenta VARCHAR(100),
-        CodigoProducto VARCHAR(100),
-        Producto VARCHAR(500),
-        Cantidad VARCHAR(50),
-        PrecioVenta VARCHAR(100),
-        CodigoCliente VARCHAR(100),
-        Cliente VARCHAR(500),
-        CodigoTienda VARCHAR(100),
-        Tienda VARCHAR(500),
-        Fecha_Carga DATETIME DEFAULT GETDATE()
-    );
-    PRINT ' Tabla STG_Ventas_Add creada exitosamente.';
-END
-ELSE
-    PRINT '  Tabla STG_Ventas_Add ya existe.';
-GO
-
-PRINT ' Verificación de tablas STAGING completada.';
+-- STAGING: Clientes
+IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'STG_Clientes')
+BEGIN
+    CREATE TABLE STG_Clientes (
+        CodCliente VARCHAR(100),
+        RazonSocial VARCHAR(500),
+        Telefono VARCHAR(100),
+        Mail VARCHAR(500),
+        Direccion VARCHAR(500),
+        Localidad VARCHAR(200),
+        Provincia VARCHAR(200),
+        CP VARCHAR(50),
+        Fecha_Carga DATETIME DEFAULT GETDATE(),
+        Archivo_Origen VARCHAR(260) NULL, -- Archivo (shard) del que salió la fila
+        Lote_Carga VARCHAR(40) NULL       -- Ejecución de extract_data que cargó la fila
+    );
+    PRINT ' Tabla STG_Clientes creada exitosamente.';
+END
+ELSE
+    PRINT '  Tabla STG_Clientes ya existe.';
+GO
+
+-- STAGING: Productos
+IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'STG_Productos')
+BEGIN
+    CREATE TABLE STG_Productos (
+        CodigoProducto VARCHAR(100),
+        Descripcion VARCHAR(500),
+        Categoria VARCHAR(200),
+        Marca VARCHAR(200),
+        PrecioCosto VARCHAR(100),  -- Se guarda como texto inicialmente
+        PrecioVentaSugerido VARCHAR(100),
+        Fecha_Carga DATETIME DEFAULT GETDATE(),
+        Archivo_Origen VARCHAR(260) NULL, -- Archivo (shard) del que salió la fila
+        Lote_Carga VARCHAR(40) NULL       -- Ejecución de extract_data que cargó la fila
+    );
+    PRINT ' Tabla STG_Productos creada exitosamente.';
+END
+ELSE
+    PRINT '  Tabla STG_Productos ya existe.';
+GO
+
+-- STAGING: Tiendas
+IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'STG_Tiendas')
+BEGIN
+    CREATE TABLE STG_Tiendas (
+        CodigoTienda VARCHAR(100),
+        Descripcion VARCHAR(500),
+        Direccion VARCHAR(500),
+        Localidad VARCHAR(500),
+        Provincia VARCHAR(200),
+        CP VARCHAR(50),
+        TipoTienda VARCHAR(100),
+        Fecha_Carga DATETIME DEFAULT GETDATE(),
+        Archivo_Origen VARCHAR(260) NULL, -- Archivo (shard) del que salió la fila
+        Lote_Carga VARCHAR(40) NULL       -- Ejecución de extract_data que cargó la fila
+    );
+    PRINT ' Tabla STG_Tiendas creada exitosamente.';
+END
+ELSE
+    PRINT '  Tabla STG_Tiendas ya existe.';
+GO
+
+-- STAGING: Ventas
+IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'STG_Ventas')
+BEGIN
+    CREATE TABLE STG_Ventas (
+        FechaVenta VARCHAR(100),  -- Texto para manejar diferentes formatos
+        CodigoProducto VARCHAR(100),
+        Producto VARCHAR(500),   -- Descripción redundante
+        Cantidad VARCHAR(50),    -- Texto para manejar posibles errores
+        PrecioVenta VARCHAR(100), -- Texto para manejar decimales/formato
+        CodigoCliente VARCHAR(100),
+        Cliente VARCHAR(500),    -- Descripción redundante
+        CodigoTienda VARCHAR(100),
+        Tienda VARCHAR(500),     -- Descripción redundante
+        Fecha_Carga DATETIME DEFAULT GETDATE(),
+        Archivo_Origen VARCHAR(260) NULL, -- Archivo (shard) del que salió la fila
+        Lote_Carga VARCHAR(40) NULL       -- Ejecución de extract_data que cargó la fila
+    );
+    PRINT ' Tabla STG_Ventas creada exitosamente.';
+END
+ELSE
+    PRINT ' Tabla STG_Ventas ya existe.';
+GO
+
+-- STAGING: Ventas_Add (estructura idéntica a Ventas)
+IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'STG_Ventas_Add')
+BEGIN
+    CREATE TABLE STG_Ventas_Add (
+        FechaVenta VARCHAR(100),
+        CodigoProducto VARCHAR(100),
+        Producto VARCHAR(500),
+        Cantidad VARCHAR(50),
+        PrecioVenta VARCHAR(100),
+        CodigoCliente VARCHAR(100),
+        Cliente VARCHAR(500),
+        CodigoTienda VARCHAR(100),
+        Tienda VARCHAR(500),
+        Fecha_Carga DATETIME DEFAULT GETDATE(),
+        Archivo_Origen VARCHAR(260) NULL, -- Archivo (shard) del que salió la fila
+        Lote_Carga VARCHAR(40) NULL       -- Ejecución de extract_data que cargó la fila
+    );
+    PRINT ' Tabla STG_Ventas_Add creada exitosamente.';
+END
+ELSE
+    PRINT '  Tabla STG_Ventas_Add ya existe.';
+GO
+
+-- Archivo_Origen en tablas creadas antes de la carga por shards (al final:
+-- BULK INSERT carga las columnas en el orden de la tabla)
+IF COL_LENGTH('STG_Clientes', 'Archivo_Origen') IS NULL
+    ALTER TABLE STG_Clientes ADD Archivo_Origen VARCHAR(260) NULL;
+IF COL_LENGTH('STG_Productos', 'Archivo_Origen') IS NULL
+    ALTER TABLE STG_Productos ADD Archivo_Origen VARCHAR(260) NULL;
+IF COL_LENGTH('STG_Tiendas', 'Archivo_Origen') IS NULL
+    ALTER TABLE STG_Tiendas ADD Archivo_Origen VARCHAR(260) NULL;
+IF COL_LENGTH('STG_Ventas', 'Archivo_Origen') IS NULL
+    ALTER TABLE STG_Ventas ADD Archivo_Origen VARCHAR(260) NULL;
+IF COL_LENGTH('STG_Ventas_Add', 'Archivo_Origen') IS NULL
+    ALTER TABLE STG_Ventas_Add ADD Archivo_Origen VARCHAR(260) NULL;
+
+-- Lote_Carga (después de Archivo_Origen, por el mismo motivo)
+IF COL_LENGTH('STG_Clientes', 'Lote_Carga') IS NULL
+    ALTER TABLE STG_Clientes ADD Lote_Carga VARCHAR(40) NULL;
+IF COL_LENGTH('STG_Productos', 'Lote_Carga') IS NULL
+    ALTER TABLE STG_Productos ADD Lote_Carga VARCHAR(40) NULL;
+IF COL_LENGTH('STG_Tiendas', 'Lote_Carga') IS NULL
+    ALTER TABLE STG_Tiendas ADD Lote_Carga VARCHAR(40) NULL;
+IF COL_LENGTH('STG_Ventas', 'Lote_Carga') IS NULL
+    ALTER TABLE STG_Ventas ADD Lote_Carga VARCHAR(40) NULL;
+IF COL_LENGTH('STG_Ventas_Add', 'Lote_Carga') IS NULL
+    ALTER TABLE STG_Ventas_Add ADD Lote_Carga VARCHAR(40) NULL;
+GO
+
+-- CALIDAD: perfil de las ventas de cada lote de STAGING (sp_Perfilar_Calidad_Ventas).
+-- Lote es el Lote_Carga de las ventas cargadas (uno por ejecución de extract_data);
+-- DWLoader y sp_Cargar_INT_Ventas leen estos conteos en lugar de volver a validar STAGING.
+-- Los perfiles con Lote DATETIME (la Fecha_Carga, de versiones anteriores) se
+-- descartan: se recalculan la próxima vez que se consultan.
+IF EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS
+           WHERE TABLE_NAME = 'DQ_Ventas' AND COLUMN_NAME = 'Lote' AND DATA_TYPE = 'datetime')
+BEGIN
+    DROP TABLE IF EXISTS DQ_Ventas_Muestras;
+    DROP TABLE DQ_Ventas;
+    PRINT ' Tablas DQ_Ventas y DQ_Ventas_Muestras descartadas (Lote pasa a Lote_Carga).';
+END
+
+IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'DQ_Ventas')
+BEGIN
+    CREATE TABLE DQ_Ventas (
+        Lote VARCHAR(40) NOT NULL PRIMARY KEY,
+        Total_Problemas INT NOT NULL,
+        Cantidad_Invalida INT NOT NULL,
+        Precio_Invalido INT NOT NULL,
+        Precio_Demasiado_Grande INT NOT NULL,
+        Fecha_Invalida INT NOT NULL,
+        Total_Registros INT NOT NULL,
+        Fecha_Perfil DATETIME NOT NULL DEFAULT GETDATE()
+    );
+    PRINT ' Tabla DQ_Ventas creada exitosamente.';
+END
+ELSE
+    PRINT '  Tabla DQ_Ventas ya existe.';
+GO
+
+-- CALIDAD: ejemplos de ventas con problemas de cada lote
+IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_NAME = 'DQ_Ventas_Muestras')
+BEGIN
+    CREATE TABLE DQ_Ventas_Muestras (
+        Lote VARCHAR(40) NOT NULL,
+        FechaVenta VARCHAR(100),
+        CodigoProducto VARCHAR(100),
+        Cantidad VARCHAR(50),
+        PrecioVenta VARCHAR(100),
+        Tipo_Problema VARCHAR(30) NOT NULL,
+        Archivo_Origen VARCHAR(260) NULL
+    );
+    CREATE INDEX IDX_DQ_Ventas_Muestras_Lote ON DQ_Ventas_Muestras (Lote);
+    PRINT ' Tabla DQ_Ventas_Muestras creada exitosamente.';
+END
+ELSE
+    PRINT '  Tabla DQ_Ventas_Muestras ya existe.';
+GO
+
+PRINT ' Verificación de tablas STAGING completada.';
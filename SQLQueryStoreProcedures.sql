@@ -1,27 +1,42 @@
+-- Los MERGE comparan RowHash (hash SHA2_256 de las columnas no clave, calculado
+-- igual que la columna RowHash de INT_* y Dim_*): solo se actualizan las filas
+-- que cambiaron. Cada SP devuelve Insertados, Actualizados y Sin_Cambios.
+-- Los campos vacíos del CSV llegan a STAGING como NULL: las columnas de texto
+-- obligatorias (NOT NULL en INT_*) se cargan como 'Sin dato'.
 CREATE OR ALTER PROCEDURE sp_Cargar_INT_Clientes
 AS
 BEGIN
     SET NOCOUNT ON;
+    DECLARE @acciones TABLE (Accion NVARCHAR(10));
+    DECLARE @origen INT, @insertados INT, @actualizados INT;
+
     BEGIN TRY
         BEGIN TRAN;
 
+        SELECT @origen = COUNT(*) FROM STG_Clientes;
+
         MERGE INT_Cliente AS T
         USING (
-            SELECT
-                CodCliente,
-                RazonSocial,
-                Telefono,
-                Mail,
-                Direccion,
-                Localidad,
-                Provincia,
-                CP,
-                GETDATE() AS FechaCreacion
-            FROM STG_Clientes
+            SELECT *,
+                CAST(HASHBYTES('SHA2_256', CONCAT(RazonSocial, '|', ISNULL(Telefono, CHAR(0)), '|', ISNULL(Mail, CHAR(0)), '|',
+                    ISNULL(Direccion, CHAR(0)), '|', Localidad, '|', Provincia, '|', ISNULL(CP, CHAR(0)))) AS VARBINARY(32)) AS RowHash
+            FROM (
+                SELECT
+                    CodCliente,
+                    ISNULL(RazonSocial, 'Sin dato') AS RazonSocial,
+                    Telefono,
+                    Mail,
+                    Direccion,
+                    ISNULL(Localidad, 'Sin dato') AS Localidad,
+                    ISNULL(Provincia, 'Sin dato') AS Provincia,
+                    CP,
+                    GETDATE() AS FechaCreacion
+                FROM STG_Clientes
+            ) AS C
         ) AS S
         ON S.CodCliente = T.CodCliente
 
-        WHEN MATCHED THEN
+        WHEN MATCHED AND T.RowHash <> S.RowHash THEN
             UPDATE SET 
                 T.RazonSocial = S.RazonSocial,
                 T.Telefono = S.Telefono,
@@ -33,7 +48,9 @@ BEGIN
 
         WHEN NOT MATCHED THEN
             INSERT (CodCliente, RazonSocial, Telefono, Mail, Direccion, Localidad, Provincia, CP, FechaCreacion)
-            VALUES (S.CodCliente, S.RazonSocial, S.Telefono, S.Mail, S.Direccion, S.Localidad, S.Provincia, S.CP, S.FechaCreacion);
+            VALUES (S.CodCliente, S.RazonSocial, S.Telefono, S.Mail, S.Direccion, S.Localidad, S.Provincia, S.CP, S.FechaCreacion)
+
+        OUTPUT $action INTO @acciones;
 
         COMMIT;
     END TRY
@@ -41,6 +58,14 @@ BEGIN
         IF @@TRANCOUNT > 0 ROLLBACK;
         THROW;
     END CATCH
+
+    SELECT @insertados = COUNT(CASE WHEN Accion = 'INSERT' THEN 1 END),
+           @actualizados = COUNT(CASE WHEN Accion = 'UPDATE' THEN 1 END)
+    FROM @acciones;
+
+    PRINT ' INT_Cliente: ' + CAST(@insertados AS VARCHAR) + ' insertados, ' + CAST(@actualizados AS VARCHAR)
+        + ' actualizados, ' + CAST(@origen - @insertados - @actualizados AS VARCHAR) + ' sin cambios';
+    SELECT @insertados AS Insertados, @actualizados AS Actualizados, @origen - @insertados - @actualizados AS Sin_Cambios;
 END;
 GO
 
@@ -48,16 +73,18 @@ CREATE OR ALTER PROCEDURE sp_Cargar_INT_Productos
 AS
 BEGIN
     SET NOCOUNT ON;
+    DECLARE @acciones TABLE (Accion NVARCHAR(10));
+    DECLARE @origen INT, @insertados INT, @actualizados INT;
+
     BEGIN TRY
         BEGIN TRAN;
 
-        MERGE INT_Producto AS T
-        USING (
+        ;WITH Origen AS (
             SELECT
                 CodigoProducto,
                 Descripcion,
-                Categoria,
-                Marca,
+                ISNULL(Categoria, 'Sin dato') AS Categoria,
+                ISNULL(Marca, 'Sin dato') AS Marca,
                 COALESCE(TRY_CONVERT(DECIMAL(18,2), NULLIF(PrecioCosto, '')), 0.00) AS PrecioCosto,
                 COALESCE(TRY_CONVERT(DECIMAL(18,2), NULLIF(PrecioVentaSugerido, '')), 0.00) AS PrecioVentaSugerido,
                 GETDATE() AS FechaCreacion
@@ -66,10 +93,20 @@ BEGIN
                 AND CodigoProducto != ''
                 AND Descripcion IS NOT NULL
                 AND Descripcion != ''
-        ) AS S
+        )
+        SELECT *,
+            CAST(HASHBYTES('SHA2_256', CONCAT(Descripcion, '|', Categoria, '|', Marca, '|',
+                PrecioCosto, '|', PrecioVentaSugerido)) AS VARBINARY(32)) AS RowHash
+        INTO #Origen
+        FROM Origen;
+
+        SET @origen = @@ROWCOUNT;
+
+        MERGE INT_Producto AS T
+        USING #Origen AS S
         ON T.CodigoProducto = S.CodigoProducto
 
-        WHEN MATCHED THEN 
+        WHEN MATCHED AND T.RowHash <> S.RowHash THEN 
             UPDATE SET 
                 T.Descripcion = S.Descripcion,
                 T.Categoria = S.Categoria,
@@ -79,13 +116,12 @@ BEGIN
 
         WHEN NOT MATCHED THEN
             INSERT (CodigoProducto, Descripcion, Categoria, Marca, PrecioCosto, PrecioVentaSugerido, FechaCreacion)
-            VALUES (S.CodigoProducto, S.Descripcion, S.Categoria, S.Marca, S.PrecioCosto, S.PrecioVentaSugerido, S.FechaCreacion);
+            VALUES (S.CodigoProducto, S.Descripcion, S.Categoria, S.Marca, S.PrecioCosto, S.PrecioVentaSugerido, S.FechaCreacion)
+
+        OUTPUT $action INTO @acciones;
 
         COMMIT;
         
-        DECLARE @inserted INT = @@ROWCOUNT;
-        PRINT ' INT_Producto: ' + CAST(@inserted AS VARCHAR) + ' registros procesados';
-        
     END TRY
     BEGIN CATCH
         IF @@TRANCOUNT > 0 ROLLBACK;
@@ -97,6 +133,14 @@ BEGIN
         PRINT ' Error en sp_Cargar_INT_Productos: ' + @ErrorMessage;
         THROW;
     END CATCH
+
+    SELECT @insertados = COUNT(CASE WHEN Accion = 'INSERT' THEN 1 END),
+           @actualizados = COUNT(CASE WHEN Accion = 'UPDATE' THEN 1 END)
+    FROM @acciones;
+
+    PRINT ' INT_Producto: ' + CAST(@insertados AS VARCHAR) + ' insertados, ' + CAST(@actualizados AS VARCHAR)
+        + ' actualizados, ' + CAST(@origen - @insertados - @actualizados AS VARCHAR) + ' sin cambios';
+    SELECT @insertados AS Insertados, @actualizados AS Actualizados, @origen - @insertados - @actualizados AS Sin_Cambios;
 END;
 GO
 
@@ -104,25 +148,35 @@ CREATE OR ALTER PROCEDURE sp_Cargar_INT_Tiendas
 AS
 BEGIN
     SET NOCOUNT ON;
+    DECLARE @acciones TABLE (Accion NVARCHAR(10));
+    DECLARE @origen INT, @insertados INT, @actualizados INT;
+
     BEGIN TRY
         BEGIN TRAN;
 
+        SELECT @origen = COUNT(*) FROM STG_Tiendas;
+
         MERGE INT_Tienda AS T
         USING (
-            SELECT
-                CodigoTienda,
-                Descripcion,
-                Direccion,
-                Localidad,
-                Provincia,
-                CP,
-                TipoTienda,
-                GETDATE() AS FechaCreacion
-            FROM STG_Tiendas
+            SELECT *,
+                CAST(HASHBYTES('SHA2_256', CONCAT(Descripcion, '|', ISNULL(Direccion, CHAR(0)), '|', Localidad, '|',
+                    Provincia, '|', ISNULL(CP, CHAR(0)), '|', TipoTienda)) AS VARBINARY(32)) AS RowHash
+            FROM (
+                SELECT
+                    CodigoTienda,
+                    ISNULL(Descripcion, 'Sin dato') AS Descripcion,
+                    Direccion,
+                    ISNULL(Localidad, 'Sin dato') AS Localidad,
+                    ISNULL(Provincia, 'Sin dato') AS Provincia,
+                    CP,
+                    ISNULL(TipoTienda, 'Sin dato') AS TipoTienda,
+                    GETDATE() AS FechaCreacion
+                FROM STG_Tiendas
+            ) AS C
         ) AS S
         ON T.CodigoTienda = S.CodigoTienda
 
-        WHEN MATCHED THEN
+        WHEN MATCHED AND T.RowHash <> S.RowHash THEN
             UPDATE SET 
                 T.Descripcion = S.Descripcion,
                 T.Direccion = S.Direccion,
@@ -133,7 +187,9 @@ BEGIN
 
         WHEN NOT MATCHED THEN
             INSERT (CodigoTienda, Descripcion, Direccion, Localidad, Provincia, CP, TipoTienda, FechaCreacion)
-            VALUES (S.CodigoTienda, S.Descripcion, S.Direccion, S.Localidad, S.Provincia, S.CP, S.TipoTienda, S.FechaCreacion);
+            VALUES (S.CodigoTienda, S.Descripcion, S.Direccion, S.Localidad, S.Provincia, S.CP, S.TipoTienda, S.FechaCreacion)
+
+        OUTPUT $action INTO @acciones;
 
         COMMIT;
     END TRY
@@ -141,6 +197,124 @@ BEGIN
         IF @@TRANCOUNT > 0 ROLLBACK;
         THROW;
     END CATCH
+
+    SELECT @insertados = COUNT(CASE WHEN Accion = 'INSERT' THEN 1 END),
+           @actualizados = COUNT(CASE WHEN Accion = 'UPDATE' THEN 1 END)
+    FROM @acciones;
+
+    PRINT ' INT_Tienda: ' + CAST(@insertados AS VARCHAR) + ' insertados, ' + CAST(@actualizados AS VARCHAR)
+        + ' actualizados, ' + CAST(@origen - @insertados - @actualizados AS VARCHAR) + ' sin cambios';
+    SELECT @insertados AS Insertados, @actualizados AS Actualizados, @origen - @insertados - @actualizados AS Sin_Cambios;
+END;
+GO
+
+-- Lote de las ventas en STAGING: su Lote_Carga, el identificador de la
+-- ejecución de extract_data que las cargó (el mismo en todas las tablas). Las
+-- filas cargadas por otros medios, sin Lote_Carga, usan su Fecha_Carga. Con
+-- STAGING vacío devuelve 'SIN_VENTAS'.
+CREATE OR ALTER FUNCTION dbo.fn_LoteVentasSTG()
+RETURNS VARCHAR(40)
+AS
+BEGIN
+    RETURN ISNULL((
+        SELECT MAX(Lote) FROM (
+            SELECT TOP 1 ISNULL(Lote_Carga, CONVERT(VARCHAR(40), Fecha_Carga, 121)) AS Lote FROM STG_Ventas
+            UNION ALL
+            SELECT TOP 1 ISNULL(Lote_Carga, CONVERT(VARCHAR(40), Fecha_Carga, 121)) AS Lote FROM STG_Ventas_Add
+        ) AS L
+    ), 'SIN_VENTAS');
+END;
+GO
+
+-- Perfil de calidad de las ventas del lote en STAGING, en una sola pasada: cada
+-- TRY_CONVERT se evalúa una vez por fila. Las reglas son las que descarta
+-- sp_Cargar_INT_Ventas (Precio_Demasiado_Grande: fuera del rango de
+-- DECIMAL(18,2), en los dos signos), así Total_Problemas son sus filas filtradas. Guarda los conteos por regla en
+-- DQ_Ventas y hasta @muestras ejemplos en DQ_Ventas_Muestras (reemplaza el
+-- perfil anterior del mismo lote). Con @resumen = 1 devuelve los conteos.
+CREATE OR ALTER PROCEDURE sp_Perfilar_Calidad_Ventas
+    @muestras INT = 5,
+    @resumen BIT = 1
+AS
+BEGIN
+    SET NOCOUNT ON;
+    DECLARE @Lote VARCHAR(40) = dbo.fn_LoteVentasSTG();
+
+    -- Las filas válidas quedan agrupadas en una sola fila (sin sus valores) y las
+    -- inválidas conservan los suyos para las muestras: #Perfil es chica
+    SELECT R.Con_Problema, R.Fecha_Invalida, R.Cantidad_Invalida, R.Precio_Invalido, R.Precio_Demasiado_Grande,
+           M.FechaVenta, M.CodigoProducto, M.Cantidad, M.PrecioVenta, M.Archivo_Origen,
+           COUNT_BIG(*) AS Filas
+    INTO #Perfil
+    FROM (
+        SELECT FechaVenta, CodigoProducto, Cantidad, PrecioVenta, Archivo_Origen FROM STG_Ventas
+        UNION ALL
+        SELECT FechaVenta, CodigoProducto, Cantidad, PrecioVenta, Archivo_Origen FROM STG_Ventas_Add
+    ) AS V
+    CROSS APPLY (
+        SELECT TRY_CONVERT(DATE, V.FechaVenta) AS Fecha,
+               TRY_CONVERT(INT, V.Cantidad) AS Cantidad,
+               TRY_CONVERT(DECIMAL(30,10), V.PrecioVenta) AS Precio
+    ) AS C
+    CROSS APPLY (
+        SELECT CASE WHEN C.Fecha IS NULL THEN 1 ELSE 0 END AS Fecha_Invalida,
+               CASE WHEN C.Cantidad IS NULL THEN 1 ELSE 0 END AS Cantidad_Invalida,
+               CASE WHEN C.Precio IS NULL THEN 1 ELSE 0 END AS Precio_Invalido,
+               CASE WHEN C.Precio NOT BETWEEN -99999999999999.99 AND 99999999999999.99 THEN 1 ELSE 0 END AS Precio_Demasiado_Grande,
+               CASE WHEN C.Fecha IS NULL OR C.Cantidad IS NULL OR C.Precio IS NULL
+                         OR C.Precio NOT BETWEEN -99999999999999.99 AND 99999999999999.99 THEN 1 ELSE 0 END AS Con_Problema
+    ) AS R
+    CROSS APPLY (
+        SELECT CASE WHEN R.Con_Problema = 1 THEN V.FechaVenta END AS FechaVenta,
+               CASE WHEN R.Con_Problema = 1 THEN V.CodigoProducto END AS CodigoProducto,
+               CASE WHEN R.Con_Problema = 1 THEN V.Cantidad END AS Cantidad,
+               CASE WHEN R.Con_Problema = 1 THEN V.PrecioVenta END AS PrecioVenta,
+               CASE WHEN R.Con_Problema = 1 THEN V.Archivo_Origen END AS Archivo_Origen
+    ) AS M
+    GROUP BY R.Con_Problema, R.Fecha_Invalida, R.Cantidad_Invalida, R.Precio_Invalido, R.Precio_Demasiado_Grande,
+             M.FechaVenta, M.CodigoProducto, M.Cantidad, M.PrecioVenta, M.Archivo_Origen;
+
+    BEGIN TRY
+        BEGIN TRAN;
+
+        DELETE FROM DQ_Ventas_Muestras WHERE Lote = @Lote;
+        DELETE FROM DQ_Ventas WHERE Lote = @Lote;
+
+        INSERT INTO DQ_Ventas (Lote, Total_Problemas, Cantidad_Invalida, Precio_Invalido, Precio_Demasiado_Grande,
+                               Fecha_Invalida, Total_Registros, Fecha_Perfil)
+        SELECT @Lote,
+               ISNULL(SUM(Con_Problema * Filas), 0),
+               ISNULL(SUM(Cantidad_Invalida * Filas), 0),
+               ISNULL(SUM(Precio_Invalido * Filas), 0),
+               ISNULL(SUM(Precio_Demasiado_Grande * Filas), 0),
+               ISNULL(SUM(Fecha_Invalida * Filas), 0),
+               ISNULL(SUM(Filas), 0),
+               GETDATE()
+        FROM #Perfil;
+
+        INSERT INTO DQ_Ventas_Muestras (Lote, FechaVenta, CodigoProducto, Cantidad, PrecioVenta, Tipo_Problema, Archivo_Origen)
+        SELECT TOP (@muestras) @Lote, FechaVenta, CodigoProducto, Cantidad, PrecioVenta,
+               CASE
+                   WHEN Fecha_Invalida = 1 THEN 'FECHA_INVALIDA'
+                   WHEN Cantidad_Invalida = 1 THEN 'CANTIDAD_INVALIDA'
+                   WHEN Precio_Invalido = 1 THEN 'PRECIO_INVALIDO'
+                   ELSE 'PRECIO_DEMASIADO_GRANDE'
+               END,
+               Archivo_Origen
+        FROM #Perfil
+        WHERE Con_Problema = 1;
+
+        COMMIT;
+    END TRY
+    BEGIN CATCH
+        IF @@TRANCOUNT > 0 ROLLBACK;
+        THROW;
+    END CATCH
+
+    IF @resumen = 1
+        SELECT Total_Problemas, Cantidad_Invalida, Precio_Invalido, Precio_Demasiado_Grande, Fecha_Invalida, Total_Registros
+        FROM DQ_Ventas
+        WHERE Lote = @Lote;
 END;
 GO
 
@@ -148,6 +322,12 @@ CREATE OR ALTER PROCEDURE sp_Cargar_INT_Ventas
 AS
 BEGIN
     SET NOCOUNT ON;
+    DECLARE @Lote VARCHAR(40) = dbo.fn_LoteVentasSTG();
+
+    -- Las filas inválidas se cuentan con el perfil del lote (DQ_Ventas), sin
+    -- volver a validar STAGING; si el lote no se perfiló, se perfila ahora
+    IF NOT EXISTS (SELECT 1 FROM DQ_Ventas WHERE Lote = @Lote)
+        EXEC sp_Perfilar_Calidad_Ventas @resumen = 0;
 
     BEGIN TRY
         BEGIN TRAN;
@@ -206,14 +386,10 @@ BEGIN
         DECLARE @inserted INT = @@ROWCOUNT;
         DECLARE @filtered_out INT;
         
-        SELECT @filtered_out = COUNT(*)
-        FROM (
-            SELECT * FROM STG_Ventas
-            UNION ALL SELECT * FROM STG_Ventas_Add
-        ) s
-        WHERE TRY_CONVERT(DATE, FechaVenta) IS NULL 
-           OR TRY_CONVERT(INT, Cantidad) IS NULL 
-           OR TRY_CONVERT(DECIMAL(18,2), PrecioVenta) IS NULL;
+        -- Sin perfil del lote (p. ej. falló sp_Perfilar_Calidad_Ventas) no hay filas
+        -- filtradas que informar: 0 y no un PRINT vacío por concatenar NULL
+        SELECT @filtered_out = Total_Problemas FROM DQ_Ventas WHERE Lote = @Lote;
+        SET @filtered_out = ISNULL(@filtered_out, 0);
 
         PRINT ' INT_Ventas: ' + CAST(@inserted AS VARCHAR) + ' registros insertados';
         PRINT '  INT_Ventas: ' + CAST(@filtered_out AS VARCHAR) + ' registros filtrados (datos inválidos)';
@@ -234,59 +410,39 @@ BEGIN
 END;
 GO
 
--- SP para verificar datos problemáticos en ventas
+-- SP para verificar datos problemáticos en ventas: conteos del perfil del lote
+-- en DQ_Ventas (si el lote no se perfiló, se perfila ahora)
 CREATE OR ALTER PROCEDURE sp_CheckVentasProblematicData
 AS
 BEGIN
     SET NOCOUNT ON;
+    DECLARE @Lote VARCHAR(40) = dbo.fn_LoteVentasSTG();
     
-    SELECT 
-        SUM(CASE 
-            WHEN TRY_CONVERT(INT, Cantidad) IS NULL 
-            OR TRY_CONVERT(DECIMAL(30,10), PrecioVenta) IS NULL 
-            OR TRY_CONVERT(DECIMAL(30,10), PrecioVenta) > 99999999999999.99 
-            OR TRY_CONVERT(DATE, FechaVenta) IS NULL
-            THEN 1 ELSE 0 
-        END) as Total_Problemas,
-        
-        SUM(CASE WHEN TRY_CONVERT(INT, Cantidad) IS NULL THEN 1 ELSE 0 END) as Cantidad_Invalida,
-        SUM(CASE WHEN TRY_CONVERT(DECIMAL(30,10), PrecioVenta) IS NULL THEN 1 ELSE 0 END) as Precio_Invalido,
-        SUM(CASE WHEN TRY_CONVERT(DECIMAL(30,10), PrecioVenta) > 99999999999999.99 THEN 1 ELSE 0 END) as Precio_Demasiado_Grande,
-        SUM(CASE WHEN TRY_CONVERT(DATE, FechaVenta) IS NULL THEN 1 ELSE 0 END) as Fecha_Invalida,
-        
-        COUNT(*) as Total_Registros
-    FROM (
-        SELECT * FROM STG_Ventas
-        UNION ALL 
-        SELECT * FROM STG_Ventas_Add
-    ) AS Ventas;
+    IF NOT EXISTS (SELECT 1 FROM DQ_Ventas WHERE Lote = @Lote)
+    BEGIN
+        EXEC sp_Perfilar_Calidad_Ventas;
+        RETURN;
+    END
+    
+    SELECT Total_Problemas, Cantidad_Invalida, Precio_Invalido, Precio_Demasiado_Grande, Fecha_Invalida, Total_Registros
+    FROM DQ_Ventas
+    WHERE Lote = @Lote;
 END
 GO
 
--- SP para obtener ejemplos de datos problemáticos
+-- SP para obtener ejemplos de datos problemáticos (muestras del perfil del lote)
 CREATE OR ALTER PROCEDURE sp_GetVentasProblematicExamples
 AS
 BEGIN
     SET NOCOUNT ON;
+    DECLARE @Lote VARCHAR(40) = dbo.fn_LoteVentasSTG();
     
-    SELECT TOP 5
-        FechaVenta, CodigoProducto, Cantidad, PrecioVenta,
-        CASE 
-            WHEN TRY_CONVERT(DATE, FechaVenta) IS NULL THEN 'FECHA_INVALIDA'
-            WHEN TRY_CONVERT(INT, Cantidad) IS NULL THEN 'CANTIDAD_INVALIDA'
-            WHEN TRY_CONVERT(DECIMAL(30,10), PrecioVenta) IS NULL THEN 'PRECIO_INVALIDO'
-            WHEN TRY_CONVERT(DECIMAL(30,10), PrecioVenta) > 99999999999999.99 THEN 'PRECIO_DEMASIADO_GRANDE'
-            ELSE 'OTRO_PROBLEMA'
-        END as Tipo_Problema
-    FROM (
-        SELECT * FROM STG_Ventas
-        UNION ALL SELECT * FROM STG_Ventas_Add
-    ) v
-    WHERE 
-        TRY_CONVERT(DATE, FechaVenta) IS NULL
-        OR TRY_CONVERT(INT, Cantidad) IS NULL
-        OR TRY_CONVERT(DECIMAL(30,10), PrecioVenta) IS NULL
-        OR TRY_CONVERT(DECIMAL(30,10), PrecioVenta) > 99999999999999.99;
+    IF NOT EXISTS (SELECT 1 FROM DQ_Ventas WHERE Lote = @Lote)
+        EXEC sp_Perfilar_Calidad_Ventas @resumen = 0;
+    
+    SELECT FechaVenta, CodigoProducto, Cantidad, PrecioVenta, Tipo_Problema
+    FROM DQ_Ventas_Muestras
+    WHERE Lote = @Lote;
 END
 GO
 
@@ -323,16 +479,20 @@ GO
 ------------------------------------------------------------------------------------------------------------
 
 -- Carga o actualiza registros en Dim_Cliente a partir de INT_Cliente
+-- (solo se actualizan las filas cuyo RowHash cambió)
 CREATE OR ALTER PROCEDURE dbo.sp_Dim_CargarCliente
 AS
 BEGIN
     SET NOCOUNT ON;
+    DECLARE @acciones TABLE (Accion NVARCHAR(10));
+    DECLARE @origen INT = (SELECT COUNT(*) FROM INT_Cliente);
+    DECLARE @insertados INT, @actualizados INT;
     
     MERGE Dim_Cliente AS Target
     USING INT_Cliente AS Source
     ON (Target.CodCliente = Source.CodCliente)
     
-    WHEN MATCHED THEN
+    WHEN MATCHED AND Target.RowHash <> Source.RowHash THEN
         UPDATE SET
             Target.RazonSocial = Source.RazonSocial,
             Target.Telefono = Source.Telefono,
@@ -344,23 +504,37 @@ BEGIN
     
     WHEN NOT MATCHED BY TARGET THEN
         INSERT (CodCliente, RazonSocial, Telefono, Mail, Direccion, Localidad, Provincia, CP, FechaCreacion)
-        VALUES (Source.CodCliente, Source.RazonSocial, Source.Telefono, Source.Mail, Source.Direccion, Source.Localidad, Source.Provincia, Source.CP, Source.FechaCreacion);
+        VALUES (Source.CodCliente, Source.RazonSocial, Source.Telefono, Source.Mail, Source.Direccion, Source.Localidad, Source.Provincia, Source.CP, Source.FechaCreacion)
+
+    OUTPUT $action INTO @acciones;
 
     TRUNCATE TABLE INT_Cliente;
+
+    SELECT @insertados = COUNT(CASE WHEN Accion = 'INSERT' THEN 1 END),
+           @actualizados = COUNT(CASE WHEN Accion = 'UPDATE' THEN 1 END)
+    FROM @acciones;
+
+    PRINT ' Dim_Cliente: ' + CAST(@insertados AS VARCHAR) + ' insertados, ' + CAST(@actualizados AS VARCHAR)
+        + ' actualizados, ' + CAST(@origen - @insertados - @actualizados AS VARCHAR) + ' sin cambios';
+    SELECT @insertados AS Insertados, @actualizados AS Actualizados, @origen - @insertados - @actualizados AS Sin_Cambios;
 END
 GO
 
 -- Carga o actualiza registros en Dim_Producto a partir de INT_Producto
+-- (solo se actualizan las filas cuyo RowHash cambió)
 CREATE OR ALTER PROCEDURE dbo.sp_Dim_CargarProducto
 AS
 BEGIN
     SET NOCOUNT ON;
+    DECLARE @acciones TABLE (Accion NVARCHAR(10));
+    DECLARE @origen INT = (SELECT COUNT(*) FROM INT_Producto);
+    DECLARE @insertados INT, @actualizados INT;
 
     MERGE Dim_Producto AS Target
     USING INT_Producto AS Source
     ON (Target.CodigoProducto = Source.CodigoProducto)
     
-    WHEN MATCHED THEN
+    WHEN MATCHED AND Target.RowHash <> Source.RowHash THEN
         UPDATE SET
             Target.Descripcion = Source.Descripcion,
             Target.Categoria = Source.Categoria,
@@ -370,23 +544,37 @@ BEGIN
             
     WHEN NOT MATCHED BY TARGET THEN
         INSERT (CodigoProducto, Descripcion, Categoria, Marca, PrecioCosto, PrecioVentaSugerido, FechaCreacion)
-        VALUES (Source.CodigoProducto, Source.Descripcion, Source.Categoria, Source.Marca, Source.PrecioCosto, Source.PrecioVentaSugerido, Source.FechaCreacion);
+        VALUES (Source.CodigoProducto, Source.Descripcion, Source.Categoria, Source.Marca, Source.PrecioCosto, Source.PrecioVentaSugerido, Source.FechaCreacion)
+
+    OUTPUT $action INTO @acciones;
 
     TRUNCATE TABLE INT_Producto;
+
+    SELECT @insertados = COUNT(CASE WHEN Accion = 'INSERT' THEN 1 END),
+           @actualizados = COUNT(CASE WHEN Accion = 'UPDATE' THEN 1 END)
+    FROM @acciones;
+
+    PRINT ' Dim_Producto: ' + CAST(@insertados AS VARCHAR) + ' insertados, ' + CAST(@actualizados AS VARCHAR)
+        + ' actualizados, ' + CAST(@origen - @insertados - @actualizados AS VARCHAR) + ' sin cambios';
+    SELECT @insertados AS Insertados, @actualizados AS Actualizados, @origen - @insertados - @actualizados AS Sin_Cambios;
 END
 GO
 
 -- Carga o actualiza registros en Dim_Tienda a partir de INT_Tienda
+-- (solo se actualizan las filas cuyo RowHash cambió)
 CREATE OR ALTER PROCEDURE dbo.sp_Dim_CargarTienda
 AS
 BEGIN
     SET NOCOUNT ON;
+    DECLARE @acciones TABLE (Accion NVARCHAR(10));
+    DECLARE @origen INT = (SELECT COUNT(*) FROM INT_Tienda);
+    DECLARE @insertados INT, @actualizados INT;
 
     MERGE Dim_Tienda AS Target
     USING INT_Tienda AS Source
     ON (Target.CodigoTienda = Source.CodigoTienda)
     
-    WHEN MATCHED THEN
+    WHEN MATCHED AND Target.RowHash <> Source.RowHash THEN
         UPDATE SET
             Target.Descripcion = Source.Descripcion,
             Target.Direccion = Source.Direccion,
@@ -397,13 +585,24 @@ BEGIN
             
     WHEN NOT MATCHED BY TARGET THEN
         INSERT (CodigoTienda, Descripcion, Direccion, Localidad, Provincia, CP, TipoTienda, FechaCreacion)
-        VALUES (Source.CodigoTienda, Source.Descripcion, Source.Direccion, Source.Localidad, Source.Provincia, Source.CP, Source.TipoTienda, Source.FechaCreacion);
+        VALUES (Source.CodigoTienda, Source.Descripcion, Source.Direccion, Source.Localidad, Source.Provincia, Source.CP, Source.TipoTienda, Source.FechaCreacion)
+
+    OUTPUT $action INTO @acciones;
 
     TRUNCATE TABLE INT_Tienda;
+
+    SELECT @insertados = COUNT(CASE WHEN Accion = 'INSERT' THEN 1 END),
+           @actualizados = COUNT(CASE WHEN Accion = 'UPDATE' THEN 1 END)
+    FROM @acciones;
+
+    PRINT ' Dim_Tienda: ' + CAST(@insertados AS VARCHAR) + ' insertados, ' + CAST(@actualizados AS VARCHAR)
+        + ' actualizados, ' + CAST(@origen - @insertados - @actualizados AS VARCHAR) + ' sin cambios';
+    SELECT @insertados AS Insertados, @actualizados AS Actualizados, @origen - @insertados - @actualizados AS Sin_Cambios;
 END
 GO
 
 -- Carga registros en Fact_Ventas a partir de INT_Ventas
+-- (las ventas insertadas quedan también en Fact_Ventas_Delta para los cubos)
 CREATE OR ALTER PROCEDURE dbo.sp_Fact_CargarVentas
 AS
 BEGIN
@@ -419,6 +618,9 @@ BEGIN
         Total_IVA, 
         FechaCarga
     )
+    OUTPUT inserted.Tiempo_Key, inserted.ID_Producto, inserted.ID_Cliente, inserted.ID_Tienda,
+           inserted.Cantidad, inserted.PrecioVenta, inserted.Total_IVA, inserted.FechaCarga
+    INTO Fact_Ventas_Delta (Tiempo_Key, ID_Producto, ID_Cliente, ID_Tienda, Cantidad, PrecioVenta, Total_IVA, FechaCarga)
     SELECT
         DT.Tiempo_Key,       -- corresponde a Tiempo_Key en Fact
         DP.ID_Producto,
@@ -446,3 +648,362 @@ BEGIN
     TRUNCATE TABLE INT_Ventas;
 END
 GO
+
+------------------------------------------------------------------------------------------------------------
+-- CARGA DE Fact_Ventas POR PARTICIÓN MENSUAL (dw_loader.py con fact_loader = particiones)
+-- 1. sp_Fact_AsegurarParticion: crea los límites del mes si faltan (SPLIT RANGE).
+-- 2. sp_Fact_PrepararMes: arma el mes en una tabla de staging idéntica a Fact_Ventas
+--    (se ejecuta en paralelo, un mes por conexión).
+-- 3. sp_Fact_SwitchMes: pasa la tabla de staging a su partición con ALTER TABLE ... SWITCH.
+
+-- Asegura que el mes de @mes tenga su propia partición en Fact_Ventas
+CREATE OR ALTER PROCEDURE dbo.sp_Fact_AsegurarParticion
+    @mes DATE
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @desde smalldatetime = DATEFROMPARTS(YEAR(@mes), MONTH(@mes), 1);
+    DECLARE @hasta smalldatetime = DATEADD(MONTH, 1, @desde);
+    DECLARE @limite smalldatetime;
+
+    DECLARE limites CURSOR LOCAL FAST_FORWARD FOR SELECT @desde UNION ALL SELECT @hasta;
+    OPEN limites;
+    FETCH NEXT FROM limites INTO @limite;
+
+    WHILE @@FETCH_STATUS = 0
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1
+            FROM sys.partition_range_values rv
+            INNER JOIN sys.partition_functions pf ON pf.function_id = rv.function_id
+            WHERE pf.name = 'PF_Fact_Ventas_Mes' AND CAST(rv.value AS smalldatetime) = @limite
+        )
+        BEGIN
+            ALTER PARTITION SCHEME PS_Fact_Ventas_Mes NEXT USED [PRIMARY];
+            ALTER PARTITION FUNCTION PF_Fact_Ventas_Mes() SPLIT RANGE (@limite);
+            PRINT ' Límite de partición agregado: ' + CONVERT(VARCHAR(10), @limite, 120);
+        END
+        FETCH NEXT FROM limites INTO @limite;
+    END
+
+    CLOSE limites;
+    DEALLOCATE limites;
+END
+GO
+
+-- Crea una tabla con la misma estructura, índices y FKs que Fact_Ventas, en el
+-- filegroup de la partición de @mes y con un CHECK que la limita a ese mes
+CREATE OR ALTER PROCEDURE dbo.sp_Fact_CrearTablaMes
+    @tabla SYSNAME,
+    @mes DATE,
+    @id_desde BIGINT = 1
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @desde smalldatetime = DATEFROMPARTS(YEAR(@mes), MONTH(@mes), 1);
+    DECLARE @hasta smalldatetime = DATEADD(MONTH, 1, @desde);
+    DECLARE @filegroup SYSNAME;
+    DECLARE @sql NVARCHAR(MAX);
+
+    SELECT @filegroup = fg.name
+    FROM sys.partition_schemes ps
+    INNER JOIN sys.destination_data_spaces dds ON dds.partition_scheme_id = ps.data_space_id
+    INNER JOIN sys.filegroups fg ON fg.data_space_id = dds.data_space_id
+    WHERE ps.name = 'PS_Fact_Ventas_Mes'
+      AND dds.destination_id = $PARTITION.PF_Fact_Ventas_Mes(@desde);
+
+    IF OBJECT_ID(@tabla) IS NOT NULL
+    BEGIN
+        SET @sql = N'DROP TABLE ' + QUOTENAME(@tabla);
+        EXEC sp_executesql @sql;
+    END
+
+    SET @sql = N'
+    CREATE TABLE ' + QUOTENAME(@tabla) + N' (
+        ID_Venta BIGINT IDENTITY(' + CAST(@id_desde AS NVARCHAR(20)) + N',1) NOT NULL,
+        Tiempo_Key smalldatetime NOT NULL,
+        ID_Producto INT NOT NULL,
+        ID_Cliente INT NOT NULL,
+        ID_Tienda INT NOT NULL,
+        Cantidad INT NOT NULL CHECK (Cantidad > 0),
+        PrecioVenta DECIMAL(18,2) NOT NULL CHECK (PrecioVenta >= 0),
+        Total_IVA DECIMAL(18,2) NOT NULL,
+        FechaCarga DATETIME DEFAULT GETDATE(),
+
+        CONSTRAINT ' + QUOTENAME('PK_' + @tabla) + N' PRIMARY KEY CLUSTERED (Tiempo_Key, ID_Venta),
+        CONSTRAINT ' + QUOTENAME('CK_' + @tabla + '_Mes') + N'
+            CHECK (Tiempo_Key >= ''' + CONVERT(NVARCHAR(19), @desde, 120) + N'''
+               AND Tiempo_Key < ''' + CONVERT(NVARCHAR(19), @hasta, 120) + N'''),
+        FOREIGN KEY (Tiempo_Key) REFERENCES Dim_Tiempo(Tiempo_Key),
+        FOREIGN KEY (ID_Producto) REFERENCES Dim_Producto(ID_Producto),
+        FOREIGN KEY (ID_Cliente) REFERENCES Dim_Cliente(ID_Cliente),
+        FOREIGN KEY (ID_Tienda) REFERENCES Dim_Tienda(ID_Tienda)
+    ) ON ' + QUOTENAME(@filegroup) + N';
+
+    CREATE INDEX IDX_Producto ON ' + QUOTENAME(@tabla) + N' (ID_Producto) ON ' + QUOTENAME(@filegroup) + N';
+    CREATE INDEX IDX_Cliente ON ' + QUOTENAME(@tabla) + N' (ID_Cliente) ON ' + QUOTENAME(@filegroup) + N';
+    CREATE INDEX IDX_Tienda ON ' + QUOTENAME(@tabla) + N' (ID_Tienda) ON ' + QUOTENAME(@filegroup) + N';';
+
+    EXEC sp_executesql @sql;
+END
+GO
+
+-- Arma en Fact_Ventas_Stage_AAAAMM las ventas de INT_Ventas del mes de @mes.
+-- @id_desde: primer ID_Venta del mes (rangos distintos por mes para cargar en paralelo)
+CREATE OR ALTER PROCEDURE dbo.sp_Fact_PrepararMes
+    @mes DATE,
+    @id_desde BIGINT
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @desde DATE = DATEFROMPARTS(YEAR(@mes), MONTH(@mes), 1);
+    DECLARE @hasta DATE = DATEADD(MONTH, 1, @desde);
+    DECLARE @tabla SYSNAME = 'Fact_Ventas_Stage_' + CONVERT(CHAR(6), @desde, 112);
+    DECLARE @sql NVARCHAR(MAX);
+
+    EXEC dbo.sp_Fact_CrearTablaMes @tabla = @tabla, @mes = @desde, @id_desde = @id_desde;
+
+    SET @sql = N'
+    INSERT INTO ' + QUOTENAME(@tabla) + N' WITH (TABLOCK) (
+        Tiempo_Key, ID_Producto, ID_Cliente, ID_Tienda,
+        Cantidad, PrecioVenta, Total_IVA, FechaCarga
+    )
+    SELECT
+        DT.Tiempo_Key,
+        DP.ID_Producto,
+        DC.ID_Cliente,
+        TD.ID_Tienda,
+        IV.Cantidad,
+        IV.PrecioVenta,
+        IV.Total_IVA,
+        IV.FechaCarga
+    FROM INT_Ventas IV
+    INNER JOIN Dim_Cliente DC ON IV.CodigoCliente = DC.CodCliente
+    INNER JOIN Dim_Producto DP ON IV.CodigoProducto = DP.CodigoProducto
+    INNER JOIN Dim_Tienda TD ON IV.CodigoTienda = TD.CodigoTienda
+    INNER JOIN Dim_Tiempo DT ON IV.FechaVenta = DT.Tiempo_Key
+    WHERE IV.FechaVenta >= @desde AND IV.FechaVenta < @hasta;
+
+    SELECT @@ROWCOUNT AS Filas;';
+
+    EXEC sp_executesql @sql, N'@desde DATE, @hasta DATE', @desde = @desde, @hasta = @hasta;
+END
+GO
+
+-- Pasa Fact_Ventas_Stage_AAAAMM a la partición de su mes.
+-- Si la partición ya tiene datos:
+--   @reemplazar = 1: el mes anterior sale con SWITCH (metadata) y se descarta.
+--   @reemplazar = 0: las ventas nuevas se agregan a las existentes del mes.
+CREATE OR ALTER PROCEDURE dbo.sp_Fact_SwitchMes
+    @mes DATE,
+    @reemplazar BIT = 0
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    DECLARE @desde DATE = DATEFROMPARTS(YEAR(@mes), MONTH(@mes), 1);
+    DECLARE @tabla SYSNAME = 'Fact_Ventas_Stage_' + CONVERT(CHAR(6), @desde, 112);
+    DECLARE @tabla_old SYSNAME = 'Fact_Ventas_Old_' + CONVERT(CHAR(6), @desde, 112);
+    DECLARE @particion INT = $PARTITION.PF_Fact_Ventas_Mes(CONVERT(smalldatetime, @desde));
+    DECLARE @filas_existentes BIGINT;
+    DECLARE @sql NVARCHAR(MAX);
+
+    IF OBJECT_ID(@tabla) IS NULL
+    BEGIN
+        RAISERROR('No existe la tabla de staging %s. Ejecute sp_Fact_PrepararMes primero.', 16, 1, @tabla);
+        RETURN;
+    END
+
+    SELECT @filas_existentes = SUM(rows)
+    FROM sys.partitions
+    WHERE object_id = OBJECT_ID('Fact_Ventas') AND index_id = 1 AND partition_number = @particion;
+
+    -- Las ventas del mes quedan en Fact_Ventas_Delta para actualizar los cubos
+    SET @sql = N'
+    INSERT INTO Fact_Ventas_Delta (Tiempo_Key, ID_Producto, ID_Cliente, ID_Tienda, Cantidad, PrecioVenta, Total_IVA, FechaCarga)
+    SELECT Tiempo_Key, ID_Producto, ID_Cliente, ID_Tienda, Cantidad, PrecioVenta, Total_IVA, FechaCarga
+    FROM ' + QUOTENAME(@tabla) + N';';
+    EXEC sp_executesql @sql;
+
+    IF @filas_existentes > 0 AND @reemplazar = 0
+    BEGIN
+        -- Agregar al mes existente (la partición no está vacía, no se puede hacer SWITCH)
+        SET @sql = N'
+        INSERT INTO Fact_Ventas (Tiempo_Key, ID_Producto, ID_Cliente, ID_Tienda, Cantidad, PrecioVenta, Total_IVA, FechaCarga)
+        SELECT Tiempo_Key, ID_Producto, ID_Cliente, ID_Tienda, Cantidad, PrecioVenta, Total_IVA, FechaCarga
+        FROM ' + QUOTENAME(@tabla) + N';
+        DROP TABLE ' + QUOTENAME(@tabla) + N';';
+        EXEC sp_executesql @sql;
+        PRINT ' Fact_Ventas ' + CONVERT(VARCHAR(7), @desde, 120) + ': ventas agregadas a la partición existente';
+        RETURN;
+    END
+
+    IF @filas_existentes > 0
+    BEGIN
+        -- Recarga del mes: los datos anteriores salen de la tabla sin moverlos
+        EXEC dbo.sp_Fact_CrearTablaMes @tabla = @tabla_old, @mes = @desde;
+        SET @sql = N'
+        ALTER TABLE Fact_Ventas SWITCH PARTITION ' + CAST(@particion AS NVARCHAR(10)) + N' TO ' + QUOTENAME(@tabla_old) + N';
+        INSERT INTO Fact_Ventas_Delta (Tiempo_Key, ID_Producto, ID_Cliente, ID_Tienda, Cantidad, PrecioVenta, Total_IVA, FechaCarga, Signo)
+        SELECT Tiempo_Key, ID_Producto, ID_Cliente, ID_Tienda, Cantidad, PrecioVenta, Total_IVA, FechaCarga, -1
+        FROM ' + QUOTENAME(@tabla_old) + N';
+        DROP TABLE ' + QUOTENAME(@tabla_old) + N';';
+        EXEC sp_executesql @sql;
+        PRINT ' Fact_Ventas ' + CONVERT(VARCHAR(7), @desde, 120) + ': ' + CAST(@filas_existentes AS VARCHAR) + ' ventas anteriores reemplazadas';
+    END
+
+    SET @sql = N'
+    ALTER TABLE ' + QUOTENAME(@tabla) + N' SWITCH TO Fact_Ventas PARTITION ' + CAST(@particion AS NVARCHAR(10)) + N';
+    DROP TABLE ' + QUOTENAME(@tabla) + N';';
+    EXEC sp_executesql @sql;
+    PRINT ' Fact_Ventas ' + CONVERT(VARCHAR(7), @desde, 120) + ': partición cargada con SWITCH';
+END
+GO
+
+------------------------------------------------------------------------------------------------------------
+-- CUBOS DE VENTAS (Agg_Ventas_*)
+-- Se actualizan sumando solo el delta de Fact_Ventas (Fact_Ventas_Delta), sin
+-- recalcularlos. Las filas con Signo = -1 restan las ventas de un mes reemplazado.
+
+CREATE OR ALTER PROCEDURE dbo.sp_Agg_ActualizarCubos
+AS
+BEGIN
+    SET NOCOUNT ON;
+    DECLARE @filas INT;
+
+    BEGIN TRY
+        BEGIN TRAN;
+
+        -- TABLOCKX: las cargas que agreguen delta esperan a que termine la actualización
+        SELECT
+            YEAR(Tiempo_Key) AS Anio,
+            MONTH(Tiempo_Key) AS Mes,
+            ID_Producto,
+            ID_Tienda,
+            ID_Cliente,
+            SUM(CAST(Cantidad AS BIGINT) * Signo) AS Cantidad,
+            SUM(CAST(PrecioVenta AS DECIMAL(38,2)) * Signo) AS PrecioVenta,
+            SUM(CAST(Total_IVA AS DECIMAL(38,2)) * Signo) AS Total_IVA,
+            SUM(CAST(Signo AS BIGINT)) AS Ventas
+        INTO #Delta
+        FROM Fact_Ventas_Delta WITH (TABLOCKX)
+        GROUP BY YEAR(Tiempo_Key), MONTH(Tiempo_Key), ID_Producto, ID_Tienda, ID_Cliente;
+
+        SELECT @filas = COUNT(*) FROM Fact_Ventas_Delta;
+
+        MERGE Agg_Ventas_Mes AS T
+        USING (
+            SELECT Anio, Mes, SUM(Cantidad) AS Cantidad, SUM(PrecioVenta) AS PrecioVenta,
+                   SUM(Total_IVA) AS Total_IVA, SUM(Ventas) AS Ventas
+            FROM #Delta
+            GROUP BY Anio, Mes
+        ) AS S
+        ON T.Anio = S.Anio AND T.Mes = S.Mes
+        WHEN MATCHED THEN
+            UPDATE SET
+                T.Cantidad = T.Cantidad + S.Cantidad,
+                T.PrecioVenta = T.PrecioVenta + S.PrecioVenta,
+                T.Total_IVA = T.Total_IVA + S.Total_IVA,
+                T.Ventas = T.Ventas + S.Ventas
+        WHEN NOT MATCHED THEN
+            INSERT (Anio, Mes, Cantidad, PrecioVenta, Total_IVA, Ventas)
+            VALUES (S.Anio, S.Mes, S.Cantidad, S.PrecioVenta, S.Total_IVA, S.Ventas);
+
+        DELETE FROM Agg_Ventas_Mes WHERE Ventas = 0;
+
+        MERGE Agg_Ventas_Mes_Producto AS T
+        USING (
+            SELECT Anio, Mes, ID_Producto, SUM(Cantidad) AS Cantidad, SUM(PrecioVenta) AS PrecioVenta,
+                   SUM(Total_IVA) AS Total_IVA, SUM(Ventas) AS Ventas
+            FROM #Delta
+            GROUP BY Anio, Mes, ID_Producto
+        ) AS S
+        ON T.Anio = S.Anio AND T.Mes = S.Mes AND T.ID_Producto = S.ID_Producto
+        WHEN MATCHED THEN
+            UPDATE SET
+                T.Cantidad = T.Cantidad + S.Cantidad,
+                T.PrecioVenta = T.PrecioVenta + S.PrecioVenta,
+                T.Total_IVA = T.Total_IVA + S.Total_IVA,
+                T.Ventas = T.Ventas + S.Ventas
+        WHEN NOT MATCHED THEN
+            INSERT (Anio, Mes, ID_Producto, Cantidad, PrecioVenta, Total_IVA, Ventas)
+            VALUES (S.Anio, S.Mes, S.ID_Producto, S.Cantidad, S.PrecioVenta, S.Total_IVA, S.Ventas);
+
+        DELETE FROM Agg_Ventas_Mes_Producto WHERE Ventas = 0;
+
+        MERGE Agg_Ventas_Mes_Producto_Tienda AS T
+        USING (
+            SELECT Anio, Mes, ID_Producto, ID_Tienda, SUM(Cantidad) AS Cantidad, SUM(PrecioVenta) AS PrecioVenta,
+                   SUM(Total_IVA) AS Total_IVA, SUM(Ventas) AS Ventas
+            FROM #Delta
+            GROUP BY Anio, Mes, ID_Producto, ID_Tienda
+        ) AS S
+        ON T.Anio = S.Anio AND T.Mes = S.Mes AND T.ID_Producto = S.ID_Producto AND T.ID_Tienda = S.ID_Tienda
+        WHEN MATCHED THEN
+            UPDATE SET
+                T.Cantidad = T.Cantidad + S.Cantidad,
+                T.PrecioVenta = T.PrecioVenta + S.PrecioVenta,
+                T.Total_IVA = T.Total_IVA + S.Total_IVA,
+                T.Ventas = T.Ventas + S.Ventas
+        WHEN NOT MATCHED THEN
+            INSERT (Anio, Mes, ID_Producto, ID_Tienda, Cantidad, PrecioVenta, Total_IVA, Ventas)
+            VALUES (S.Anio, S.Mes, S.ID_Producto, S.ID_Tienda, S.Cantidad, S.PrecioVenta, S.Total_IVA, S.Ventas);
+
+        DELETE FROM Agg_Ventas_Mes_Producto_Tienda WHERE Ventas = 0;
+
+        MERGE Agg_Ventas_Mes_Cliente AS T
+        USING (
+            SELECT Anio, Mes, ID_Cliente, SUM(Cantidad) AS Cantidad, SUM(PrecioVenta) AS PrecioVenta,
+                   SUM(Total_IVA) AS Total_IVA, SUM(Ventas) AS Ventas
+            FROM #Delta
+            GROUP BY Anio, Mes, ID_Cliente
+        ) AS S
+        ON T.Anio = S.Anio AND T.Mes = S.Mes AND T.ID_Cliente = S.ID_Cliente
+        WHEN MATCHED THEN
+            UPDATE SET
+                T.Cantidad = T.Cantidad + S.Cantidad,
+                T.PrecioVenta = T.PrecioVenta + S.PrecioVenta,
+                T.Total_IVA = T.Total_IVA + S.Total_IVA,
+                T.Ventas = T.Ventas + S.Ventas
+        WHEN NOT MATCHED THEN
+            INSERT (Anio, Mes, ID_Cliente, Cantidad, PrecioVenta, Total_IVA, Ventas)
+            VALUES (S.Anio, S.Mes, S.ID_Cliente, S.Cantidad, S.PrecioVenta, S.Total_IVA, S.Ventas);
+
+        DELETE FROM Agg_Ventas_Mes_Cliente WHERE Ventas = 0;
+
+        TRUNCATE TABLE Fact_Ventas_Delta;
+
+        COMMIT;
+    END TRY
+    BEGIN CATCH
+        IF @@TRANCOUNT > 0 ROLLBACK;
+        PRINT ' Error en sp_Agg_ActualizarCubos: ' + ERROR_MESSAGE();
+        THROW;
+    END CATCH
+
+    PRINT ' Cubos Agg_Ventas_* actualizados con ' + CAST(@filas AS VARCHAR) + ' ventas del delta';
+END
+GO
+
+-- Recalcular los cubos desde cero con todo Fact_Ventas (carga inicial o corrección)
+CREATE OR ALTER PROCEDURE dbo.sp_Agg_ReconstruirCubos
+AS
+BEGIN
+    SET NOCOUNT ON;
+
+    TRUNCATE TABLE Agg_Ventas_Mes;
+    TRUNCATE TABLE Agg_Ventas_Mes_Producto;
+    TRUNCATE TABLE Agg_Ventas_Mes_Producto_Tienda;
+    TRUNCATE TABLE Agg_Ventas_Mes_Cliente;
+    TRUNCATE TABLE Fact_Ventas_Delta;
+
+    INSERT INTO Fact_Ventas_Delta WITH (TABLOCK) (Tiempo_Key, ID_Producto, ID_Cliente, ID_Tienda, Cantidad, PrecioVenta, Total_IVA, FechaCarga)
+    SELECT Tiempo_Key, ID_Producto, ID_Cliente, ID_Tienda, Cantidad, PrecioVenta, Total_IVA, FechaCarga
+    FROM Fact_Ventas;
+
+    EXEC dbo.sp_Agg_ActualizarCubos;
+END
+GO
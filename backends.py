@@ -0,0 +1,792 @@
+"""
+Motores de base de datos del ETL, elegidos con [DATABASE] backend en config.ini.
+
+sqlserver es el motor de producción: los scripts T-SQL crean las tablas y los
+stored procedures, y los pasos los ejecutan con EXEC. sqlite y duckdb son
+motores embebidos en un archivo local, para corridas de un solo nodo (tiendas)
+y para el benchmark: crean las mismas tablas STAGING, INT y DW y ejecutan
+versiones portadas de los procedures de la carga (sp_Cargar_INT_*,
+sp_Dim_Cargar*, sp_Fact_CargarVentas, Sp_Genera_Dim_Tiempo_Rango, el perfil de
+calidad sp_Perfilar_Calidad_Ventas y los de verificación de ventas). La carga por particiones, los cubos Agg_Ventas_* y el
+registro Deploy_Ledger son solo de SQL Server.
+"""
+
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+import sqlite3
+
+from staging_writers import ExecuteManyWriter, DuckDBAppendWriter, create_writer
+
+# SQLSTATE de errores de conexión que vale la pena reintentar: no se pudo
+# conectar, vínculo de comunicación cortado, timeout y víctima de deadlock
+TRANSIENT_SQLSTATES = {'08001', '08004', '08S01', 'HYT00', 'HYT01', '40001'}
+
+
+class SqlServerBackend:
+    """SQL Server por ODBC (pyodbc): los procedures son los de SQLQueryStoreProcedures.sql."""
+    name = 'sqlserver'
+    embedded = False
+
+    def __init__(self, config):
+        self.config = config
+
+    @property
+    def Error(self):
+        import pyodbc
+        return pyodbc.Error
+
+    def describe(self):
+        server = self.config.get('DATABASE', 'server', fallback='').strip()
+        database = self.config.get('DATABASE', 'database', fallback='').strip()
+        return f"{server} | BD: {database}"
+
+    def connect(self, timeout=10):
+        """Abrir una conexión nueva (transacción explícita: autocommit apagado)."""
+        # Import diferido: con los motores embebidos no hace falta el driver ODBC
+        import pyodbc
+
+        server = self.config.get('DATABASE', 'server', fallback='').strip()
+        database = self.config.get('DATABASE', 'database', fallback='').strip()
+        trusted_connection = self.config.get('DATABASE', 'trusted_connection', fallback='').strip()
+        driver = self.config.get('DATABASE', 'driver', fallback='ODBC Driver 17 for SQL Server').strip()
+        # Keep-alive TCP (segundos): las conexiones libres del pool no quedan cortadas por firewalls
+        keepalive = self.config.getint('CONEXION', 'keepalive', fallback=30)
+
+        # Validación de datos críticos
+        if not all([server, database, trusted_connection]):
+            raise ValueError("Faltan parámetros críticos (server, database, trusted_connection) en config.ini.")
+
+        connection = pyodbc.connect(
+            f"DRIVER={{{driver}}};"
+            f"SERVER={server};"
+            f"DATABASE={database};"
+            f"Trusted_Connection={trusted_connection};"
+            f"KeepAlive={keepalive};KeepAliveInterval=1;",
+            timeout=timeout
+        )
+        connection.autocommit = False
+        return connection
+
+    def is_transient(self, error):
+        """Error de conexión que puede resolverse reintentando (ver TRANSIENT_SQLSTATES)."""
+        import pyodbc
+        return isinstance(error, pyodbc.Error) and bool(error.args) and error.args[0] in TRANSIENT_SQLSTATES
+
+    def create_writer(self):
+        """Escritor de STAGING configurado en [ETL] writer."""
+        return create_writer(self.config)
+
+    def truncate(self, cursor, table):
+        cursor.execute(f"TRUNCATE TABLE {table}")
+
+    def has_procedure(self, name):
+        return True
+
+    def call(self, cursor, name, **params):
+        """
+        Ejecutar un stored procedure (params: @nombre = valor). Devuelve sus
+        result sets como lista de (columnas, filas).
+        """
+        args = ', '.join(f"@{key} = ?" for key in params)
+        cursor.execute(f"EXEC {name} {args}".strip(), list(params.values()))
+        results = []
+        while True:
+            if cursor.description:
+                results.append(([d[0] for d in cursor.description], cursor.fetchall()))
+            if not cursor.nextset():
+                break
+        return results
+
+
+# Entidades con MERGE por clave de negocio: clave y columnas que se actualizan
+ENTITIES = {
+    'Cliente': ('CodCliente', ['RazonSocial', 'Telefono', 'Mail', 'Direccion', 'Localidad', 'Provincia', 'CP']),
+    'Producto': ('CodigoProducto', ['Descripcion', 'Categoria', 'Marca', 'PrecioCosto', 'PrecioVentaSugerido']),
+    'Tienda': ('CodigoTienda', ['Descripcion', 'Direccion', 'Localidad', 'Provincia', 'CP', 'TipoTienda'])
+}
+
+# Columnas de texto obligatorias (NOT NULL en INT_*): los campos vacíos del CSV
+# llegan a STAGING como NULL y se cargan como SIN_DATO, igual que en los procedures
+REQUIRED_TEXT = {
+    'Cliente': ['RazonSocial', 'Localidad', 'Provincia'],
+    'Producto': ['Categoria', 'Marca'],
+    'Tienda': ['Descripcion', 'Localidad', 'Provincia', 'TipoTienda']
+}
+SIN_DATO = 'Sin dato'
+
+SALES_KEY = ['FechaVenta', 'CodigoProducto', 'CodigoCliente', 'CodigoTienda', 'Cantidad', 'PrecioVenta']
+
+# Conteos del perfil de calidad de ventas (DQ_Ventas), en el orden de sp_CheckVentasProblematicData
+DQ_COLUMNS = ['Total_Problemas', 'Cantidad_Invalida', 'Precio_Invalido', 'Precio_Demasiado_Grande',
+              'Fecha_Invalida', 'Total_Registros']
+# Reglas de sp_Perfilar_Calidad_Ventas, en orden de prioridad: (Tipo_Problema,
+# columna de DQ_Ventas, condición sobre los valores convertidos Fecha,
+# Cantidad_Valor y Precio)
+PROBLEMAS_VENTAS = [
+    ('FECHA_INVALIDA', 'Fecha_Invalida', "Fecha IS NULL"),
+    ('CANTIDAD_INVALIDA', 'Cantidad_Invalida', "Cantidad_Valor IS NULL"),
+    ('PRECIO_INVALIDO', 'Precio_Invalido', "Precio IS NULL"),
+    ('PRECIO_DEMASIADO_GRANDE', 'Precio_Demasiado_Grande', "Precio NOT BETWEEN -99999999999999.99 AND 99999999999999.99")
+]
+# Lote de un STAGING de ventas vacío (como dbo.fn_LoteVentasSTG)
+LOTE_VACIO = 'SIN_VENTAS'
+
+MESES = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio', 'Agosto',
+         'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+DIAS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+def dim_tiempo_row(fecha):
+    """Fila de Dim_Tiempo de una fecha, igual que Sp_Genera_Dim_Tiempo_Rango (SET DATEFIRST 1)."""
+    def week(d):
+        # DATEPART(wk): la semana 1 contiene el 1 de enero y las semanas empiezan el lunes
+        return (d.timetuple().tm_yday - 1 + date(d.year, 1, 1).weekday()) // 7 + 1
+
+    return (fecha.isoformat(), fecha.year, fecha.month, MESES[fecha.month - 1],
+            1 if fecha.month <= 6 else 2, (fecha.month + 2) // 3, week(fecha),
+            week(fecha) - week(fecha.replace(day=1)) + 1, fecha.day,
+            DIAS[fecha.weekday()], fecha.isoweekday())
+
+
+class EmbeddedBackend:
+    """
+    Base de los motores embebidos: la base es un archivo local (path en
+    [DATABASE]) y los stored procedures son los métodos de PROCEDURES, con la
+    misma lógica y el mismo resumen (Insertados, Actualizados, Sin_Cambios).
+    Cada motor define los tipos y las conversiones TRY_CONVERT de su dialecto.
+    """
+    name = None
+    embedded = True
+    extension = None
+    DATETIME = 'TIMESTAMP'
+    # Parámetro con la fecha y hora de la carga (GETDATE() en los procedures)
+    NOW = 'CAST(? AS TIMESTAMP)'
+    # Comparación que trata dos NULL como iguales (como el RowHash con CHAR(0))
+    DISTINCT = 'IS DISTINCT FROM'
+
+    def __init__(self, config):
+        self.config = config
+        self.path = config.get('DATABASE', 'path', fallback='').strip() or f"datashop.{self.extension}"
+        self.PROCEDURES = {
+            'sp_Cargar_INT_Clientes': self.sp_cargar_int_clientes,
+            'sp_Cargar_INT_Productos': self.sp_cargar_int_productos,
+            'sp_Cargar_INT_Tiendas': self.sp_cargar_int_tiendas,
+            'sp_Cargar_INT_Ventas': self.sp_cargar_int_ventas,
+            'sp_Perfilar_Calidad_Ventas': self.sp_perfilar_calidad_ventas,
+            'sp_CheckVentasProblematicData': self.sp_check_ventas,
+            'sp_GetVentasProblematicExamples': self.sp_ejemplos_ventas,
+            'sp_Dim_CargarCliente': lambda cursor: self.cargar_dimension(cursor, 'Cliente'),
+            'sp_Dim_CargarProducto': lambda cursor: self.cargar_dimension(cursor, 'Producto'),
+            'sp_Dim_CargarTienda': lambda cursor: self.cargar_dimension(cursor, 'Tienda'),
+            'sp_Fact_CargarVentas': self.sp_fact_cargar_ventas,
+            'Sp_Genera_Dim_Tiempo_Rango': self.sp_genera_dim_tiempo_rango
+        }
+
+    def describe(self):
+        return f"{self.name} ({self.path})"
+
+    def is_transient(self, error):
+        """El archivo bloqueado por otro proceso se libera: vale la pena reintentar."""
+        return isinstance(error, self.Error) and 'lock' in str(error).lower()
+
+    # DIALECTO
+    def try_int(self, expr):
+        raise NotImplementedError
+
+    def try_decimal(self, expr):
+        raise NotImplementedError
+
+    def to_money(self, expr):
+        raise NotImplementedError
+
+    def try_date(self, expr):
+        raise NotImplementedError
+
+    def identity(self, table, column, sql_type):
+        """(sentencias previas, definición de la columna) de una clave autoincremental."""
+        raise NotImplementedError
+
+    def drop_identity(self, table):
+        """Sentencias que borran lo creado por identity() después de borrar la tabla."""
+        return []
+
+    def truncate(self, cursor, table):
+        cursor.execute(f"DELETE FROM {table}")
+
+    # ESTRUCTURA
+    def schema(self, sql_file):
+        """
+        Sentencias que reemplazan a cada script T-SQL. STAGING e INT se crean
+        solo si faltan; el DW se borra y se vuelve a crear, como en
+        SQLQueryCreateDW.sql, así cada corrida completa carga Fact_Ventas desde
+        cero (en carga incremental el orquestador no lo ejecuta y conserva el DW).
+        """
+        dt = self.DATETIME
+        if sql_file == 'SQLQuerySTAGING.sql':
+            sales = (f"FechaVenta VARCHAR(100), CodigoProducto VARCHAR(100), Producto VARCHAR(500), "
+                     f"Cantidad VARCHAR(50), PrecioVenta VARCHAR(100), CodigoCliente VARCHAR(100), "
+                     f"Cliente VARCHAR(500), CodigoTienda VARCHAR(100), Tienda VARCHAR(500), Fecha_Carga {dt}, "
+                     f"Archivo_Origen VARCHAR(260), Lote_Carga VARCHAR(40)")
+            return [
+                f"""CREATE TABLE IF NOT EXISTS STG_Clientes (
+                    CodCliente VARCHAR(100), RazonSocial VARCHAR(500), Telefono VARCHAR(100), Mail VARCHAR(500),
+                    Direccion VARCHAR(500), Localidad VARCHAR(200), Provincia VARCHAR(200), CP VARCHAR(50),
+                    Fecha_Carga {dt}, Archivo_Origen VARCHAR(260), Lote_Carga VARCHAR(40))""",
+                f"""CREATE TABLE IF NOT EXISTS STG_Productos (
+                    CodigoProducto VARCHAR(100), Descripcion VARCHAR(500), Categoria VARCHAR(200), Marca VARCHAR(200),
+                    PrecioCosto VARCHAR(100), PrecioVentaSugerido VARCHAR(100), Fecha_Carga {dt}, Archivo_Origen VARCHAR(260),
+                    Lote_Carga VARCHAR(40))""",
+                f"""CREATE TABLE IF NOT EXISTS STG_Tiendas (
+                    CodigoTienda VARCHAR(100), Descripcion VARCHAR(500), Direccion VARCHAR(500), Localidad VARCHAR(500),
+                    Provincia VARCHAR(200), CP VARCHAR(50), TipoTienda VARCHAR(100), Fecha_Carga {dt}, Archivo_Origen VARCHAR(260),
+                    Lote_Carga VARCHAR(40))""",
+                f"CREATE TABLE IF NOT EXISTS STG_Ventas ({sales})",
+                f"CREATE TABLE IF NOT EXISTS STG_Ventas_Add ({sales})",
+                f"""CREATE TABLE IF NOT EXISTS DQ_Ventas (
+                    Lote VARCHAR(40) PRIMARY KEY NOT NULL, Total_Problemas INT NOT NULL, Cantidad_Invalida INT NOT NULL,
+                    Precio_Invalido INT NOT NULL, Precio_Demasiado_Grande INT NOT NULL, Fecha_Invalida INT NOT NULL,
+                    Total_Registros INT NOT NULL, Fecha_Perfil {dt} NOT NULL)""",
+                f"""CREATE TABLE IF NOT EXISTS DQ_Ventas_Muestras (
+                    Lote VARCHAR(40) NOT NULL, FechaVenta VARCHAR(100), CodigoProducto VARCHAR(100), Cantidad VARCHAR(50),
+                    PrecioVenta VARCHAR(100), Tipo_Problema VARCHAR(30) NOT NULL, Archivo_Origen VARCHAR(260))""",
+                "CREATE INDEX IF NOT EXISTS IDX_DQ_Ventas_Muestras_Lote ON DQ_Ventas_Muestras (Lote)"
+            ]
+        if sql_file == 'SQLQueryINT.sql':
+            return [
+                f"""CREATE TABLE IF NOT EXISTS INT_Cliente (
+                    CodCliente VARCHAR(100) PRIMARY KEY NOT NULL, RazonSocial VARCHAR(300) NOT NULL,
+                    Telefono VARCHAR(100), Mail VARCHAR(300), Direccion VARCHAR(300), Localidad VARCHAR(150) NOT NULL,
+                    Provincia VARCHAR(150) NOT NULL, CP VARCHAR(20), FechaCreacion {dt} NOT NULL)""",
+                f"""CREATE TABLE IF NOT EXISTS INT_Producto (
+                    CodigoProducto VARCHAR(100) PRIMARY KEY NOT NULL, Descripcion VARCHAR(300) NOT NULL,
+                    Categoria VARCHAR(150) NOT NULL, Marca VARCHAR(150) NOT NULL, PrecioCosto DECIMAL(18,2) NOT NULL,
+                    PrecioVentaSugerido DECIMAL(18,2) NOT NULL, FechaCreacion {dt} NOT NULL)""",
+                f"""CREATE TABLE IF NOT EXISTS INT_Tienda (
+                    CodigoTienda VARCHAR(100) PRIMARY KEY NOT NULL, Descripcion VARCHAR(300) NOT NULL,
+                    Direccion VARCHAR(300), Localidad VARCHAR(150) NOT NULL, Provincia VARCHAR(150) NOT NULL,
+                    CP VARCHAR(20), TipoTienda VARCHAR(100) NOT NULL, FechaCreacion {dt} NOT NULL)""",
+                f"""CREATE TABLE IF NOT EXISTS INT_Ventas (
+                    FechaVenta DATE NOT NULL, CodigoProducto VARCHAR(100) NOT NULL, CodigoCliente VARCHAR(100) NOT NULL,
+                    CodigoTienda VARCHAR(100) NOT NULL, Cantidad INT NOT NULL, PrecioVenta DECIMAL(18,2) NOT NULL,
+                    Total_IVA DECIMAL(18,2) NOT NULL, FechaCarga {dt} NOT NULL,
+                    PRIMARY KEY ({', '.join(SALES_KEY)}))"""
+            ]
+        if sql_file == 'SQLQueryCreateDW.sql':
+            # Fact_Ventas primero: referencia a las dimensiones
+            tables = ['Fact_Ventas', 'Dim_Producto', 'Dim_Cliente', 'Dim_Tienda', 'Dim_Tiempo']
+            statements = [f"DROP TABLE IF EXISTS {table}" for table in tables]
+            for table in tables:
+                statements += self.drop_identity(table)
+            statements += [
+                """CREATE TABLE IF NOT EXISTS Dim_Tiempo (
+                    Tiempo_Key DATE PRIMARY KEY, Anio INT NOT NULL, Mes INT NOT NULL, Mes_Nombre VARCHAR(20) NOT NULL,
+                    Semestre INT NOT NULL, Trimestre INT NOT NULL, Semana_Anio INT NOT NULL,
+                    Semana_Nro_Mes INT NOT NULL, Dia INT NOT NULL, Dia_Nombre VARCHAR(20) NOT NULL,
+                    Dia_Semana_Nro INT NOT NULL)"""
+            ]
+            columns = {
+                'Producto': """CodigoProducto VARCHAR(100) NOT NULL UNIQUE, Descripcion VARCHAR(255) NOT NULL,
+                    Categoria VARCHAR(100) NOT NULL, Marca VARCHAR(100) NOT NULL,
+                    PrecioCosto DECIMAL(18,2) NOT NULL DEFAULT 0, PrecioVentaSugerido DECIMAL(18,2) NOT NULL DEFAULT 0""",
+                'Cliente': """CodCliente VARCHAR(50) NOT NULL UNIQUE, RazonSocial VARCHAR(255) NOT NULL,
+                    Telefono VARCHAR(50), Mail VARCHAR(255), Direccion VARCHAR(255), Localidad VARCHAR(100) NOT NULL,
+                    Provincia VARCHAR(100) NOT NULL, CP VARCHAR(20)""",
+                'Tienda': """CodigoTienda VARCHAR(50) NOT NULL UNIQUE, Descripcion VARCHAR(255) NOT NULL,
+                    Direccion VARCHAR(255), Localidad VARCHAR(100) NOT NULL, Provincia VARCHAR(100) NOT NULL,
+                    CP VARCHAR(20), TipoTienda VARCHAR(50) NOT NULL"""
+            }
+            for entity, definition in columns.items():
+                before, key = self.identity(f"Dim_{entity}", f"ID_{entity}", 'INTEGER')
+                statements += before
+                statements.append(f"CREATE TABLE IF NOT EXISTS Dim_{entity} ({key}, {definition}, FechaCreacion {dt})")
+
+            before, key = self.identity('Fact_Ventas', 'ID_Venta', 'BIGINT')
+            statements += before
+            statements += [
+                f"""CREATE TABLE IF NOT EXISTS Fact_Ventas (
+                    {key}, Tiempo_Key DATE NOT NULL, ID_Producto INTEGER NOT NULL, ID_Cliente INTEGER NOT NULL,
+                    ID_Tienda INTEGER NOT NULL, Cantidad INT NOT NULL CHECK (Cantidad > 0),
+                    PrecioVenta DECIMAL(18,2) NOT NULL CHECK (PrecioVenta >= 0), Total_IVA DECIMAL(18,2) NOT NULL,
+                    FechaCarga {dt})""",
+                "CREATE INDEX IF NOT EXISTS IDX_Fact_Tiempo ON Fact_Ventas (Tiempo_Key)",
+                "CREATE INDEX IF NOT EXISTS IDX_Fact_Producto ON Fact_Ventas (ID_Producto)",
+                "CREATE INDEX IF NOT EXISTS IDX_Fact_Cliente ON Fact_Ventas (ID_Cliente)",
+                "CREATE INDEX IF NOT EXISTS IDX_Fact_Tienda ON Fact_Ventas (ID_Tienda)"
+            ]
+            return statements
+        # SQLQueryStoreProcedures.sql: los procedures están portados en PROCEDURES
+        return []
+
+    def create_schema(self, cursor, sql_file):
+        """Crear las tablas de un script T-SQL. Devuelve la cantidad de sentencias ejecutadas."""
+        statements = self.schema(sql_file)
+        if sql_file == 'SQLQuerySTAGING.sql':
+            statements = self._upgrade_staging(cursor) + statements
+        for statement in statements:
+            cursor.execute(statement)
+        return len(statements)
+
+    def _upgrade_staging(self, cursor):
+        """
+        Sentencias para una base creada antes de Lote_Carga (como el final de
+        SQLQuerySTAGING.sql): agregar la columna a STAGING y descartar los
+        perfiles de DQ_Ventas, que usaban la Fecha_Carga como lote.
+        """
+        # sqlite_master también existe en DuckDB
+        existing = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()}
+        statements = []
+        for table in ('STG_Clientes', 'STG_Productos', 'STG_Tiendas', 'STG_Ventas', 'STG_Ventas_Add'):
+            if table not in existing:
+                continue
+            cursor.execute(f"SELECT * FROM {table} LIMIT 0")
+            if 'Lote_Carga' not in [column[0] for column in cursor.description]:
+                statements.append(f"ALTER TABLE {table} ADD COLUMN Lote_Carga VARCHAR(40)")
+        if statements:
+            statements += ["DROP TABLE IF EXISTS DQ_Ventas_Muestras", "DROP TABLE IF EXISTS DQ_Ventas"]
+        return statements
+
+    def has_table(self, cursor, table):
+        """¿Existe la tabla? (sqlite_master también existe en DuckDB)"""
+        return cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", [table]).fetchone() is not None
+
+    # PROCEDURES
+    def has_procedure(self, name):
+        return name.split('.')[-1] in self.PROCEDURES
+
+    def call(self, cursor, name, **params):
+        """Ejecutar la versión portada de un stored procedure. Devuelve [(columnas, filas)]."""
+        procedure = self.PROCEDURES.get(name.split('.')[-1])
+        if procedure is None:
+            raise NotImplementedError(f"{name} no está disponible con el motor {self.name}")
+        results = []
+        for columns, rows in procedure(cursor, **params):
+            # Filas con acceso por nombre (row.Columna), como las de pyodbc
+            row_type = namedtuple('Fila', columns)
+            results.append((columns, [row_type(*row) for row in rows]))
+        return results
+
+    def _merge(self, cursor, target, source_sql, key, columns, params=()):
+        """
+        MERGE por clave de negocio: inserta las claves nuevas y actualiza solo
+        las filas con alguna columna distinta. Devuelve el resumen del MERGE.
+        """
+        cursor.execute("DROP TABLE IF EXISTS Origen_Merge")
+        cursor.execute(f"CREATE TEMP TABLE Origen_Merge AS {source_sql}", params)
+        origen = cursor.execute("SELECT COUNT(*) FROM Origen_Merge").fetchone()[0]
+
+        changed = ' OR '.join(f"{target}.{c} {self.DISTINCT} S.{c}" for c in columns)
+        new_keys = f"NOT EXISTS (SELECT 1 FROM {target} WHERE {target}.{key} = S.{key})"
+        insertados = cursor.execute(f"SELECT COUNT(*) FROM Origen_Merge AS S WHERE {new_keys}").fetchone()[0]
+        actualizados = cursor.execute(
+            f"SELECT COUNT(*) FROM Origen_Merge AS S INNER JOIN {target} ON {target}.{key} = S.{key} WHERE {changed}"
+        ).fetchone()[0]
+
+        cursor.execute(f"""
+            UPDATE {target} SET {', '.join(f"{c} = S.{c}" for c in columns)}
+            FROM Origen_Merge AS S
+            WHERE {target}.{key} = S.{key} AND ({changed})
+        """)
+        insert_columns = ', '.join([key] + columns + ['FechaCreacion'])
+        cursor.execute(f"""
+            INSERT INTO {target} ({insert_columns})
+            SELECT {', '.join(f"S.{c}" for c in [key] + columns + ['FechaCreacion'])}
+            FROM Origen_Merge AS S
+            WHERE {new_keys}
+        """)
+        cursor.execute("DROP TABLE Origen_Merge")
+
+        return [(['Insertados', 'Actualizados', 'Sin_Cambios'], [(insertados, actualizados, origen - insertados - actualizados)])]
+
+    def _now(self):
+        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+    def _staging_columns(self, entity):
+        """Columnas de STG para el MERGE de una entidad, con SIN_DATO en las obligatorias vacías."""
+        required = REQUIRED_TEXT[entity]
+        return ', '.join(
+            f"COALESCE({c}, '{SIN_DATO}') AS {c}" if c in required else c for c in ENTITIES[entity][1]
+        )
+
+    def sp_cargar_int_clientes(self, cursor):
+        key, columns = ENTITIES['Cliente']
+        return self._merge(cursor, 'INT_Cliente',
+                           f"SELECT {key}, {self._staging_columns('Cliente')}, {self.NOW} AS FechaCreacion FROM STG_Clientes",
+                           key, columns, [self._now()])
+
+    def sp_cargar_int_productos(self, cursor):
+        key, columns = ENTITIES['Producto']
+        precio = lambda c: f"COALESCE({self.to_money(self.try_decimal(f'NULLIF({c}, {chr(39) * 2})'))}, 0.00)"
+        return self._merge(cursor, 'INT_Producto', f"""
+            SELECT CodigoProducto, Descripcion,
+                   COALESCE(Categoria, '{SIN_DATO}') AS Categoria, COALESCE(Marca, '{SIN_DATO}') AS Marca,
+                   {precio('PrecioCosto')} AS PrecioCosto,
+                   {precio('PrecioVentaSugerido')} AS PrecioVentaSugerido,
+                   {self.NOW} AS FechaCreacion
+            FROM STG_Productos
+            WHERE CodigoProducto IS NOT NULL AND CodigoProducto <> ''
+              AND Descripcion IS NOT NULL AND Descripcion <> ''
+        """, key, columns, [self._now()])
+
+    def sp_cargar_int_tiendas(self, cursor):
+        key, columns = ENTITIES['Tienda']
+        return self._merge(cursor, 'INT_Tienda',
+                           f"SELECT {key}, {self._staging_columns('Tienda')}, {self.NOW} AS FechaCreacion FROM STG_Tiendas",
+                           key, columns, [self._now()])
+
+    def _ventas_stg(self):
+        return "(SELECT * FROM STG_Ventas UNION ALL SELECT * FROM STG_Ventas_Add)"
+
+    def sp_cargar_int_ventas(self, cursor):
+        lote = self._lote(cursor)
+        if self._perfil(cursor, lote) is None:
+            self.sp_perfilar_calidad_ventas(cursor, resumen=0)
+        precio = self.try_decimal('PrecioVenta')
+        cursor.execute(f"""
+            INSERT INTO INT_Ventas ({', '.join(SALES_KEY)}, Total_IVA, FechaCarga)
+            SELECT DISTINCT S.FechaVenta, S.CodigoProducto, S.CodigoCliente, S.CodigoTienda, S.Cantidad,
+                   S.PrecioVenta, {self.to_money('S.PrecioVenta * 1.21')}, {self.NOW}
+            FROM (
+                SELECT
+                    {self.try_date('FechaVenta')} AS FechaVenta,
+                    CodigoProducto, CodigoCliente, CodigoTienda,
+                    {self.try_int('Cantidad')} AS Cantidad,
+                    CASE WHEN {precio} BETWEEN -99999999999999.99 AND 99999999999999.99
+                         THEN {self.to_money(precio)} END AS PrecioVenta
+                FROM {self._ventas_stg()} AS STG
+            ) AS S
+            WHERE S.FechaVenta IS NOT NULL AND S.Cantidad IS NOT NULL AND S.PrecioVenta IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM INT_Ventas AS T
+                  WHERE {' AND '.join(f"T.{c} = S.{c}" for c in SALES_KEY)}
+              )
+        """, [self._now()])
+        inserted = cursor.rowcount
+
+        # Filas inválidas: del perfil del lote en DQ_Ventas, sin volver a validar STAGING
+        perfil = self._perfil(cursor, lote)
+        filtered_out = perfil[0] if perfil is not None else 0
+
+        print(f" INT_Ventas: {inserted} registros insertados")
+        print(f"  INT_Ventas: {filtered_out} registros filtrados (datos inválidos)")
+        return []
+
+    def _lote(self, cursor):
+        """Lote de las ventas en STAGING (dbo.fn_LoteVentasSTG): su Lote_Carga o, si no tiene, su Fecha_Carga."""
+        lote = cursor.execute("""
+            SELECT MAX(Lote) FROM (
+                SELECT * FROM (SELECT COALESCE(Lote_Carga, CAST(Fecha_Carga AS VARCHAR)) AS Lote FROM STG_Ventas LIMIT 1)
+                UNION ALL
+                SELECT * FROM (SELECT COALESCE(Lote_Carga, CAST(Fecha_Carga AS VARCHAR)) AS Lote FROM STG_Ventas_Add LIMIT 1)
+            ) AS L
+        """).fetchone()[0]
+        return lote if lote is not None else LOTE_VACIO
+
+    def _perfil(self, cursor, lote):
+        """Fila de DQ_Ventas del lote (columnas de DQ_COLUMNS) o None si no se perfiló."""
+        return cursor.execute(f"SELECT {', '.join(DQ_COLUMNS)} FROM DQ_Ventas WHERE Lote = ?", [lote]).fetchone()
+
+    def sp_perfilar_calidad_ventas(self, cursor, muestras=5, resumen=1):
+        """Perfil de calidad del lote en una sola pasada, guardado en DQ_Ventas y DQ_Ventas_Muestras."""
+        lote = self._lote(cursor)
+        flags = [column for _, column, _ in PROBLEMAS_VENTAS]
+        values = ['FechaVenta', 'CodigoProducto', 'Cantidad', 'PrecioVenta', 'Archivo_Origen']
+        marcas = ', '.join(f"CASE WHEN {condition} THEN 1 ELSE 0 END AS {column}" for _, column, condition in PROBLEMAS_VENTAS)
+        cualquiera = ' OR '.join(condition for _, _, condition in PROBLEMAS_VENTAS)
+
+        # Cada conversión se calcula una vez por fila. Las filas válidas quedan
+        # agrupadas en una sola fila (sin sus valores) y las inválidas conservan
+        # los suyos para las muestras
+        cursor.execute("DROP TABLE IF EXISTS Perfil_Ventas")
+        cursor.execute(f"""
+            CREATE TEMP TABLE Perfil_Ventas AS
+            SELECT Con_Problema, {', '.join(flags)}, {', '.join(values)}, COUNT(*) AS Filas
+            FROM (
+                SELECT Con_Problema, {', '.join(flags)},
+                       {', '.join(f"CASE WHEN Con_Problema = 1 THEN {c} END AS {c}" for c in values)}
+                FROM (
+                    SELECT {', '.join(values)}, {marcas},
+                           CASE WHEN {cualquiera} THEN 1 ELSE 0 END AS Con_Problema
+                    FROM (
+                        SELECT {', '.join(values)},
+                               {self.try_date('FechaVenta')} AS Fecha,
+                               {self.try_int('Cantidad')} AS Cantidad_Valor,
+                               {self.try_decimal('PrecioVenta')} AS Precio
+                        FROM {self._ventas_stg()} AS V
+                    ) AS C
+                ) AS R
+            ) AS M
+            GROUP BY Con_Problema, {', '.join(flags)}, {', '.join(values)}
+        """)
+
+        cursor.execute("DELETE FROM DQ_Ventas_Muestras WHERE Lote = ?", [lote])
+        cursor.execute("DELETE FROM DQ_Ventas WHERE Lote = ?", [lote])
+        # Cada fila de Perfil_Ventas vale por sus Filas
+        sumas = {'Total_Problemas': 'Con_Problema * Filas', 'Total_Registros': 'Filas'}
+        cursor.execute(f"""
+            INSERT INTO DQ_Ventas (Lote, {', '.join(DQ_COLUMNS)}, Fecha_Perfil)
+            SELECT ?, {', '.join(f"COALESCE(SUM({sumas.get(c, f'{c} * Filas')}), 0)" for c in DQ_COLUMNS)}, {self.NOW}
+            FROM Perfil_Ventas
+        """, [lote, self._now()])
+        tipo = ' '.join(f"WHEN {column} = 1 THEN '{name}'" for name, column, _ in PROBLEMAS_VENTAS)
+        cursor.execute(f"""
+            INSERT INTO DQ_Ventas_Muestras (Lote, FechaVenta, CodigoProducto, Cantidad, PrecioVenta, Tipo_Problema, Archivo_Origen)
+            SELECT ?, FechaVenta, CodigoProducto, Cantidad, PrecioVenta, CASE {tipo} END, Archivo_Origen
+            FROM Perfil_Ventas
+            WHERE Con_Problema = 1
+            LIMIT {int(muestras)}
+        """, [lote])
+        cursor.execute("DROP TABLE Perfil_Ventas")
+
+        if not resumen:
+            return []
+        return [(DQ_COLUMNS, [self._perfil(cursor, lote)])]
+
+    def sp_check_ventas(self, cursor):
+        lote = self._lote(cursor)
+        row = self._perfil(cursor, lote)
+        if row is None:
+            return self.sp_perfilar_calidad_ventas(cursor)
+        return [(DQ_COLUMNS, [row])]
+
+    def sp_ejemplos_ventas(self, cursor):
+        lote = self._lote(cursor)
+        if self._perfil(cursor, lote) is None:
+            self.sp_perfilar_calidad_ventas(cursor, resumen=0)
+        columns = ['FechaVenta', 'CodigoProducto', 'Cantidad', 'PrecioVenta', 'Tipo_Problema']
+        rows = cursor.execute(
+            f"SELECT {', '.join(columns)} FROM DQ_Ventas_Muestras WHERE Lote = ?", [lote]
+        ).fetchall()
+        return [(columns, rows)]
+
+    def cargar_dimension(self, cursor, entity):
+        """sp_Dim_Cargar*: MERGE de INT_<entidad> en Dim_<entidad> y vaciado de la tabla INT."""
+        key, columns = ENTITIES[entity]
+        result = self._merge(cursor, f"Dim_{entity}",
+                             f"SELECT {key}, {', '.join(columns)}, FechaCreacion FROM INT_{entity}", key, columns)
+        self.truncate(cursor, f"INT_{entity}")
+        return result
+
+    def sp_fact_cargar_ventas(self, cursor):
+        cursor.execute(f"""
+            INSERT INTO Fact_Ventas (Tiempo_Key, ID_Producto, ID_Cliente, ID_Tienda, Cantidad, PrecioVenta, Total_IVA, FechaCarga)
+            SELECT DT.Tiempo_Key, DP.ID_Producto, DC.ID_Cliente, TD.ID_Tienda,
+                   IV.Cantidad, IV.PrecioVenta, IV.Total_IVA, IV.FechaCarga
+            FROM INT_Ventas IV
+            INNER JOIN Dim_Cliente DC ON IV.CodigoCliente = DC.CodCliente
+            INNER JOIN Dim_Producto DP ON IV.CodigoProducto = DP.CodigoProducto
+            INNER JOIN Dim_Tienda TD ON IV.CodigoTienda = TD.CodigoTienda
+            INNER JOIN Dim_Tiempo DT ON IV.FechaVenta = DT.Tiempo_Key
+        """)
+        self.truncate(cursor, 'INT_Ventas')
+        return []
+
+    def sp_genera_dim_tiempo_rango(self, cursor, desde, hasta):
+        """Insertar las fechas entre desde y hasta que falten en Dim_Tiempo."""
+        desde = date.fromisoformat(str(desde)[:10])
+        hasta = date.fromisoformat(str(hasta)[:10])
+        existing = {
+            str(row[0])[:10] for row in cursor.execute(
+                "SELECT Tiempo_Key FROM Dim_Tiempo WHERE Tiempo_Key BETWEEN ? AND ?",
+                [desde.isoformat(), hasta.isoformat()]
+            ).fetchall()
+        }
+        rows = [
+            dim_tiempo_row(desde + timedelta(days=n)) for n in range((hasta - desde).days + 1)
+            if (desde + timedelta(days=n)).isoformat() not in existing
+        ]
+        if rows:
+            cursor.executemany(
+                "INSERT INTO Dim_Tiempo (Tiempo_Key, Anio, Mes, Mes_Nombre, Semestre, Trimestre, Semana_Anio, "
+                "Semana_Nro_Mes, Dia, Dia_Nombre, Dia_Semana_Nro) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return [(['Fechas_Insertadas'], [(len(rows),)])]
+
+
+class SQLiteBackend(EmbeddedBackend):
+    """
+    SQLite (sqlite3 de la biblioteca estándar). Los montos se guardan como REAL
+    redondeado a 2 decimales y las fechas como texto ISO (AAAA-MM-DD).
+    """
+    name = 'sqlite'
+    extension = 'db'
+    DATETIME = 'DATETIME'
+    # CAST a DATETIME en SQLite convierte a número (se quedaría con el año)
+    NOW = '?'
+    # IS DISTINCT FROM recién existe en SQLite 3.39; IS NOT es equivalente
+    DISTINCT = 'IS NOT'
+
+    Error = sqlite3.Error
+
+    def connect(self, timeout=10):
+        # WAL: las lecturas no bloquean a la conexión que escribe
+        connection = sqlite3.connect(self.path, timeout=timeout, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode = WAL")
+        return connection
+
+    def create_writer(self):
+        return ExecuteManyWriter(self.config)
+
+    def try_int(self, expr):
+        s = f"TRIM({expr})"
+        return (f"(CASE WHEN ({s} GLOB '[0-9]*' OR {s} GLOB '[+-][0-9]*') AND SUBSTR({s}, 2) NOT GLOB '*[^0-9]*' "
+                f"AND LENGTH({s}) <= 11 AND CAST({s} AS INTEGER) BETWEEN -2147483648 AND 2147483647 "
+                f"THEN CAST({s} AS INTEGER) END)")
+
+    def try_decimal(self, expr):
+        s = f"TRIM({expr})"
+        return (f"(CASE WHEN {s} GLOB '[0-9+.-]*' AND SUBSTR({s}, 2) NOT GLOB '*[^0-9.]*' AND {s} GLOB '*[0-9]*' "
+                f"AND LENGTH({s}) - LENGTH(REPLACE({s}, '.', '')) <= 1 THEN CAST({s} AS REAL) END)")
+
+    def to_money(self, expr):
+        return f"ROUND({expr}, 2)"
+
+    def try_date(self, expr):
+        # date() normaliza fechas inexistentes (2024-02-30 -> 2024-03-01): se descartan
+        s = f"TRIM({expr})"
+        return f"(CASE WHEN DATE({s}) = SUBSTR({s}, 1, 10) THEN DATE({s}) END)"
+
+    def identity(self, table, column, sql_type):
+        return [], f"{column} INTEGER PRIMARY KEY AUTOINCREMENT"
+
+
+class DuckDBBackend(EmbeddedBackend):
+    """DuckDB (paquete duckdb, opcional): motor columnar, con DECIMAL y DATE nativos."""
+    name = 'duckdb'
+    extension = 'duckdb'
+
+    @property
+    def Error(self):
+        import duckdb
+        return duckdb.Error
+
+    def connect(self, timeout=10):
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("El motor duckdb necesita el paquete duckdb (pip install duckdb).")
+        return DuckDBConnection(duckdb.connect(self.path))
+
+    def create_writer(self):
+        return DuckDBAppendWriter(self.config)
+
+    def try_int(self, expr):
+        return f"TRY_CAST(TRIM({expr}) AS INTEGER)"
+
+    def try_decimal(self, expr):
+        return f"TRY_CAST(TRIM({expr}) AS DECIMAL(30,10))"
+
+    def to_money(self, expr):
+        return f"CAST({expr} AS DECIMAL(18,2))"
+
+    def try_date(self, expr):
+        return f"CAST(TRY_CAST(TRIM({expr}) AS TIMESTAMP) AS DATE)"
+
+    def identity(self, table, column, sql_type):
+        sequence = f"Seq_{table}"
+        return ([f"CREATE SEQUENCE IF NOT EXISTS {sequence}"],
+                f"{column} {sql_type} PRIMARY KEY DEFAULT nextval('{sequence}')")
+
+    def drop_identity(self, table):
+        return [f"DROP SEQUENCE IF EXISTS Seq_{table}"]
+
+
+class DuckDBConnection:
+    """
+    Conexión de DuckDB con la semántica de transacción de los otros motores
+    (autocommit apagado): la transacción se abre con la primera sentencia y
+    termina con commit o rollback. Abrirla recién ahí evita que una conexión
+    abierta de antemano (la compartida del orquestador) quede con una foto de
+    la base anterior a las tablas creadas por otras conexiones.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.in_transaction = False
+
+    def begin(self):
+        if not self.in_transaction:
+            self.connection.begin()
+            self.in_transaction = True
+
+    def cursor(self):
+        return DuckDBCursor(self)
+
+    def commit(self):
+        if self.in_transaction:
+            self.connection.commit()
+            self.in_transaction = False
+
+    def rollback(self):
+        if self.in_transaction:
+            self.connection.rollback()
+            self.in_transaction = False
+
+    def close(self):
+        self.connection.close()
+
+
+class DuckDBCursor:
+    """
+    Cursor sobre la conexión de DuckDB (sus cursores propios son conexiones
+    aparte, con otra transacción). rowcount toma la columna Count que devuelve
+    DuckDB en INSERT, UPDATE y DELETE.
+    """
+
+    def __init__(self, owner):
+        self.owner = owner
+        self.connection = owner.connection
+        self.rowcount = -1
+
+    @property
+    def description(self):
+        return self.connection.description
+
+    def execute(self, sql, params=None):
+        self.owner.begin()
+        self.connection.execute(sql, params or [])
+        self.rowcount = -1
+        if sql.lstrip().split(None, 1)[0].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            self.rowcount = self.connection.fetchone()[0]
+        return self
+
+    def executemany(self, sql, rows):
+        self.owner.begin()
+        self.connection.executemany(sql, rows)
+        return self
+
+    def register(self, name, frame):
+        self.connection.register(name, frame)
+
+    def unregister(self, name):
+        self.connection.unregister(name)
+
+    def fetchone(self):
+        return self.connection.fetchone()
+
+    def fetchall(self):
+        return self.connection.fetchall()
+
+    def fetchmany(self, size):
+        return self.connection.fetchmany(size)
+
+    def nextset(self):
+        return False
+
+    def close(self):
+        pass
+
+
+# Motores disponibles, seleccionables con [DATABASE] backend en config.ini
+BACKENDS = {
+    SqlServerBackend.name: SqlServerBackend,
+    SQLiteBackend.name: SQLiteBackend,
+    DuckDBBackend.name: DuckDBBackend,
+}
+
+
+def create_backend(config):
+    """Crear el motor configurado en [DATABASE] backend (por defecto sqlserver)."""
+    name = config.get('DATABASE', 'backend', fallback=SqlServerBackend.name).strip().lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Backend '{name}' no soportado. Opciones: {', '.join(BACKENDS)}")
+    return BACKENDS[name](config)
@@ -0,0 +1,329 @@
+"""
+Benchmark de punta a punta del ETL con datasets sintéticos de distinto tamaño.
+
+Para cada tamaño (cantidad de ventas) genera el dataset con
+"generar registros cvs.py" y mide cada etapa: lectura del CSV, inserción en
+STAGING, STAGING -> INT e INT -> DW. Por etapa se guardan segundos, filas,
+filas/s y pico de memoria (RSS) en un JSON, y se compara contra una corrida
+anterior para detectar regresiones de rendimiento.
+
+Backends ([BENCHMARK] backend en config.ini, ver backends.py):
+    sqlite    - base SQLite local (benchmarks/benchmark.db), recreada para
+                cada tamaño con los procedures portados
+    duckdb    - igual, con DuckDB (benchmarks/benchmark.duckdb)
+    sqlserver - la base configurada en [DATABASE]. Usar solo contra una
+                instancia local de pruebas.
+En todos los casos se ejecutan los pasos reales del pipeline.
+
+Uso:
+    python benchmark.py [--filas 10000 1000000] [--backend duckdb]
+                        [--baseline benchmarks/anterior.json]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from configparser import ConfigParser
+from datetime import datetime
+
+from backends import BACKENDS, create_backend
+from conexion import get_pool
+from column_buffers import read_csv_batches, read_csv_header
+from metricas import PeakMemory
+
+
+GENERATOR_SCRIPT = 'generar registros cvs.py'
+
+# Mismo mapeo que CSVToSQLServer.run_etl
+CSV_TO_STAGING = {
+    'clientes.csv': 'STG_Clientes',
+    'productos.csv': 'STG_Productos',
+    'tiendas.csv': 'STG_Tiendas',
+    'ventas.csv': 'STG_Ventas',
+    'ventas_add.csv': 'STG_Ventas_Add'
+}
+SALES_FILES = ['ventas.csv', 'ventas_add.csv']
+
+
+class StageSkipped(Exception):
+    """La etapa no se puede medir con el backend elegido."""
+
+
+def load_generator():
+    """Importar el generador de datos (el nombre del archivo tiene espacios)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), GENERATOR_SCRIPT)
+    spec = importlib.util.spec_from_file_location('generar_registros', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def count_sales_rows(dataset_dir):
+    """Contar las ventas de un dataset ya generado (líneas menos encabezado)."""
+    total = 0
+    for filename in SALES_FILES:
+        with open(os.path.join(dataset_dir, filename), 'rb') as f:
+            total += sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b'')) - 1
+    return total
+
+
+def git_version():
+    """Commit actual del repositorio, para identificar la corrida."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+
+class ETLBenchmark:
+    """
+    Corre el benchmark para una lista de tamaños y guarda los resultados en JSON.
+    """
+
+    def __init__(self, config_file='config.ini', backend=None, sizes=None, regenerate=False):
+        self.config = ConfigParser()
+        self.config.optionxform = str
+
+        if not os.path.exists(config_file) or not self.config.read(config_file):
+            raise FileNotFoundError(f"Archivo '{config_file}' no encontrado o vacío.")
+
+        self.backend = (backend or self.config.get('BENCHMARK', 'backend', fallback='sqlite')).strip()
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Backend '{self.backend}' no soportado. Opciones: {', '.join(BACKENDS)}")
+
+        if sizes is None:
+            sizes = [
+                int(s) for s in self.config.get('BENCHMARK', 'filas', fallback='10000, 1000000').split(',') if s.strip()
+            ]
+        self.sizes = sizes
+        self.regenerate = regenerate
+        # Semilla fija: los datasets de distintas corridas son comparables
+        self.seed = self.config.getint('BENCHMARK', 'semilla', fallback=42)
+
+        self.output_folder = self.config.get('BENCHMARK', 'output_folder', fallback='benchmarks')
+        self.tolerance = self.config.getfloat('BENCHMARK', 'tolerancia', fallback=0.10)
+        self.chunk_size = self.config.getint('ETL', 'chunk_size', fallback=50000)
+        self.generator = None
+
+        # Los pasos del pipeline leen el motor de [DATABASE]: se fija el del
+        # benchmark y, si es embebido, una base propia en output_folder
+        if not self.config.has_section('DATABASE'):
+            self.config.add_section('DATABASE')
+        self.config.set('DATABASE', 'backend', self.backend)
+        if BACKENDS[self.backend].embedded:
+            self.config.set('DATABASE', 'path', os.path.join(
+                self.output_folder, f"benchmark.{BACKENDS[self.backend].extension}"))
+        self.db_backend = create_backend(self.config)
+
+    # DATASETS
+    def dataset_dir(self, num_rows):
+        return os.path.join(self.output_folder, 'datasets', f"ventas_{num_rows}")
+
+    def generate_dataset(self, num_rows):
+        """Generar el dataset de num_rows ventas (se reutiliza si ya existe)."""
+        out_dir = self.dataset_dir(num_rows)
+        if not self.regenerate and all(os.path.exists(os.path.join(out_dir, f)) for f in CSV_TO_STAGING):
+            raise StageSkipped(f"se reutiliza el dataset existente en {out_dir} ({count_sales_rows(out_dir)} ventas)")
+
+        if self.generator is None:
+            self.generator = load_generator()
+        gen = self.generator
+
+        os.makedirs(out_dir, exist_ok=True)
+        gen.random.seed(self.seed)
+        clientes, c_headers = gen.generate_clientes()
+        gen.save_dimension(clientes, c_headers, 'clientes.csv', out_dir=out_dir)
+        productos, p_headers = gen.generate_productos()
+        gen.save_dimension(productos, p_headers, 'productos.csv', out_dir=out_dir)
+        tiendas, t_headers = gen.generate_tiendas()
+        gen.save_dimension(tiendas, t_headers, 'tiendas.csv', out_dir=out_dir)
+
+        return gen.generate_and_save_sales(clientes, productos, tiendas, out_dir=out_dir,
+                                           num_rows=num_rows, seed=self.seed)
+
+    # ETAPAS
+    def stage_csv_parse(self, dataset_dir):
+        """Lectura por bloques de los CSV de ventas, sin escribir en la BD."""
+        rows = 0
+        for filename in SALES_FILES:
+            path = os.path.join(dataset_dir, filename)
+            for batch in read_csv_batches(path, read_csv_header(path), self.chunk_size):
+                rows += len(batch)
+        return rows
+
+    def prepare_database(self):
+        """Con un motor embebido, recrear la base del benchmark vacía con las tablas del pipeline."""
+        if not self.db_backend.embedded:
+            return
+        # Las conexiones libres del pool apuntan a la base anterior
+        get_pool(self.config).close()
+        path = self.db_backend.path
+        for file_path in (path, f"{path}.wal", f"{path}-wal", f"{path}-shm"):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+        connection = self.db_backend.connect()
+        try:
+            cursor = connection.cursor()
+            for sql_file in ('SQLQuerySTAGING.sql', 'SQLQueryINT.sql', 'SQLQueryCreateDW.sql'):
+                self.db_backend.create_schema(cursor, sql_file)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _pipeline_step(self, module_name, class_name, method_name, dataset_dir=None):
+        """Ejecutar un paso del pipeline en el mismo proceso contra el backend elegido."""
+        module = importlib.import_module(module_name)
+        step = getattr(module, class_name)(config=self.config)
+        if dataset_dir is not None:
+            step.dataset_folder = dataset_dir
+        if not getattr(step, method_name)():
+            raise Exception(f"{class_name}.{method_name} terminó con error")
+
+    def run_stages(self, dataset_dir, sales_rows):
+        """Definir las etapas a medir según el backend."""
+        def staging_insert():
+            self._pipeline_step('extract_data', 'CSVToSQLServer', 'run_etl', dataset_dir)
+            return sales_rows
+
+        def stg_to_int():
+            self._pipeline_step('load_STG_to_INT', 'DWLoader', 'run')
+            return sales_rows
+
+        def int_to_dw():
+            self._pipeline_step('dw_loader', 'ELTDataWarehouseLoader', 'run_load_dw')
+            return sales_rows
+
+        return [
+            ('csv_parse', lambda: self.stage_csv_parse(dataset_dir)),
+            ('staging_insert', staging_insert),
+            ('stg_to_int', stg_to_int),
+            ('int_to_dw', int_to_dw),
+        ]
+
+    def measure(self, name, func):
+        """Medir tiempo, filas y pico de memoria de una etapa."""
+        print(f"\n Etapa: {name}")
+        try:
+            with PeakMemory() as memory:
+                start = time.perf_counter()
+                rows = func()
+                seconds = time.perf_counter() - start
+        except StageSkipped as e:
+            print(f"   Omitida: {e}")
+            return {'omitida': str(e)}
+
+        result = {
+            'segundos': round(seconds, 3),
+            'filas': rows,
+            'filas_por_segundo': round(rows / seconds, 1) if seconds > 0 else None,
+            'rss_pico_mb': memory.peak_mb
+        }
+        print(f"   {rows} filas en {seconds:.2f}s ({result['filas_por_segundo'] or 0:,.0f} filas/s), "
+              f"RSS pico: {result['rss_pico_mb']} MB")
+        return result
+
+    # EJECUCIÓN
+    def run(self):
+        """Correr todos los tamaños. Devuelve el diccionario de resultados."""
+        os.makedirs(self.output_folder, exist_ok=True)
+        results = {
+            'generado': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'version': git_version(),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'backend': self.backend,
+            'writer': (self.db_backend.create_writer().name if self.db_backend.embedded
+                       else self.config.get('ETL', 'writer', fallback='fast_executemany')),
+            'chunk_size': self.chunk_size,
+            'corridas': []
+        }
+
+        for num_rows in self.sizes:
+            print("\n" + "=" * 60)
+            print(f" BENCHMARK: {num_rows:,} ventas")
+            print("=" * 60)
+
+            run = {'filas': num_rows, 'etapas': {}}
+            run['etapas']['generacion'] = self.measure('generacion', lambda: self.generate_dataset(num_rows))
+            dataset_dir = self.dataset_dir(num_rows)
+            self.prepare_database()
+
+            for name, func in self.run_stages(dataset_dir, num_rows):
+                run['etapas'][name] = self.measure(name, func)
+            results['corridas'].append(run)
+
+        return results
+
+    def save(self, results):
+        """Guardar los resultados en benchmarks/benchmark_<fecha>.json"""
+        file_name = f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        path = os.path.join(self.output_folder, file_name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n Resultados guardados en: {path}")
+        return path
+
+    def compare(self, results, baseline_file):
+        """
+        Comparar filas/s contra una corrida anterior.
+        Devuelve la lista de regresiones mayores a la tolerancia configurada.
+        """
+        with open(baseline_file, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+        previous = {
+            (run['filas'], name): stage.get('filas_por_segundo')
+            for run in baseline.get('corridas', [])
+            for name, stage in run['etapas'].items()
+        }
+
+        print(f"\n Comparación contra {baseline_file} (versión {baseline.get('version')})")
+        regressions = []
+        for run in results['corridas']:
+            for name, stage in run['etapas'].items():
+                before = previous.get((run['filas'], name))
+                now = stage.get('filas_por_segundo')
+                if not before or not now:
+                    continue
+                change = (now - before) / before
+                status = "REGRESIÓN" if change < -self.tolerance else "ok"
+                print(f"   {run['filas']:>12,} {name:<15} {before:>14,.0f} -> {now:>14,.0f} filas/s ({change:+.1%}) {status}")
+                if change < -self.tolerance:
+                    regressions.append((run['filas'], name, change))
+
+        if regressions:
+            print(f"\n  {len(regressions)} etapa(s) más lentas que la tolerancia ({self.tolerance:.0%})")
+        else:
+            print("\n Sin regresiones de rendimiento")
+        return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de punta a punta del ETL")
+    parser.add_argument('--filas', type=int, nargs='+',
+                        help="Cantidades de ventas a generar (por defecto [BENCHMARK] filas)")
+    parser.add_argument('--backend', choices=list(BACKENDS),
+                        help="Base de datos para las etapas de carga (por defecto [BENCHMARK] backend)")
+    parser.add_argument('--baseline',
+                        help="JSON de una corrida anterior para comparar filas/s")
+    parser.add_argument('--regenerar', action='store_true',
+                        help="Volver a generar los datasets aunque ya existan")
+    parser.add_argument('--config', default='config.ini',
+                        help="Archivo de configuración (por defecto config.ini)")
+    args = parser.parse_args()
+
+    benchmark = ETLBenchmark(args.config, backend=args.backend, sizes=args.filas, regenerate=args.regenerar)
+    results = benchmark.run()
+    benchmark.save(results)
+
+    # Código de salida distinto de 0 si hay regresiones, para usarlo en CI
+    if args.baseline and benchmark.compare(results, args.baseline):
+        sys.exit(1)
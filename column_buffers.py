@@ -0,0 +1,332 @@
+import bz2
+import csv
+import gzip
+import io
+import os
+import queue
+import threading
+
+import numpy as np
+import pandas as pd
+
+# pyarrow es opcional: si está instalado los CSV se leen en columnas Arrow
+# sin crear objetos Python por celda; si no, se usa pandas por bloques.
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pc = None
+    pa_csv = None
+
+# zstandard es opcional: solo lo necesitan los .zst cuando no está pyarrow
+# (pyarrow trae su propio descompresor zstd)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Extensiones de los CSV comprimidos: se descomprimen al vuelo, por bloques,
+# sin descomprimir el archivo completo en disco ni en memoria
+COMPRESSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.zst': 'zstd'}
+
+# Marcador de nulo en join_columns (un campo vacío y un nulo no son lo mismo)
+NULL_TEXT = '\x00'
+
+
+class ArrowBatch:
+    """Bloque de filas en columnas Arrow (los nulos quedan en el bitmap de validez)."""
+
+    def __init__(self, batch):
+        self.batch = batch
+
+    @property
+    def columns(self):
+        return list(self.batch.schema.names)
+
+    def __len__(self):
+        return self.batch.num_rows
+
+    def column(self, name):
+        """Columna como arreglo NumPy de objetos (None para nulos)."""
+        return self.batch.column(self.batch.schema.get_field_index(name)).to_numpy(zero_copy_only=False)
+
+    def null_mask(self, name):
+        return self.batch.column(self.batch.schema.get_field_index(name)).is_null().to_numpy(zero_copy_only=False)
+
+    def series(self, name):
+        """Columna como Series de pandas respaldada por Arrow (operaciones .str vectorizadas)."""
+        return self.batch.column(self.batch.schema.get_field_index(name)).to_pandas(types_mapper=pd.ArrowDtype)
+
+    def filter(self, mask):
+        """Quedarse solo con las filas donde mask es True."""
+        return ArrowBatch(self.batch.filter(pa.array(mask)))
+
+    def join_columns(self, names, separator):
+        """Texto de varias columnas unido por fila, como arreglo NumPy de objetos (en un solo paso Arrow)."""
+        parts = [
+            pc.fill_null(pc.cast(self.batch.column(self.batch.schema.get_field_index(name)), pa.string()), NULL_TEXT)
+            for name in names
+        ]
+        return pc.binary_join_element_wise(*parts, separator).to_numpy(zero_copy_only=False)
+
+    def to_frame(self):
+        return self.batch.to_pandas()
+
+    def with_constant(self, name, value):
+        """Agregar una columna con el mismo valor en todas las filas."""
+        constant = pa.array(np.full(len(self), value))
+        return ArrowBatch(pa.RecordBatch.from_arrays(
+            list(self.batch.columns) + [constant], names=self.columns + [name]
+        ))
+
+    def to_rows(self):
+        """Filas como tuplas, para drivers que solo aceptan parámetros por fila."""
+        return list(zip(*(column.to_pylist() for column in self.batch.columns)))
+
+    def write_csv(self, binary_file):
+        """Escribir el bloque como CSV sin encabezado (nulos como campo vacío)."""
+        pa_csv.write_csv(self.batch, binary_file, write_options=pa_csv.WriteOptions(include_header=False))
+
+
+class NumpyBatch:
+    """Bloque de filas en columnas NumPy con máscara explícita de nulos."""
+
+    def __init__(self, columns, arrays, masks):
+        self.columns = list(columns)
+        self.arrays = arrays
+        self.masks = masks
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(
+            df.columns,
+            {c: df[c].to_numpy(dtype=object) for c in df.columns},
+            {c: df[c].isna().to_numpy() for c in df.columns}
+        )
+
+    def __len__(self):
+        return len(self.arrays[self.columns[0]]) if self.columns else 0
+
+    def column(self, name):
+        return np.where(self.masks[name], None, self.arrays[name])
+
+    def null_mask(self, name):
+        return self.masks[name]
+
+    def series(self, name):
+        return pd.Series(self.arrays[name], dtype=object).where(~self.masks[name], None)
+
+    def filter(self, mask):
+        return NumpyBatch(
+            self.columns,
+            {c: self.arrays[c][mask] for c in self.columns},
+            {c: self.masks[c][mask] for c in self.columns}
+        )
+
+    def join_columns(self, names, separator):
+        parts = [
+            pd.Series(self.arrays[name], dtype=object).astype(str).where(~self.masks[name], NULL_TEXT)
+            for name in names
+        ]
+        return parts[0].str.cat(parts[1:], sep=separator).to_numpy(dtype=object)
+
+    def to_frame(self):
+        return pd.DataFrame({c: self.column(c) for c in self.columns}, columns=self.columns)
+
+    def with_constant(self, name, value):
+        arrays = dict(self.arrays)
+        masks = dict(self.masks)
+        arrays[name] = np.full(len(self), value, dtype=object)
+        masks[name] = np.zeros(len(self), dtype=bool)
+        return NumpyBatch(self.columns + [name], arrays, masks)
+
+    def to_rows(self):
+        return list(zip(*(self.column(c) for c in self.columns)))
+
+    def write_csv(self, binary_file):
+        text_file = io.TextIOWrapper(binary_file, encoding='utf-8', newline='')
+        try:
+            csv.writer(text_file, lineterminator='\n').writerows(self.to_rows())
+        finally:
+            text_file.detach()
+
+
+def compression_of(path):
+    """Compresión del archivo según su extensión (None si es un CSV plano)."""
+    return COMPRESSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def open_binary(path):
+    """Abrir un CSV, plano o comprimido, como archivo binario que se lee por streaming."""
+    compression = compression_of(path)
+    if compression == 'gzip':
+        return gzip.open(path, 'rb')
+    if compression == 'bz2':
+        return bz2.open(path, 'rb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError(f"{path}: los archivos .zst necesitan pyarrow o el paquete zstandard.")
+        # read_across_frames: los .zst escritos en paralelo (pzstd, zstd -T) tienen varios frames
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+    return open(path, 'rb')
+
+
+def read_csv_header(path):
+    """Leer solo los nombres de columna de la primera línea del CSV."""
+    with io.TextIOWrapper(open_binary(path), encoding='utf-8-sig', newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def _open_arrow(path):
+    """
+    Entrada de pyarrow para un archivo: los planos se mapean en memoria (las
+    páginas se leen del cache del sistema, sin copiarlas a un buffer propio) y
+    los comprimidos se descomprimen al vuelo con los códecs de pyarrow.
+    """
+    compression = compression_of(path)
+    if compression is None:
+        return pa.memory_map(path, 'r')
+    if pa.Codec.is_available(compression):
+        return pa.input_stream(path, compression=compression)
+    return open_binary(path)
+
+
+def _read_arrow(source, columns, chunk_size, names):
+    read_options = pa_csv.ReadOptions(
+        column_names=names,
+        block_size=max(1 << 20, chunk_size * 256)
+    )
+    convert_options = pa_csv.ConvertOptions(
+        include_columns=columns,
+        column_types={c: pa.string() for c in columns},
+        null_values=[''],
+        strings_can_be_null=True,
+        quoted_strings_can_be_null=True
+    )
+    parse_options = pa_csv.ParseOptions(newlines_in_values=True)
+
+    stream = _open_arrow(source) if isinstance(source, str) else source
+    try:
+        reader = pa_csv.open_csv(stream, read_options=read_options,
+                                 parse_options=parse_options, convert_options=convert_options)
+        for record_batch in reader:
+            # Orden de columnas igual al mapeo y bloques de como máximo chunk_size filas
+            ordered = pa.RecordBatch.from_arrays(
+                [record_batch.column(record_batch.schema.get_field_index(c)) for c in columns],
+                names=columns
+            )
+            for offset in range(0, ordered.num_rows, chunk_size):
+                yield ArrowBatch(ordered.slice(offset, chunk_size))
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+def _read_pandas(source, columns, chunk_size, names):
+    options = dict(usecols=columns, dtype=str, keep_default_na=False, na_values=[''], chunksize=chunk_size)
+    if names:
+        options.update(header=None, names=names)
+    stream = source
+    if isinstance(source, str):
+        if compression_of(source) is None:
+            # CSV plano: pandas lo lee mapeado en memoria
+            options.update(memory_map=True)
+        else:
+            stream = open_binary(source)
+    try:
+        for chunk in pd.read_csv(stream, **options):
+            yield NumpyBatch.from_frame(chunk[columns])
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+def read_csv_batches(source, columns, chunk_size, names=None):
+    """
+    Leer un CSV por bloques de chunk_size filas como lotes en columnas.
+    Todas las columnas se leen como texto y los campos vacíos quedan como NULL.
+    source: ruta (CSV plano, mapeado en memoria, o .gz/.bz2/.zst, descomprimido
+    al vuelo) o archivo binario ya abierto.
+    names: nombres de columna cuando source no empieza con el encabezado.
+    """
+    if pa is not None:
+        return _read_arrow(source, columns, chunk_size, names)
+    return _read_pandas(source, columns, chunk_size, names)
+
+
+class _ReadError:
+    """Excepción del hilo lector, que se vuelve a lanzar en el que consume."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+_END = object()
+
+
+def prefetch_batches(sources, depth, workers=1):
+    """
+    Leer los bloques de una lista de iterables (p. ej. un generador por
+    archivo) en hilos aparte: workers hilos toman los iterables de a uno y
+    dejan sus bloques en una cola de depth bloques por delante del que los
+    consume (cola acotada: si la escritura es más lenta, los lectores esperan
+    y la memoria no crece). Así la lectura de los próximos bloques se
+    superpone con la inserción del actual.
+    Cerrar el generador (o un error del que consume) detiene a los lectores; un
+    error de un lector se lanza en el hilo que consume.
+    """
+    pending = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+    remaining = iter(sources)
+    remaining_lock = threading.Lock()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def next_source():
+        with remaining_lock:
+            return next(remaining, None)
+
+    def read():
+        try:
+            source = next_source()
+            while source is not None and not stop.is_set():
+                try:
+                    for batch in source:
+                        if not put(batch):
+                            return
+                finally:
+                    close = getattr(source, 'close', None)
+                    if close is not None:
+                        close()
+                source = next_source()
+            put(_END)
+        except BaseException as e:
+            put(_ReadError(e))
+
+    readers = [threading.Thread(target=read, name=f'lector_bloques_{i}', daemon=True)
+               for i in range(max(1, workers))]
+    for reader in readers:
+        reader.start()
+    try:
+        finished = 0
+        while finished < len(readers):
+            item = pending.get()
+            if item is _END:
+                finished += 1
+                continue
+            if isinstance(item, _ReadError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
@@ -0,0 +1,138 @@
+"""
+Pool de conexiones compartido por los pasos del ETL.
+
+Todos los pasos (extract_data, load_STG_to_INT, dw_loader, parquet_export, el
+orquestador y cubos.py) piden sus conexiones a get_pool(config): cuando corren
+en el mismo proceso comparten el mismo pool, así una conexión que un paso
+devuelve la reutiliza el siguiente sin volver a autenticarse contra el
+servidor. Al pedir una conexión del pool se valida con SELECT 1 (las que se
+cortaron mientras esperaban se descartan) y los errores transitorios al
+conectar (corte de red, timeout, base bloqueada) se reintentan con espera
+exponencial. Se configura en la sección [CONEXION] de config.ini.
+"""
+
+import atexit
+import random
+import threading
+import time
+
+from backends import create_backend
+
+
+class ConnectionPool:
+    """
+    Conexiones libres de un motor, reutilizables entre pasos.
+    pool_size limita las conexiones libres que se guardan, no las que se usan a
+    la vez: cada paso decide su paralelismo (max_workers) y las conexiones que
+    sobran al devolverse se cierran.
+    """
+
+    def __init__(self, config, backend=None):
+        self.config = config
+        self.backend = backend or create_backend(config)
+        self.pool_size = config.getint('CONEXION', 'pool_size', fallback=5)
+        self.timeout = config.getint('CONEXION', 'timeout', fallback=30)
+        self.retries = config.getint('CONEXION', 'reintentos', fallback=4)
+        self.backoff = config.getfloat('CONEXION', 'espera_inicial', fallback=1.0)
+        self.backoff_max = config.getfloat('CONEXION', 'espera_maxima', fallback=30.0)
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def _is_alive(self, connection):
+        """Validar una conexión libre antes de entregarla."""
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _connect(self, metric=None):
+        """Abrir una conexión nueva, reintentando los errores transitorios con espera exponencial."""
+        attempt = 0
+        while True:
+            try:
+                return self.backend.connect(timeout=self.timeout)
+            except Exception as e:
+                if attempt >= self.retries or not self.backend.is_transient(e):
+                    raise
+                # Espera exponencial con jitter: los workers no reintentan todos a la vez
+                delay = min(self.backoff_max, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                attempt += 1
+                print(f" Conexión fallida ({e}). Reintento {attempt}/{self.retries} en {delay:.1f}s")
+                if metric is not None:
+                    metric.retries += 1
+                time.sleep(delay)
+
+    def acquire(self, metric=None):
+        """
+        Entregar una conexión libre validada o, si no hay, una nueva.
+        metric (ver metricas.StageMetric) acumula los reintentos de conexión.
+        """
+        while True:
+            with self.lock:
+                connection = self.idle.pop() if self.idle else None
+            if connection is None:
+                return self._connect(metric)
+            if self._is_alive(connection):
+                return connection
+            print(" Conexión del pool cortada, se descarta")
+            self._close(connection)
+
+    def release(self, connection):
+        """
+        Devolver una conexión al pool. Lo no confirmado se revierte: la próxima
+        vez se entrega sin transacción abierta.
+        """
+        if connection is None:
+            return
+        try:
+            connection.rollback()
+        except Exception:
+            self._close(connection)
+            return
+        with self.lock:
+            if len(self.idle) < self.pool_size:
+                self.idle.append(connection)
+                return
+        self._close(connection)
+
+    def close(self):
+        """Cerrar las conexiones libres (las entregadas las cierra quien las devuelve)."""
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection in idle:
+            self._close(connection)
+
+
+# Un pool por base (motor y servidor o archivo), compartido en el proceso
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(config):
+    """Pool de la base configurada en [DATABASE] (se crea la primera vez que se pide)."""
+    backend = create_backend(config)
+    key = (backend.name, backend.describe())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(config, backend)
+        return _pools[key]
+
+
+@atexit.register
+def close_pools():
+    """Cerrar las conexiones libres de todos los pools (al terminar el proceso)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
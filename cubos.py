@@ -0,0 +1,200 @@
+"""
+Consultas de resumen de ventas sobre los cubos Agg_Ventas_*.
+
+Cada consulta indica las columnas por las que agrupa (y opcionalmente filtros
+por igualdad); CubeRouter la envía al cubo más chico que tenga las claves
+necesarias y solo recurre a Fact_Ventas si ningún cubo puede responderla.
+Los atributos de las dimensiones (Categoria, Marca, ...) se resuelven con un
+JOIN a la dimensión sobre la clave que guarda el cubo.
+
+Uso:
+    python cubos.py Anio Categoria --filtro Anio=2024
+"""
+
+from configparser import ConfigParser
+import argparse
+import os
+import sys
+from conexion import get_pool
+
+# Cubos y las claves que guarda cada uno (todos tienen Anio y Mes)
+CUBES = {
+    'Agg_Ventas_Mes': [],
+    'Agg_Ventas_Mes_Producto': ['ID_Producto'],
+    'Agg_Ventas_Mes_Producto_Tienda': ['ID_Producto', 'ID_Tienda'],
+    'Agg_Ventas_Mes_Cliente': ['ID_Cliente']
+}
+
+# Columnas de tiempo derivadas del mes
+TIME_COLUMNS = {
+    'Anio': 'C.Anio',
+    'Mes': 'C.Mes',
+    'Trimestre': '(C.Mes + 2) / 3',
+    'Semestre': '(C.Mes + 5) / 6'
+}
+
+# Atributos de las dimensiones: tabla, clave que debe tener el cubo y columna
+ATTRIBUTES = {
+    'Producto': ('Dim_Producto', 'ID_Producto', 'Descripcion'),
+    'CodigoProducto': ('Dim_Producto', 'ID_Producto', 'CodigoProducto'),
+    'Categoria': ('Dim_Producto', 'ID_Producto', 'Categoria'),
+    'Marca': ('Dim_Producto', 'ID_Producto', 'Marca'),
+    'Tienda': ('Dim_Tienda', 'ID_Tienda', 'Descripcion'),
+    'CodigoTienda': ('Dim_Tienda', 'ID_Tienda', 'CodigoTienda'),
+    'TipoTienda': ('Dim_Tienda', 'ID_Tienda', 'TipoTienda'),
+    'Cliente': ('Dim_Cliente', 'ID_Cliente', 'RazonSocial'),
+    'CodCliente': ('Dim_Cliente', 'ID_Cliente', 'CodCliente')
+}
+
+KEYS = ['ID_Producto', 'ID_Tienda', 'ID_Cliente']
+MEASURES = ['Cantidad', 'PrecioVenta', 'Total_IVA', 'Ventas']
+
+# Fact_Ventas con las mismas columnas que los cubos (último recurso)
+FACT_SOURCE = """(
+    SELECT YEAR(Tiempo_Key) AS Anio, MONTH(Tiempo_Key) AS Mes, ID_Producto, ID_Tienda, ID_Cliente,
+           CAST(Cantidad AS BIGINT) AS Cantidad, PrecioVenta, Total_IVA, 1 AS Ventas
+    FROM Fact_Ventas
+)"""
+
+
+def required_keys(columns):
+    """Claves que necesita un cubo para agrupar o filtrar por columns."""
+    keys = set()
+    for column in columns:
+        if column in KEYS:
+            keys.add(column)
+        elif column in ATTRIBUTES:
+            keys.add(ATTRIBUTES[column][1])
+        elif column not in TIME_COLUMNS:
+            raise ValueError(f"Columna '{column}' no soportada. Opciones: "
+                             f"{', '.join(list(TIME_COLUMNS) + KEYS + list(ATTRIBUTES))}")
+    return keys
+
+
+class CubeRouter:
+    """Elige el cubo más chico que responde una consulta y la ejecuta."""
+
+    def __init__(self, config_file='config.ini', config=None, connection=None):
+        if config is not None:
+            self.config = config
+        else:
+            self.config = ConfigParser()
+            self.config.optionxform = str
+
+            if not os.path.exists(config_file) or not self.config.read(config_file):
+                raise FileNotFoundError(f" Error: Archivo '{config_file}' no encontrado.")
+
+        self.connection = connection
+        self.owns_connection = connection is None
+        self.pool = get_pool(self.config)
+        self.backend = self.pool.backend
+        self.cube_rows = None
+
+    def connect_db(self):
+        """Conectar a base de datos SQL."""
+        if self.connection:
+            return
+        if self.backend.embedded:
+            raise ValueError(f"Los cubos Agg_Ventas_* solo existen en SQL Server (backend = {self.backend.name}).")
+        self.connection = self.pool.acquire()
+
+    def close(self):
+        if self.connection and self.owns_connection:
+            self.pool.release(self.connection)
+            self.connection = None
+
+    def load_cube_rows(self):
+        """Filas de cada cubo según sys.partitions (sin recorrer las tablas)."""
+        self.connect_db()
+        cursor = self.connection.cursor()
+        placeholders = ', '.join('?' for _ in CUBES)
+        rows = cursor.execute(f"""
+            SELECT OBJECT_NAME(object_id), SUM(rows)
+            FROM sys.partitions
+            WHERE object_id IN (SELECT object_id FROM sys.tables WHERE name IN ({placeholders}))
+              AND index_id IN (0, 1)
+            GROUP BY object_id
+        """, *CUBES).fetchall()
+        self.cube_rows = {name: count for name, count in rows}
+
+    def choose_cube(self, columns):
+        """Nombre del cubo más chico con todas las claves necesarias (None: solo Fact_Ventas)."""
+        keys = required_keys(columns)
+        candidates = [name for name, cube_keys in CUBES.items() if keys <= set(cube_keys)]
+        if not candidates:
+            return None
+        if self.cube_rows is None:
+            self.load_cube_rows()
+        # Sin estadísticas se usa el orden de CUBES (de menor a mayor grano)
+        return min(candidates, key=lambda name: (self.cube_rows.get(name, 0), list(CUBES).index(name)))
+
+    def build_query(self, group_by, filtros=None):
+        """Armar el SELECT agrupado. Devuelve (sql, parámetros, origen usado)."""
+        filtros = filtros or {}
+        cube = self.choose_cube(list(group_by) + list(filtros))
+        source = cube or FACT_SOURCE
+
+        joins = {}
+        expressions = {}
+        for column in list(group_by) + list(filtros):
+            if column in TIME_COLUMNS:
+                expressions[column] = TIME_COLUMNS[column]
+            elif column in KEYS:
+                expressions[column] = f"C.{column}"
+            else:
+                table, key, attribute = ATTRIBUTES[column]
+                joins[table] = f"INNER JOIN {table} ON {table}.{key} = C.{key}"
+                expressions[column] = f"{table}.{attribute}"
+
+        select = [f"{expressions[c]} AS {c}" for c in group_by]
+        select += [f"SUM(C.{m}) AS {m}" for m in MEASURES]
+
+        sql = f"SELECT {', '.join(select)}\nFROM {source} AS C"
+        if joins:
+            sql += '\n' + '\n'.join(joins.values())
+        if filtros:
+            sql += '\nWHERE ' + ' AND '.join(f"{expressions[c]} = ?" for c in filtros)
+        if group_by:
+            group = ', '.join(expressions[c] for c in group_by)
+            sql += f"\nGROUP BY {group}\nORDER BY {group}"
+        return sql, list(filtros.values()), cube or 'Fact_Ventas'
+
+    def query(self, group_by, filtros=None):
+        """Ejecutar la consulta en el cubo elegido. Devuelve un DataFrame."""
+        import pandas as pd
+
+        sql, params, source = self.build_query(group_by, filtros)
+        self.connect_db()
+        cursor = self.connection.cursor()
+        rows = cursor.execute(sql, *params).fetchall()
+        print(f" Consulta resuelta con {source} ({len(rows)} filas)")
+        return pd.DataFrame.from_records(rows, columns=[d[0] for d in cursor.description])
+
+
+# EJECUCIÓN
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consultas de resumen de ventas sobre los cubos Agg_Ventas_*")
+    parser.add_argument('agrupar', nargs='*', help="Columnas por las que agrupar (ej. Anio Mes Categoria)")
+    parser.add_argument('--filtro', action='append', default=[], metavar='COLUMNA=VALOR',
+                        help="Filtro por igualdad (se puede repetir)")
+    parser.add_argument('--sql', action='store_true', help="Solo mostrar la consulta y el cubo elegido")
+    parser.add_argument('--config', default='config.ini', help="Archivo de configuración (por defecto config.ini)")
+    args = parser.parse_args()
+
+    filtros = {}
+    for item in args.filtro:
+        column, _, value = item.partition('=')
+        filtros[column.strip()] = int(value) if column.strip() in TIME_COLUMNS or column.strip() in KEYS else value
+
+    router = CubeRouter(config_file=args.config)
+    try:
+        if args.sql:
+            sql, params, source = router.build_query(args.agrupar, filtros)
+            print(f"-- Origen: {source}\n{sql}\n-- Parámetros: {params}")
+        else:
+            print(router.query(args.agrupar, filtros).to_string(index=False))
+    except ValueError as e:
+        print(f" {e}")
+        sys.exit(1)
+    finally:
+        router.close()
@@ -0,0 +1,172 @@
+import json
+import os
+import threading
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+import pandas as pd
+
+from dq_resumen import SUMMARY_FILE
+
+
+# Mismas reglas que sp_CheckVentasProblematicData / sp_GetVentasProblematicExamples
+# (TRY_CONVERT a INT, DECIMAL(30,10) y DATE), en el mismo orden de prioridad.
+FECHA_INVALIDA = 'FECHA_INVALIDA'
+CANTIDAD_INVALIDA = 'CANTIDAD_INVALIDA'
+PRECIO_INVALIDO = 'PRECIO_INVALIDO'
+PRECIO_DEMASIADO_GRANDE = 'PRECIO_DEMASIADO_GRANDE'
+
+INT_PATTERN = r'\s*[+-]?\d+\s*'
+DECIMAL_30_10_PATTERN = r'\s*[+-]?(?:\d{1,20}(?:\.\d*)?|\.\d+)\s*'
+INT_MIN, INT_MAX = -2147483648, 2147483647
+PRECIO_MAXIMO = Decimal('99999999999999.99')
+
+REJECT_FILE = 'ventas_rechazos.csv'
+
+
+def _matches(series, pattern):
+    """fullmatch vectorizado; los nulos no cumplen el patrón."""
+    # Copia escribible: en pandas 3 to_numpy() puede devolver una vista de solo lectura
+    return series.str.fullmatch(pattern).fillna(False).to_numpy(dtype=bool).copy()
+
+
+def invalid_cantidad(series):
+    """TRY_CONVERT(INT, Cantidad) IS NULL"""
+    valid = _matches(series, INT_PATTERN)
+    values = pd.to_numeric(series.where(valid), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    valid &= (values >= INT_MIN) & (values <= INT_MAX)
+    return ~valid
+
+
+def invalid_precio(series):
+    """TRY_CONVERT(DECIMAL(30,10), PrecioVenta) IS NULL"""
+    return ~_matches(series, DECIMAL_30_10_PATTERN)
+
+
+def precio_demasiado_grande(series, invalid):
+    """TRY_CONVERT(DECIMAL(30,10), PrecioVenta) NOT BETWEEN -99999999999999.99 AND 99999999999999.99"""
+    values = np.abs(pd.to_numeric(series.where(~invalid), errors='coerce').to_numpy(dtype=float, na_value=np.nan))
+    too_large = values > float(PRECIO_MAXIMO)
+
+    # Cerca del límite el float no alcanza: se confirma con Decimal solo esos pocos valores
+    borderline = np.flatnonzero(np.abs(values - float(PRECIO_MAXIMO)) < 1)
+    for i in borderline:
+        try:
+            too_large[i] = abs(Decimal(str(series.iloc[i]).strip())) > PRECIO_MAXIMO
+        except InvalidOperation:
+            too_large[i] = False
+    return too_large
+
+
+def invalid_fecha(series):
+    """TRY_CONVERT(DATE, FechaVenta) IS NULL"""
+    parsed = pd.to_datetime(series, errors='coerce', format='ISO8601')
+    invalid = parsed.isna().to_numpy().copy()  # escribible, ver _matches
+
+    # Formatos no ISO (ej. 15/01/2024): segundo intento solo sobre las filas que fallaron
+    retry = invalid & series.notna().to_numpy()
+    if retry.any():
+        reparsed = pd.to_datetime(series[retry], errors='coerce', format='mixed')
+        invalid[retry] = reparsed.isna().to_numpy()
+    return invalid
+
+
+class VentasValidator:
+    """
+    Validador vectorizado de ventas en la etapa de extracción.
+    Aplica por bloque las reglas de sp_CheckVentasProblematicData, separa las
+    filas inválidas a un archivo de rechazos con su código de motivo y acumula
+    los conteos por regla en un resumen JSON que luego lee DWLoader.
+    """
+
+    def __init__(self, reject_folder, max_examples=5):
+        self.reject_folder = reject_folder
+        self.max_examples = max_examples
+        self.reject_path = os.path.join(reject_folder, REJECT_FILE)
+        self.summary_path = os.path.join(reject_folder, SUMMARY_FILE)
+        self.lock = threading.Lock()
+        self._reject_header_written = False
+
+        self.counts = {
+            'Total_Problemas': 0,
+            'Cantidad_Invalida': 0,
+            'Precio_Invalido': 0,
+            'Precio_Demasiado_Grande': 0,
+            'Fecha_Invalida': 0,
+            'Total_Registros': 0
+        }
+        self.examples = []
+        self.files = {}
+
+        os.makedirs(reject_folder, exist_ok=True)
+        if os.path.exists(self.reject_path):
+            os.remove(self.reject_path)
+
+    def validate(self, batch, source_name):
+        """Validar un bloque; devuelve solo las filas válidas."""
+        fecha = invalid_fecha(batch.series('FechaVenta'))
+        cantidad = invalid_cantidad(batch.series('Cantidad'))
+        precio_series = batch.series('PrecioVenta')
+        precio = invalid_precio(precio_series)
+        precio_grande = precio_demasiado_grande(precio_series, precio)
+
+        invalid = fecha | cantidad | precio | precio_grande
+        rejected = int(invalid.sum())
+
+        with self.lock:
+            self.counts['Total_Problemas'] += rejected
+            self.counts['Cantidad_Invalida'] += int(cantidad.sum())
+            self.counts['Precio_Invalido'] += int(precio.sum())
+            self.counts['Precio_Demasiado_Grande'] += int(precio_grande.sum())
+            self.counts['Fecha_Invalida'] += int(fecha.sum())
+            self.counts['Total_Registros'] += len(batch)
+            self.files[source_name] = self.files.get(source_name, 0) + rejected
+
+            if rejected:
+                motivos = np.select(
+                    [fecha, cantidad, precio, precio_grande],
+                    [FECHA_INVALIDA, CANTIDAD_INVALIDA, PRECIO_INVALIDO, PRECIO_DEMASIADO_GRANDE],
+                    default='OTRO_PROBLEMA'
+                )[invalid]
+                self._write_rejects(batch.filter(invalid).to_frame(), motivos, source_name)
+
+        if not rejected:
+            return batch
+        return batch.filter(~invalid)
+
+    def _write_rejects(self, df, motivos, source_name):
+        df['Archivo'] = source_name
+        df['Tipo_Problema'] = motivos
+        df.to_csv(self.reject_path, mode='a', index=False, header=not self._reject_header_written, encoding='utf-8')
+        self._reject_header_written = True
+
+        for row in df.head(self.max_examples - len(self.examples)).itertuples(index=False):
+            self.examples.append({
+                'FechaVenta': row.FechaVenta,
+                'CodigoProducto': row.CodigoProducto,
+                'Cantidad': row.Cantidad,
+                'PrecioVenta': row.PrecioVenta,
+                'Tipo_Problema': row.Tipo_Problema
+            })
+
+    def write_summary(self):
+        """Guardar el resumen por regla (llamar después del COMMIT de STAGING)."""
+        summary = dict(self.counts)
+        summary['Generado'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        summary['Rechazos_Por_Archivo'] = self.files
+        summary['Ejemplos'] = self.examples
+        summary['Archivo_Rechazos'] = self.reject_path if self._reject_header_written else None
+
+        tmp_file = f"{self.summary_path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False, default=str)
+        os.replace(tmp_file, self.summary_path)
+
+        print(f" Calidad de datos: {summary['Total_Problemas']} de {summary['Total_Registros']} ventas rechazadas"
+              + (f" → {self.reject_path}" if summary['Archivo_Rechazos'] else ""))
+
+    def discard_summary(self):
+        """Eliminar un resumen previo para que no se lea uno que no corresponde."""
+        if os.path.exists(self.summary_path):
+            os.remove(self.summary_path)
@@ -0,0 +1,20 @@
+"""
+Resumen de calidad de ventas de la extracción (rechazos/dq_resumen_ventas.json).
+
+Lo escribe data_quality.VentasValidator y lo lee load_STG_to_INT.py. Está
+separado de data_quality para que leerlo no importe pandas ni numpy.
+"""
+
+import json
+import os
+
+SUMMARY_FILE = 'dq_resumen_ventas.json'
+
+
+def read_summary(reject_folder):
+    """Leer el resumen de calidad generado en la extracción (None si no existe)."""
+    summary_path = os.path.join(reject_folder, SUMMARY_FILE)
+    if not os.path.exists(summary_path):
+        return None
+    with open(summary_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
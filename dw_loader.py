@@ -1,107 +1,467 @@
-import pyodbc
-from configparser import ConfigParser
-import os
-
-class ELTDataWarehouseLoader:
-    """
-    Clase para la orquestación y ejecución de Stored Procedures
-    en SQL Server para cargar el Data Warehouse (INT -> DIM/FACT).
-    """
-    
-    
-    def __init__(self, config_file='config.ini'):
-        self.config = ConfigParser()
-        self.config.optionxform = str 
-        
-        # Validar y leer el archivo de configuración
-        if not os.path.exists(config_file) or not self.config.read(config_file):
-            raise FileNotFoundError(f" Error: Archivo '{config_file}' no encontrado.")
-            
-        self.connection = None
-        
-        # Secuencia de ejecución: 
-        # 1. Cargar Dimensiones (para que las IDs estén disponibles).
-        # 2. Cargar Hechos (Fact) usando las IDs de las dimensiones.
-        self.execution_sequence = [
-            'dbo.sp_Dim_CargarCliente',
-            'dbo.sp_Dim_CargarProducto',
-            'dbo.sp_Dim_CargarTienda',
-            'dbo.sp_Fact_CargarVentas' 
-        ]
-
-    def connect_db(self):
-        """Conectar a base de datos SQL."""
-        try:
-            # Lectura de la configuración 
-            server = self.config.get('DATABASE', 'server').strip()
-            database = self.config.get('DATABASE', 'database').strip()
-            trusted_connection = self.config.get('DATABASE', 'trusted_connection').strip()
-            driver = self.config.get('DATABASE', 'driver').strip()
-            
-            connection_string = (
-                f"DRIVER={{{driver}}};"
-                f"SERVER={server};"
-                f"DATABASE={database};"
-                f"Trusted_Connection={trusted_connection};"
-            )
-            
-            self.connection = pyodbc.connect(connection_string, timeout=10)
-            self.connection.autocommit = False 
-            print(" Conexión a BD establecida.")
-            
-        except Exception as e:
-            print(f" Error de conexión: {e}")
-            # Re-lanzar la excepción para detener la ejecución si no hay conexión
-            raise
-
-    def execute_stored_procedure(self, sp_name):
-        """Ejecuta un SP y maneja la transacción (commit/rollback)."""
-        if not self.connection:
-            print(" La conexión a la BD no está establecida.")
-            return
-
-        print(f"Ejecutando SP: {sp_name}...")
-        try:
-            cursor = self.connection.cursor()
-            # Ejecuta el Stored Procedure
-            cursor.execute(f"EXEC {sp_name}") 
-            
-            # Commit la transacción después de una ejecución exitosa
-            self.connection.commit()
-            print(f"SP {sp_name} ejecutado y transacción confirmada.")
-            
-        except pyodbc.Error as ex:
-            # Rollback la transacción en caso de error SQL
-            self.connection.rollback()
-            print(f"Error SQL al ejecutar {sp_name}: {ex}")
-            raise
-        except Exception as e:
-            # Rollback en caso de error Python o general
-            self.connection.rollback()
-            print(f"Error general al ejecutar {sp_name}: {e}")
-            raise
-
-    def run_load_dw(self):
-        """Ejecuta la secuencia completa de carga del Data Warehouse."""
-        print("INICIANDO CARGA DE DATOS AL DATA WAREHOUSE")
-        
-        try:
-            self.connect_db()
-
-            for sp in self.execution_sequence:
-                self.execute_stored_procedure(sp)
-
-            print("\n CARGA DEL DATA WAREHOUSE COMPLETADA EXITOSAMENTE!")
-            
-        except Exception as e:
-            print(f" El proceso de carga terminó con un error. Verifique logs.")
-        finally:
-            if self.connection:
-                self.connection.close()
-                print(" Conexión a BD cerrada.")
-
-# EJECUCIÓN
-if __name__ == "__main__":
-   
-    loader = ELTDataWarehouseLoader()
-    loader.run_load_dw()
\ No newline at end of file
+from configparser import ConfigParser
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from conexion import get_pool
+from metricas import MetricsRecorder
+from staging_writers import FastExecuteManyWriter
+
+class ELTDataWarehouseLoader:
+    """
+    Clase para la orquestación y ejecución de Stored Procedures
+    en SQL Server para cargar el Data Warehouse (INT -> DIM/FACT).
+    """
+    
+    
+    def __init__(self, config_file='config.ini', config=None, connection=None, metrics=None):
+        # config y connection permiten reutilizar la configuración ya leída y una
+        # conexión abierta cuando el paso se ejecuta dentro del orquestador
+        if config is not None:
+            self.config = config
+        else:
+            self.config = ConfigParser()
+            self.config.optionxform = str 
+            
+            # Validar y leer el archivo de configuración
+            if not os.path.exists(config_file) or not self.config.read(config_file):
+                raise FileNotFoundError(f" Error: Archivo '{config_file}' no encontrado.")
+            
+        self.connection = connection
+        self.owns_connection = connection is None
+        
+        # Motor de la base ([DATABASE] backend) y pool de conexiones compartido
+        # con los demás pasos que corren en el mismo proceso
+        self.pool = get_pool(self.config)
+        self.backend = self.pool.backend
+        
+        # Métricas por stored procedure (el orquestador pasa su registro compartido)
+        self.metrics = metrics or MetricsRecorder(self.config, 'dw_loader')
+        
+        # Secuencia de ejecución: 
+        # 1. Cargar Dimensiones (para que las IDs estén disponibles).
+        # 2. Cargar Hechos (Fact) usando las IDs de las dimensiones.
+        # 3. Sumar a los cubos Agg_Ventas_* solo las ventas recién cargadas.
+        self.execution_sequence = [
+            'dbo.sp_Dim_CargarCliente',
+            'dbo.sp_Dim_CargarProducto',
+            'dbo.sp_Dim_CargarTienda',
+            'dbo.sp_Fact_CargarVentas',
+            'dbo.sp_Agg_ActualizarCubos'
+        ]
+        # Los motores embebidos no tienen cubos: solo se ejecutan los procedures portados
+        omitted = [sp for sp in self.execution_sequence if not self.backend.has_procedure(sp)]
+        if omitted:
+            print(f" {', '.join(omitted)}: solo disponible en SQL Server, se omite con {self.backend.name}")
+            self.execution_sequence = [sp for sp in self.execution_sequence if sp not in omitted]
+        
+        # Carga de Fact_Ventas: 'sp' (sp_Fact_CargarVentas), 'python' (claves
+        # resueltas en memoria con la caché de dimensiones e inserción masiva) o
+        # 'particiones' (un mes por worker en tablas de staging + SWITCH)
+        self.fact_loader = self.config.get('DW', 'fact_loader', fallback='sp').strip().lower()
+        if self.fact_loader not in ('sp', 'python', 'particiones'):
+            raise ValueError(f"fact_loader '{self.fact_loader}' no soportado. Opciones: sp, python, particiones")
+        if self.fact_loader != 'sp' and self.backend.embedded:
+            print(f" fact_loader '{self.fact_loader}' solo está disponible en SQL Server: con {self.backend.name} se usa sp")
+            self.fact_loader = 'sp'
+        self.chunk_size = self.config.getint('DW', 'chunk_size', fallback=self.config.getint('ETL', 'chunk_size', fallback=50000))
+        self.reject_folder = self.config.get('DATA_QUALITY', 'reject_folder', fallback='rechazos')
+        
+        # Modo particiones: meses preparados a la vez y meses (AAAA-MM) cuya
+        # partición se reemplaza en lugar de agregarle las ventas nuevas
+        self.max_workers = self.config.getint('DW', 'max_workers', fallback=4)
+        self.replace_months = {
+            m.strip() for m in self.config.get('DW', 'reemplazar_meses', fallback='').split(',') if m.strip()
+        }
+        
+        # Caché clave de negocio -> clave subrogada, se carga una vez por ejecución
+        self.key_cache = None
+
+    def connect_db(self):
+        """Conectar a base de datos SQL."""
+        if self.connection and not self.owns_connection:
+            return
+        # La conexión propia se mide como una etapa más, así sus reintentos quedan en las métricas
+        with self.metrics.stage('int_to_dw', procedimiento='conexion') as metric:
+            self.connection = self.open_connection(metric)
+
+    def open_connection(self, metric=None):
+        """Pedir una conexión al pool (reutiliza una libre o abre una nueva); metric cuenta los reintentos."""
+        try:
+            connection = self.pool.acquire(metric)
+            print(" Conexión a BD establecida.")
+            return connection
+            
+        except Exception as e:
+            print(f" Error de conexión: {e}")
+            # Re-lanzar la excepción para detener la ejecución si no hay conexión
+            raise
+
+    def execute_stored_procedure(self, sp_name):
+        """Ejecuta un SP y maneja la transacción (commit/rollback)."""
+        if not self.connection:
+            print(" La conexión a la BD no está establecida.")
+            return
+
+        print(f"Ejecutando SP: {sp_name}...")
+        try:
+            with self.metrics.stage('int_to_dw', procedimiento=sp_name) as metric:
+                cursor = self.connection.cursor()
+                # Ejecuta el Stored Procedure (o su versión portada en los motores embebidos)
+                # Las dimensiones devuelven el resumen del MERGE (Insertados, Actualizados, Sin_Cambios)
+                for columns, rows in self.backend.call(cursor, sp_name):
+                    if columns[0] == 'Insertados':
+                        insertados, actualizados, sin_cambios = rows[0]
+                        metric.rows_in = insertados + actualizados + sin_cambios
+                        metric.rows_out = insertados + actualizados
+                        print(f" {sp_name}: {insertados} insertados, {actualizados} actualizados, {sin_cambios} sin cambios")
+                
+                # Commit la transacción después de una ejecución exitosa
+                self.connection.commit()
+            print(f"SP {sp_name} ejecutado y transacción confirmada.")
+            
+        except self.backend.Error as ex:
+            # Rollback la transacción en caso de error SQL
+            self.connection.rollback()
+            print(f"Error SQL al ejecutar {sp_name}: {ex}")
+            raise
+        except Exception as e:
+            # Rollback en caso de error Python o general
+            self.connection.rollback()
+            print(f"Error general al ejecutar {sp_name}: {e}")
+            raise
+
+    def complete_dim_tiempo(self):
+        """
+        Agregar a Dim_Tiempo las fechas de INT_Ventas que falten, antes de cargar
+        Fact_Ventas (el INNER JOIN con Dim_Tiempo descartaría esas ventas).
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT MIN(FechaVenta), MAX(FechaVenta) FROM INT_Ventas")
+        desde, hasta = cursor.fetchone()
+        
+        if desde is None:
+            print(" INT_Ventas está vacía: no hay fechas para agregar a Dim_Tiempo.")
+            return 0
+        
+        print(f"Completando Dim_Tiempo entre {desde} y {hasta}...")
+        try:
+            with self.metrics.stage('int_to_dw', procedimiento='dbo.Sp_Genera_Dim_Tiempo_Rango') as metric:
+                _, rows = self.backend.call(cursor, 'dbo.Sp_Genera_Dim_Tiempo_Rango', desde=desde, hasta=hasta)[0]
+                metric.rows_out = rows[0][0]
+                self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            print(f"Error al completar Dim_Tiempo: {e}")
+            raise
+        
+        print(f"Dim_Tiempo: {metric.rows_out} fechas agregadas.")
+        return metric.rows_out
+
+    def load_key_cache(self):
+        """
+        Cargar en memoria, una sola vez por ejecución, el mapa clave de negocio ->
+        clave subrogada de cada dimensión (Dim_Tiempo: fechas existentes).
+        """
+        import numpy as np
+        import pandas as pd
+        
+        cursor = self.connection.cursor()
+        queries = {
+            'Cliente': "SELECT CodCliente, ID_Cliente FROM Dim_Cliente",
+            'Producto': "SELECT CodigoProducto, ID_Producto FROM Dim_Producto",
+            'Tienda': "SELECT CodigoTienda, ID_Tienda FROM Dim_Tienda"
+        }
+        
+        self.key_cache = {}
+        for name, query in queries.items():
+            rows = cursor.execute(query).fetchall()
+            self.key_cache[name] = (
+                pd.Index([row[0] for row in rows]),
+                np.array([row[1] for row in rows], dtype=np.int64)
+            )
+        
+        fechas = [row[0] for row in cursor.execute("SELECT Tiempo_Key FROM Dim_Tiempo").fetchall()]
+        self.key_cache['Tiempo'] = pd.Index(pd.to_datetime(fechas).to_numpy().astype('datetime64[D]'))
+        
+        print(f" Caché de claves cargada: {len(self.key_cache['Cliente'][0])} clientes, "
+              f"{len(self.key_cache['Producto'][0])} productos, {len(self.key_cache['Tienda'][0])} tiendas, "
+              f"{len(self.key_cache['Tiempo'])} fechas")
+
+    def map_fact_keys(self, df):
+        """
+        Resolver las claves subrogadas de un bloque de INT_Ventas con búsquedas
+        vectorizadas en la caché. Devuelve (filas mapeadas, filas sin clave).
+        """
+        import numpy as np
+        import pandas as pd
+        
+        fechas = pd.to_datetime(df['FechaVenta']).to_numpy().astype('datetime64[D]')
+        missing = {'Tiempo': self.key_cache['Tiempo'].get_indexer(fechas) < 0}
+        
+        keys = {}
+        for name, column in (('Cliente', 'CodigoCliente'), ('Producto', 'CodigoProducto'), ('Tienda', 'CodigoTienda')):
+            index, ids = self.key_cache[name]
+            positions = index.get_indexer(df[column])
+            missing[name] = positions < 0
+            keys[name] = ids[positions]
+        
+        unmatched = missing['Tiempo'] | missing['Cliente'] | missing['Producto'] | missing['Tienda']
+        matched = ~unmatched
+        
+        facts = pd.DataFrame({
+            'Tiempo_Key': fechas[matched].astype('datetime64[us]').astype(object),
+            'ID_Producto': keys['Producto'][matched],
+            'ID_Cliente': keys['Cliente'][matched],
+            'ID_Tienda': keys['Tienda'][matched],
+            'Cantidad': df['Cantidad'].to_numpy()[matched],
+            'PrecioVenta': df['PrecioVenta'].to_numpy()[matched],
+            'Total_IVA': df['Total_IVA'].to_numpy()[matched],
+            'FechaCarga': df['FechaCarga'].to_numpy()[matched]
+        })
+        
+        rejects = df[unmatched].copy()
+        if len(rejects):
+            rejects['Sin_Clave'] = np.select(
+                [missing[name][unmatched] for name in ('Tiempo', 'Cliente', 'Producto', 'Tienda')],
+                ['Dim_Tiempo', 'Dim_Cliente', 'Dim_Producto', 'Dim_Tienda'],
+                default=''
+            )
+        return facts, rejects, {name: int(mask.sum()) for name, mask in missing.items()}
+
+    def load_fact_python(self):
+        """
+        Cargar Fact_Ventas desde INT_Ventas sin el JOIN de sp_Fact_CargarVentas:
+        las claves se resuelven en memoria por bloques y las filas se insertan en
+        lote. Las ventas sin clave en alguna dimensión se cuentan y se guardan en
+        un archivo de rechazos en lugar de descartarse en silencio.
+        """
+        import pandas as pd
+        from column_buffers import NumpyBatch
+        
+        print("Cargando Fact_Ventas (modo python, caché de claves)...")
+        if self.key_cache is None:
+            self.load_key_cache()
+        
+        writer = FastExecuteManyWriter(self.config)
+        delta_writer = FastExecuteManyWriter(self.config)
+        reject_path = os.path.join(self.reject_folder, 'fact_ventas_sin_clave.csv')
+        if os.path.exists(reject_path):
+            os.remove(reject_path)
+        
+        columns = ['FechaVenta', 'CodigoProducto', 'CodigoCliente', 'CodigoTienda',
+                   'Cantidad', 'PrecioVenta', 'Total_IVA', 'FechaCarga']
+        missing_totals = {'Tiempo': 0, 'Cliente': 0, 'Producto': 0, 'Tienda': 0}
+        rejected = 0
+        
+        # INT_Ventas se lee por una segunda conexión mientras se inserta por la principal
+        read_connection = None
+        try:
+            with self.metrics.stage('int_to_dw', procedimiento='fact_loader_python') as metric:
+                read_connection = self.open_connection(metric)
+                metric.rows_in = metric.rows_out = 0
+                read_cursor = read_connection.cursor()
+                read_cursor.execute(f"SELECT {', '.join(columns)} FROM INT_Ventas")
+                write_cursor = self.connection.cursor()
+                
+                while True:
+                    rows = read_cursor.fetchmany(self.chunk_size)
+                    if not rows:
+                        break
+                    df = pd.DataFrame.from_records(rows, columns=columns)
+                    facts, rejects, missing = self.map_fact_keys(df)
+                    
+                    metric.rows_in += len(df)
+                    batch = NumpyBatch.from_frame(facts)
+                    metric.rows_out += writer.write(write_cursor, 'Fact_Ventas', batch)
+                    # Mismas filas en el delta que consume sp_Agg_ActualizarCubos
+                    delta_writer.write(write_cursor, 'Fact_Ventas_Delta', batch)
+                    for name, count in missing.items():
+                        missing_totals[name] += count
+                    
+                    if len(rejects):
+                        os.makedirs(self.reject_folder, exist_ok=True)
+                        rejects.to_csv(reject_path, mode='a', index=False,
+                                       header=rejected == 0, encoding='utf-8')
+                        rejected += len(rejects)
+                
+                read_cursor.close()
+                write_cursor.execute("TRUNCATE TABLE INT_Ventas")
+                self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            print(f"Error al cargar Fact_Ventas (modo python): {e}")
+            raise
+        finally:
+            if read_connection is not None:
+                self.pool.release(read_connection)
+        
+        writer.report('Fact_Ventas')
+        print(f"Fact_Ventas: {metric.rows_out} de {metric.rows_in} ventas insertadas.")
+        if rejected:
+            print(f"  {rejected} ventas sin clave en alguna dimensión (no cargadas) → {reject_path}")
+            for name, count in missing_totals.items():
+                if count:
+                    print(f"   - Sin clave en Dim_{name}: {count}")
+        return metric.rows_out
+
+    def prepare_month(self, mes, id_desde):
+        """Armar Fact_Ventas_Stage_AAAAMM de un mes por una conexión propia (corre en un worker)."""
+        connection = None
+        try:
+            with self.metrics.stage('int_to_dw', tabla=f"Fact_Ventas_Stage_{mes:%Y%m}",
+                                    procedimiento='dbo.sp_Fact_PrepararMes') as metric:
+                connection = self.open_connection(metric)
+                cursor = connection.cursor()
+                cursor.execute("EXEC dbo.sp_Fact_PrepararMes @mes = ?, @id_desde = ?", mes, id_desde)
+                metric.rows_out = cursor.fetchone()[0]
+                connection.commit()
+            return metric.rows_out
+        except Exception:
+            if connection is not None:
+                connection.rollback()
+            raise
+        finally:
+            if connection is not None:
+                self.pool.release(connection)
+
+    def load_fact_partitions(self):
+        """
+        Cargar Fact_Ventas por partición mensual: cada mes de INT_Ventas se arma
+        en paralelo en su propia tabla de staging y luego se pasa a la partición
+        con ALTER TABLE ... SWITCH (solo metadata) y agrega sus ventas a las del
+        mes. Con reemplazar_meses solo se cargan esos meses, reemplazando su
+        partición completa; las ventas de INT_Ventas de los demás se descartan.
+        """
+        print("Cargando Fact_Ventas (modo particiones)...")
+        cursor = self.connection.cursor()
+        meses = cursor.execute("""
+            SELECT DATEFROMPARTS(YEAR(FechaVenta), MONTH(FechaVenta), 1) AS Mes, COUNT(*) AS Filas
+            FROM INT_Ventas
+            GROUP BY DATEFROMPARTS(YEAR(FechaVenta), MONTH(FechaVenta), 1)
+            ORDER BY Mes
+        """).fetchall()
+        
+        if not meses:
+            print(" INT_Ventas está vacía: no hay meses para cargar.")
+            return 0
+        
+        if self.replace_months:
+            # Recarga de meses puntuales: stg-to-int vuelve a traer todos los meses del
+            # archivo, pero solo se cargan los de reemplazar_meses (los demás ya están
+            # en Fact_Ventas y agregarlos los duplicaría)
+            omitidas = sum(filas for mes, filas in meses if f"{mes:%Y-%m}" not in self.replace_months)
+            faltantes = self.replace_months - {f"{mes:%Y-%m}" for mes, _ in meses}
+            meses = [(mes, filas) for mes, filas in meses if f"{mes:%Y-%m}" in self.replace_months]
+            if omitidas:
+                print(f" {omitidas} ventas de meses fuera de reemplazar_meses no se cargan")
+            if faltantes:
+                print(f" Meses de reemplazar_meses sin ventas en INT_Ventas (no se tocan): {', '.join(sorted(faltantes))}")
+            if not meses:
+                cursor.execute("TRUNCATE TABLE INT_Ventas")
+                self.connection.commit()
+                return 0
+        
+        try:
+            # 1. Límites de partición de cada mes (cambian la función: en serie)
+            for mes, _ in meses:
+                cursor.execute("EXEC dbo.sp_Fact_AsegurarParticion @mes = ?", mes)
+            self.connection.commit()
+            
+            # Rango de ID_Venta reservado para cada mes a partir del último valor de la
+            # identidad. IDENT_CURRENT no sirve: devuelve la semilla tanto en una tabla
+            # recién creada como después de generar ese primer valor
+            ultimo, semilla = cursor.execute("""
+                SELECT CAST(last_value AS BIGINT), CAST(seed_value AS BIGINT)
+                FROM sys.identity_columns WHERE object_id = OBJECT_ID('Fact_Ventas')
+            """).fetchone()
+            identidad_sin_usar = ultimo is None
+            if identidad_sin_usar:
+                # Tabla nueva o vaciada, o cargada solo con SWITCH (que no usa la identidad)
+                ultimo = cursor.execute("SELECT MAX(ID_Venta) FROM Fact_Ventas").fetchone()[0]
+            id_desde = semilla if ultimo is None else int(ultimo) + 1
+            rangos = []
+            for mes, filas in meses:
+                rangos.append((mes, id_desde))
+                id_desde += filas
+            ultimo_id = id_desde - 1
+        except Exception as e:
+            self.connection.rollback()
+            print(f"Error al preparar las particiones de Fact_Ventas: {e}")
+            raise
+        
+        # 2. Un mes por worker, cada uno con su conexión y su tabla de staging
+        workers = max(1, min(self.max_workers, len(rangos)))
+        print(f" {len(rangos)} meses a cargar, hasta {workers} a la vez")
+        filas_por_mes = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.prepare_month, mes, desde): mes for mes, desde in rangos}
+            for future in as_completed(futures):
+                mes = futures[future]
+                filas_por_mes[mes] = future.result()
+                print(f"  Fact_Ventas {mes:%Y-%m}: {filas_por_mes[mes]} ventas preparadas")
+        
+        # 3. SWITCH de todos los meses en una sola transacción
+        try:
+            with self.metrics.stage('int_to_dw', procedimiento='dbo.sp_Fact_SwitchMes') as metric:
+                metric.rows_in = sum(filas for _, filas in meses)
+                metric.rows_out = sum(filas_por_mes.values())
+                
+                # Las ventas agregadas a meses existentes toman ID_Venta después de los rangos
+                # reservados. Si la identidad nunca generó un valor, el próximo INSERT usa el
+                # valor del RESEED en lugar del siguiente: se reserva uno más
+                reseed = ultimo_id + 1 if identidad_sin_usar else ultimo_id
+                cursor.execute(f"DBCC CHECKIDENT ('Fact_Ventas', RESEED, {reseed})")
+                for mes, _ in rangos:
+                    reemplazar = f"{mes:%Y-%m}" in self.replace_months
+                    cursor.execute("EXEC dbo.sp_Fact_SwitchMes @mes = ?, @reemplazar = ?", mes, reemplazar)
+                
+                cursor.execute("TRUNCATE TABLE INT_Ventas")
+                self.connection.commit()
+        except Exception as e:
+            self.connection.rollback()
+            print(f"Error al pasar los meses a Fact_Ventas: {e}")
+            raise
+        
+        descartadas = metric.rows_in - metric.rows_out
+        print(f"Fact_Ventas: {metric.rows_out} de {metric.rows_in} ventas cargadas en {len(rangos)} particiones.")
+        if descartadas:
+            print(f"  {descartadas} ventas sin clave en alguna dimensión (no cargadas)")
+        return metric.rows_out
+
+    def run_load_dw(self):
+        """Ejecuta la secuencia completa de carga del Data Warehouse. Devuelve True si terminó bien."""
+        print("INICIANDO CARGA DE DATOS AL DATA WAREHOUSE")
+        self.key_cache = None
+        
+        try:
+            self.connect_db()
+
+            for sp in self.execution_sequence:
+                if sp == 'dbo.sp_Fact_CargarVentas':
+                    self.complete_dim_tiempo()
+                    if self.fact_loader == 'python':
+                        self.load_fact_python()
+                        continue
+                    if self.fact_loader == 'particiones':
+                        self.load_fact_partitions()
+                        continue
+                self.execute_stored_procedure(sp)
+
+            print("\n CARGA DEL DATA WAREHOUSE COMPLETADA EXITOSAMENTE!")
+            return True
+            
+        except Exception as e:
+            print(f" El proceso de carga terminó con un error. Verifique logs.")
+            return False
+        finally:
+            if self.connection and self.owns_connection:
+                self.pool.release(self.connection)
+                self.connection = None
+                print(" Conexión a BD devuelta al pool.")
+
+# EJECUCIÓN
+if __name__ == "__main__":
+   
+    loader = ELTDataWarehouseLoader()
+    # Código de salida distinto de 0 si falla, para que el orquestador lo detecte
+    sys.exit(0 if loader.run_load_dw() else 1)
\ No newline at end of file
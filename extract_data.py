@@ -1,151 +1,441 @@
-import pandas as pd
-import pyodbc
-from configparser import ConfigParser
-from datetime import datetime
-import os
-
-class CSVToSQLServer:
-    """
-    Clase para Extracción (E) y Carga (L) de datos CSV a tablas STAGING en SQL Server.
-    """
-    def __init__(self, config_file='config.ini'):
-        self.config = ConfigParser()
-        self.config.optionxform = str
-        
-        #  Verificar que el archivo de configuración exista y se lea
-        if not os.path.exists(config_file) or not self.config.read(config_file):
-            print(f" ERROR: No se pudo leer el archivo de configuración: {config_file}")
-            raise FileNotFoundError(f"Archivo '{config_file}' no encontrado o vacío.")
-
-        self.connection = None
-        self.dataset_folder = 'DATASET'
-        
-        # Definición explícita de columnas del CSV que conincide con las tablas STG
-        self.column_mapping = {
-            'clientes.csv': ['CodCliente', 'RazonSocial', 'Telefono', 'Mail', 'Direccion', 'Localidad', 'Provincia', 'CP'],
-            'productos.csv': ['CodigoProducto', 'Descripcion', 'Categoria', 'Marca', 'PrecioCosto', 'PrecioVentaSugerido'],
-            'tiendas.csv': ['CodigoTienda', 'Descripcion', 'Direccion', 'Localidad', 'Provincia', 'CP', 'TipoTienda'],
-            'ventas.csv': ['FechaVenta', 'CodigoProducto', 'Producto', 'Cantidad', 'PrecioVenta', 'CodigoCliente', 'Cliente', 'CodigoTienda', 'Tienda'],
-            'ventas_add.csv': ['FechaVenta', 'CodigoProducto', 'Producto', 'Cantidad', 'PrecioVenta', 'CodigoCliente', 'Cliente', 'CodigoTienda', 'Tienda']
-        }
-        
-    def connect_db(self):
-        """Conectar a base de datos SQL."""
-        try:
-            
-            server = self.config.get('DATABASE', 'server', fallback='').strip()
-            database = self.config.get('DATABASE', 'database', fallback='').strip()
-            trusted_connection = self.config.get('DATABASE', 'trusted_connection', fallback='').strip()
-            driver = self.config.get('DATABASE', 'driver', fallback='ODBC Driver 17 for SQL Server').strip()
-            
-            # Validación de datos críticos
-            if not all([server, database, trusted_connection]):
-                 raise ValueError("Faltan parámetros críticos (server, database, trusted_connection) en config.ini.")
-            
-            print(f" Conectando a: {server} | BD: {database} usando {driver}")
-            
-            connection_string = (
-                f"DRIVER={{{driver}}};"
-                f"SERVER={server};"
-                f"DATABASE={database};"
-                f"Trusted_Connection={trusted_connection};"
-            )
-            
-            self.connection = pyodbc.connect(connection_string, timeout=10)
-            self.connection.autocommit = False 
-            print(" Conexión exitosa!")
-            
-        except Exception as e:
-            print(f" Error de conexión: {e}")
-            raise
-    
-    def get_csv_path(self, filename):
-        """Obtener ruta completa del archivo CSV en carpeta DATASET"""
-        return os.path.join(self.dataset_folder, filename)
-    
-    def run_etl(self):
-        """Ejecutar proceso de extracción y carga."""
-        print("\n INICIANDO PROCESO DE EXTRACCION Y CARGA")
-        
-        try:
-            # 1. Verificar la carpeta de datos
-            if not os.path.exists(self.dataset_folder):
-                print(f" Carpeta '{self.dataset_folder}' no encontrada. Creala y coloca los CSV.")
-                return
-            
-            print(f" Leyendo archivos desde: {self.dataset_folder}")
-            
-            # 2. Conectar a BD
-            self.connect_db()
-            cursor = self.connection.cursor()
-            cursor.fast_executemany = True # Optimización para inserción masiva
-            
-            # 3. Procesar y Cargar archivos
-            print("\n CARGA DE DATOS...")
-            
-            # Mapeo de archivos CSV a tablas STAGING
-            csv_to_staging = {
-                'clientes.csv': 'STG_Clientes',
-                'productos.csv': 'STG_Productos', 
-                'tiendas.csv': 'STG_Tiendas',
-                'ventas.csv': 'STG_Ventas',
-                'ventas_add.csv': 'STG_Ventas_Add'
-            }
-            
-            for csv_file, table_name in csv_to_staging.items():
-                csv_path = self.get_csv_path(csv_file)
-                
-                if csv_file not in self.column_mapping:
-                    print(f" ERROR interno: Falta mapeo de columnas para {csv_file}")
-                    continue
-                
-                expected_columns = self.column_mapping[csv_file]
-                
-                if os.path.exists(csv_path):
-                    
-                    # header=0 indica que la primera fila es el encabezado.
-                    # names=expected_columns re-nombra las columnas según mapeo STAGING.
-                    df = pd.read_csv(csv_path, usecols=expected_columns) # Solo lee las columnas esperadas
-                    
-                    # Asegura que todas las columnas sean texto y maneja NaN/NULL
-                    df = df.astype(str).fillna('')
-                    
-                    df['Fecha_Carga'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    
-                    # Truncar tabla
-                    cursor.execute(f"TRUNCATE TABLE {table_name}")
-                    
-                    # Insertar datos
-                    # Usa TODAS las columnas del DF, incluyendo Fecha_Carga
-                    columns = ', '.join(df.columns) 
-                    placeholders = ', '.join(['?' for _ in df.columns])
-                    query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-                    
-                    data_to_insert = [tuple(row) for row in df.values]
-                    
-                    cursor.executemany(query, data_to_insert)
-                    print(f" {csv_file} → {table_name} ({len(df)} registros cargados)")
-                else:
-                    print(f" {csv_file} no encontrado en {self.dataset_folder}. Saltando.")
-            
-           
-            self.connection.commit()
-            print("\n COMPLETADO EXITOSAMENTE!")
-            
-        except Exception as e:
-            print(f" ERROR FATAL en el proceso ETL. Haciendo ROLLBACK: {e}")
-            if self.connection:
-                self.connection.rollback()
-        finally:
-            if self.connection:
-                self.connection.close()
-                print(" Conexión cerrada")
-
-
-
-
-# EJECUCIÓN
-if __name__ == "__main__":
-    etl = CSVToSQLServer()
-    etl.run_etl()
+from configparser import ConfigParser
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+from fnmatch import fnmatch
+import glob
+import os
+import sys
+import threading
+import uuid
+from conexion import get_pool
+from watermarks import WatermarkStore, open_byte_range
+from metricas import MetricsRecorder
+# column_buffers, data_quality y dedup (pandas, numpy, pyarrow) se importan al
+# usarse: importar el módulo, p. ej. desde el orquestador, no los carga
+
+# Patrones de archivos de cada tabla STAGING si config.ini no tiene [ARCHIVOS]
+DEFAULT_FILE_PATTERNS = {
+    'STG_Clientes': 'clientes.csv',
+    'STG_Productos': 'productos.csv',
+    'STG_Tiendas': 'tiendas.csv',
+    'STG_Ventas': 'ventas.csv, ventas_[0-9]*.csv',
+    'STG_Ventas_Add': 'ventas_add.csv, ventas_add_*.csv'
+}
+
+
+def new_lote_carga():
+    """Identificador de una ejecución de la carga (como el de metricas.MetricsRecorder)."""
+    return f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+class CSVToSQLServer:
+    """
+    Clase para Extracción (E) y Carga (L) de datos CSV a tablas STAGING en SQL Server.
+    """
+    def __init__(self, config_file='config.ini', config=None, connection=None, metrics=None):
+        # config y connection permiten reutilizar la configuración ya leída y una
+        # conexión abierta cuando el paso se ejecuta dentro del orquestador
+        if config is not None:
+            self.config = config
+        else:
+            self.config = ConfigParser()
+            self.config.optionxform = str
+            
+            #  Verificar que el archivo de configuración exista y se lea
+            if not os.path.exists(config_file) or not self.config.read(config_file):
+                print(f" ERROR: No se pudo leer el archivo de configuración: {config_file}")
+                raise FileNotFoundError(f"Archivo '{config_file}' no encontrado o vacío.")
+
+        self.connection = connection
+        self.owns_connection = connection is None
+        self.dataset_folder = 'DATASET'
+        
+        # Motor de la base ([DATABASE] backend) y pool de conexiones compartido
+        # con los demás pasos que corren en el mismo proceso
+        self.pool = get_pool(self.config)
+        self.backend = self.pool.backend
+        
+        # Métricas por tabla (el orquestador pasa su registro compartido)
+        self.metrics = metrics or MetricsRecorder(self.config, 'extract_data')
+        
+        # Cantidad de filas que se leen, convierten e insertan por bloque
+        self.chunk_size = self.config.getint('ETL', 'chunk_size', fallback=50000)
+        
+        # Lectura e inserción superpuestas: hilo lector con cola de bloques acotada
+        self.pipeline = self.config.getboolean('ETL', 'pipeline', fallback=True)
+        self.pipeline_depth = self.config.getint('ETL', 'pipeline_depth', fallback=2)
+        # Archivos (shards) de una misma tabla leídos a la vez
+        self.shard_workers = self.config.getint('ETL', 'shard_workers', fallback=4)
+        self.metric_lock = threading.Lock()
+        
+        # Carga en paralelo: una conexión y una transacción por tabla STAGING
+        self.parallel = self.config.getboolean('ETL', 'parallel', fallback=False)
+        self.max_workers = self.config.getint('ETL', 'max_workers', fallback=5)
+        if self.parallel and self.backend.embedded:
+            # Los motores embebidos admiten un solo escritor a la vez
+            print(f" Carga paralela no disponible con {self.backend.name}: se cargan las tablas de a una")
+            self.parallel = False
+        
+        # Carga incremental: los archivos que coinciden con los patrones listados
+        # solo cargan las filas nuevas
+        self.incremental = self.config.getboolean('ETL', 'incremental', fallback=False)
+        self.incremental_files = [
+            f.strip() for f in self.config.get('ETL', 'incremental_files', fallback='ventas.csv, ventas_add.csv').split(',') if f.strip()
+        ]
+        self.watermarks = None
+        if self.incremental:
+            self.watermarks = WatermarkStore(self.config.get('ETL', 'watermark_file', fallback='etl_watermarks.json'))
+        
+        # Validación de calidad de ventas durante la extracción: las filas inválidas
+        # van a un archivo de rechazos y los conteos por regla a un resumen JSON
+        self.dq_enabled = self.config.getboolean('DATA_QUALITY', 'enabled', fallback=False)
+        self.dq_tables = [
+            t.strip() for t in self.config.get('DATA_QUALITY', 'tables', fallback='STG_Ventas, STG_Ventas_Add').split(',') if t.strip()
+        ]
+        self.reject_folder = self.config.get('DATA_QUALITY', 'reject_folder', fallback='rechazos')
+        self.validator = None
+        
+        # Descarte de ventas repetidas antes de STAGING (índice de hashes de la clave de INT_Ventas)
+        self.dedup_enabled = self.config.getboolean('DEDUP', 'enabled', fallback=True)
+        self.deduplicator = None
+        
+        # Fecha_Carga y Lote_Carga comunes a todas las tablas de una ejecución.
+        # Lote_Carga identifica el lote de STAGING (clave del perfil de calidad en
+        # DQ_Ventas): a diferencia de Fecha_Carga, no se repite entre dos
+        # ejecuciones del mismo segundo
+        self.fecha_carga = None
+        self.lote_carga = None
+        
+        # Definición explícita de columnas del CSV que conincide con las tablas STG
+        self.column_mapping = {
+            'STG_Clientes': ['CodCliente', 'RazonSocial', 'Telefono', 'Mail', 'Direccion', 'Localidad', 'Provincia', 'CP'],
+            'STG_Productos': ['CodigoProducto', 'Descripcion', 'Categoria', 'Marca', 'PrecioCosto', 'PrecioVentaSugerido'],
+            'STG_Tiendas': ['CodigoTienda', 'Descripcion', 'Direccion', 'Localidad', 'Provincia', 'CP', 'TipoTienda'],
+            'STG_Ventas': ['FechaVenta', 'CodigoProducto', 'Producto', 'Cantidad', 'PrecioVenta', 'CodigoCliente', 'Cliente', 'CodigoTienda', 'Tienda'],
+            'STG_Ventas_Add': ['FechaVenta', 'CodigoProducto', 'Producto', 'Cantidad', 'PrecioVenta', 'CodigoCliente', 'Cliente', 'CodigoTienda', 'Tienda']
+        }
+        
+        # Archivos de cada tabla STAGING: patrones glob relativos a la carpeta de
+        # datos ([ARCHIVOS] en config.ini). La tabla carga todos los archivos que
+        # coinciden, p. ej. los shards diarios ventas_2025-10-17_T03.csv
+        patterns = dict(self.config.items('ARCHIVOS')) if self.config.has_section('ARCHIVOS') else DEFAULT_FILE_PATTERNS
+        self.file_patterns = {
+            table_name: [p.strip() for p in value.split(',') if p.strip()]
+            for table_name, value in patterns.items()
+        }
+        
+    def open_connection(self, metric=None):
+        """Pedir una conexión al pool (reutiliza una libre o abre una nueva); metric cuenta los reintentos."""
+        try:
+            print(f" Conectando a: {self.backend.describe()}")
+            connection = self.pool.acquire(metric)
+            print(" Conexión exitosa!")
+            return connection
+            
+        except Exception as e:
+            print(f" Error de conexión: {e}")
+            raise
+    
+    def connect_db(self):
+        """Conectar a base de datos SQL."""
+        if self.connection and not self.owns_connection:
+            return
+        # La conexión propia se mide como una etapa más, así sus reintentos quedan en las métricas
+        with self.metrics.stage('extract', procedimiento='conexion') as metric:
+            self.connection = self.open_connection(metric)
+    
+    def get_csv_path(self, filename):
+        """Obtener ruta completa del archivo CSV en carpeta DATASET"""
+        return os.path.join(self.dataset_folder, filename)
+    
+    def discover_files(self):
+        """
+        Buscar los archivos de cada tabla según sus patrones. Cada patrón
+        también encuentra sus versiones comprimidas (ventas.csv.gz, .bz2, .zst).
+        Devuelve {tabla: [rutas ordenadas]}; un archivo no puede ser de dos tablas.
+        """
+        from column_buffers import COMPRESSIONS
+        
+        folder = glob.escape(self.dataset_folder)
+        owners = {}
+        files = {}
+        for table_name, patterns in self.file_patterns.items():
+            paths = set()
+            for pattern in patterns:
+                for suffix in [''] + list(COMPRESSIONS):
+                    paths.update(p for p in glob.glob(os.path.join(folder, pattern + suffix)) if os.path.isfile(p))
+            for path in paths:
+                if path in owners:
+                    raise ValueError(f"{path} coincide con los patrones de {owners[path]} y de {table_name}")
+                owners[path] = table_name
+            files[table_name] = sorted(paths)
+        return files
+    
+    def source_name(self, csv_path):
+        """Nombre del archivo que se guarda en Archivo_Origen (relativo a la carpeta de datos)."""
+        return os.path.relpath(csv_path, self.dataset_folder).replace(os.sep, '/')
+    
+    def load_csv_to_staging(self, cursor, csv_paths, table_name, expected_columns, metric=None):
+        """
+        Cargar los CSV (shards) de una tabla STAGING por bloques de chunk_size filas.
+        Los archivos se leen en paralelo (hasta shard_workers a la vez) y sus
+        bloques se insertan por la conexión de la tabla, en una sola transacción.
+        metric: medición de la etapa (metricas.StageMetric) donde contar filas leídas y escritas.
+        """
+        from column_buffers import prefetch_batches
+        
+        fecha_carga = self.fecha_carga or datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        lote_carga = self.lote_carga or new_lote_carga()
+        
+        # Truncar tabla
+        self.backend.truncate(cursor, table_name)
+        
+        # Backend de escritura: el de [ETL] writer en SQL Server, el propio en los embebidos
+        writer = self.backend.create_writer()
+        
+        shards = [self.read_shard(path, table_name, expected_columns, fecha_carga, lote_carga, metric) for path in csv_paths]
+        
+        # Con pipeline, hilos lectores leen y validan los bloques siguientes (de
+        # varios archivos a la vez) mientras se inserta el actual, con como mucho
+        # pipeline_depth bloques en espera
+        if self.pipeline:
+            batches = prefetch_batches(shards, self.pipeline_depth, workers=min(self.shard_workers, len(shards)))
+        else:
+            batches = (batch for shard in shards for batch in shard)
+        
+        total_rows = 0
+        try:
+            with closing(batches):
+                for batch in batches:
+                    # Insertar el bloque y liberarlo antes de tomar el siguiente
+                    total_rows += writer.write(cursor, table_name, batch)
+        finally:
+            for shard in shards:
+                shard.close()
+        
+        writer.report(table_name)
+        return total_rows
+    
+    def read_shard(self, csv_path, table_name, expected_columns, fecha_carga, lote_carga, metric=None):
+        """
+        Bloques de un archivo listos para insertar: validados y con Fecha_Carga,
+        Archivo_Origen y Lote_Carga. En carga incremental solo se lee lo agregado desde la
+        última carga y la nueva marca de agua se registra al terminar el archivo.
+        """
+        from column_buffers import read_csv_batches, read_csv_header
+        
+        # Solo se leen las columnas esperadas, todas como texto y por bloques de
+        # chunk_size filas en columnas (sin tuplas ni strings 'nan' por celda):
+        # los campos vacíos llegan a STAGING como NULL.
+        source = csv_path
+        names = None
+        
+        incremental = self.is_incremental(csv_path)
+        if incremental:
+            start_offset, end_offset = self.watermarks.read_range(csv_path)
+            if start_offset >= end_offset:
+                print(f"   {os.path.basename(csv_path)} sin filas nuevas desde la última carga")
+                self.watermarks.stage(csv_path, end_offset)
+                return
+            if start_offset > 0:
+                # Se retoma a mitad del archivo: el encabezado se toma de la primera línea
+                print(f"   Carga incremental de {os.path.basename(csv_path)} desde el byte {start_offset}")
+                names = read_csv_header(csv_path)
+            source = open_byte_range(csv_path, start_offset, end_offset)
+        
+        file_name = self.source_name(csv_path)
+        try:
+            for batch in read_csv_batches(source, expected_columns, self.chunk_size, names=names):
+                if metric is not None:
+                    with self.metric_lock:
+                        metric.rows_in = (metric.rows_in or 0) + len(batch)
+                if self.validator and table_name in self.dq_tables:
+                    batch = self.validator.validate(batch, os.path.basename(csv_path))
+                if self.deduplicator and self.deduplicator.applies(table_name):
+                    batch = self.deduplicator.filter(batch, table_name)
+                yield (batch.with_constant('Fecha_Carga', fecha_carga)
+                       .with_constant('Archivo_Origen', file_name)
+                       .with_constant('Lote_Carga', lote_carga))
+        finally:
+            if incremental:
+                source.close()
+        
+        if incremental:
+            self.watermarks.stage(csv_path, end_offset)
+    
+    def is_incremental(self, csv_path):
+        """
+        Indica si el archivo se carga de forma incremental (solo filas nuevas).
+        Los comprimidos siempre se cargan completos: sus bytes no se pueden
+        retomar desde una marca a mitad del archivo.
+        """
+        from column_buffers import compression_of
+        
+        return (self.incremental and compression_of(csv_path) is None
+                and any(fnmatch(os.path.basename(csv_path), p) for p in self.incremental_files))
+    
+    def _load_table(self, connection, csv_paths, table_name, expected_columns, connections=None):
+        """
+        Cargar una tabla STAGING usando un cursor propio de la conexión dada. En
+        la carga paralela (connection None) la tabla pide su propia conexión, que
+        queda en connections para el COMMIT o ROLLBACK final.
+        """
+        with self.metrics.stage('extract', tabla=table_name) as metric:
+            if connection is None:
+                connection = connections[table_name] = self.open_connection(metric)
+            cursor = connection.cursor()
+            metric.rows_out = self.load_csv_to_staging(cursor, csv_paths, table_name, expected_columns, metric)
+            return metric.rows_out
+    
+    def load_tables_parallel(self, tasks):
+        """
+        Cargar las tablas STAGING en paralelo, con una conexión y transacción por tabla.
+        Solo se confirman (COMMIT) si todas las tablas cargaron bien; ante un error
+        de carga se revierten (ROLLBACK) todas. Los COMMIT son uno por conexión, así
+        que el todo o nada es de mejor esfuerzo: si falla el COMMIT de una tabla, a
+        las ya confirmadas se les borran las filas de este lote (Lote_Carga) y la
+        extracción falla sin avanzar las marcas de agua ni el índice de ventas.
+        """
+        connections = {}
+        try:
+            errors = []
+            workers = max(1, min(self.max_workers, len(tasks)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(self._load_table, None, csv_paths, table_name, expected_columns, connections): (source, table_name)
+                    for source, table_name, csv_paths, expected_columns in tasks
+                }
+                for future in as_completed(futures):
+                    source, table_name = futures[future]
+                    try:
+                        total_rows = future.result()
+                        print(f" {source} → {table_name} ({total_rows} registros cargados)")
+                    except Exception as e:
+                        print(f" ERROR cargando {source} → {table_name}: {e}")
+                        errors.append(table_name)
+            
+            if errors:
+                raise Exception(f"Fallaron las tablas: {', '.join(errors)}")
+            
+            # Todas las tablas cargaron: confirmar cada transacción
+            committed = []
+            try:
+                for table_name, connection in connections.items():
+                    connection.commit()
+                    committed.append(table_name)
+            except Exception:
+                self._discard_lote(committed, connections)
+                raise
+                
+        except Exception:
+            for connection in connections.values():
+                try:
+                    connection.rollback()
+                except Exception:
+                    pass
+            raise
+        finally:
+            for connection in connections.values():
+                self.pool.release(connection)
+    
+    def _discard_lote(self, tables, connections):
+        """Borrar las filas de este lote de las tablas ya confirmadas (falló el COMMIT de otra)."""
+        for table_name in tables:
+            connection = connections[table_name]
+            try:
+                connection.cursor().execute(f"DELETE FROM {table_name} WHERE Lote_Carga = ?", [self.lote_carga])
+                connection.commit()
+                print(f" {table_name}: filas del lote {self.lote_carga} borradas (falló el COMMIT de otra tabla)")
+            except Exception as e:
+                print(f" ERROR borrando el lote {self.lote_carga} de {table_name}: {e}")
+    
+    def run_etl(self):
+        """Ejecutar proceso de extracción y carga. Devuelve True si terminó bien."""
+        print("\n INICIANDO PROCESO DE EXTRACCION Y CARGA")
+        
+        try:
+            # 1. Verificar la carpeta de datos
+            if not os.path.exists(self.dataset_folder):
+                print(f" Carpeta '{self.dataset_folder}' no encontrada. Creala y coloca los CSV.")
+                return False
+            
+            print(f" Leyendo archivos desde: {self.dataset_folder}")
+            
+            if self.dq_enabled:
+                from data_quality import VentasValidator
+                self.validator = VentasValidator(self.reject_folder)
+            
+            if self.dedup_enabled:
+                from dedup import SalesDeduplicator
+                self.deduplicator = SalesDeduplicator(self.config)
+            
+            self.fecha_carga = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self.lote_carga = new_lote_carga()
+            
+            # 2. Armar la lista de tablas a cargar con los archivos de cada una
+            tasks = []
+            for table_name, csv_paths in self.discover_files().items():
+                if table_name not in self.column_mapping:
+                    print(f" ERROR interno: Falta mapeo de columnas para {table_name}")
+                    continue
+                
+                if not csv_paths:
+                    print(f" Sin archivos {', '.join(self.file_patterns[table_name])} en {self.dataset_folder}. Saltando.")
+                    continue
+                
+                source = os.path.basename(csv_paths[0]) if len(csv_paths) == 1 else f"{len(csv_paths)} archivos"
+                tasks.append((source, table_name, csv_paths, self.column_mapping[table_name]))
+            
+            # 3. Procesar y Cargar archivos
+            print("\n CARGA DE DATOS...")
+            
+            if self.parallel:
+                print(f" Modo paralelo: {len(tasks)} tablas, hasta {self.max_workers} a la vez")
+                self.load_tables_parallel(tasks)
+            else:
+                self.connect_db()
+                for source, table_name, csv_paths, expected_columns in tasks:
+                    total_rows = self._load_table(self.connection, csv_paths, table_name, expected_columns)
+                    print(f" {source} → {table_name} ({total_rows} registros cargados)")
+                
+                self.connection.commit()
+            
+            # Las marcas de agua y el índice de ventas solo avanzan si la carga quedó confirmada
+            if self.watermarks:
+                self.watermarks.commit()
+            
+            if self.deduplicator:
+                self.deduplicator.report()
+                self.deduplicator.commit()
+            
+            if self.validator:
+                self.validator.write_summary()
+            
+            print("\n COMPLETADO EXITOSAMENTE!")
+            return True
+            
+        except Exception as e:
+            print(f" ERROR FATAL en el proceso ETL. Haciendo ROLLBACK: {e}")
+            if self.watermarks:
+                self.watermarks.discard()
+            if self.validator:
+                self.validator.discard_summary()
+            if self.connection:
+                self.connection.rollback()
+            return False
+        finally:
+            if self.connection and self.owns_connection:
+                self.pool.release(self.connection)
+                self.connection = None
+                print(" Conexión devuelta al pool")
+
+
+
+
+# EJECUCIÓN
+if __name__ == "__main__":
+    etl = CSVToSQLServer()
+    # Código de salida distinto de 0 si falla, para que el orquestador lo detecte
+    sys.exit(0 if etl.run_etl() else 1)
     
\ No newline at end of file
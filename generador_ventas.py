@@ -0,0 +1,229 @@
+"""
+Generador vectorizado de ventas sintéticas.
+
+Genera las ventas con arreglos NumPy por bloques de días en lugar de un
+diccionario por venta. El trabajo se reparte por año entre procesos, cada uno
+con una semilla derivada de (semilla, año), así el resultado es el mismo sin
+importar la cantidad de procesos. Cada proceso escribe sus filas ya ordenadas
+en archivos parciales, que luego se concatenan en ventas.csv y ventas_add.csv
+sin ordenar todo en memoria.
+"""
+
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# pyarrow es opcional: si está instalado los bloques se escriben con el writer
+# CSV de Arrow (en C++); si no, con DataFrame.to_csv de pandas.
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+    pa_csv = None
+
+
+SALES_HEADERS = [
+    "FechaVenta", "CodigoProducto", "Producto", "Cantidad", "PrecioVenta",
+    "CodigoCliente", "Cliente", "CodigoTienda", "Tienda"
+]
+
+# Horario de 9hs a 20hs, en segundos desde el inicio del día
+OPENING_SECONDS = 9 * 3600
+CLOSING_SECONDS = 20 * 3600
+
+# Filas por bloque que arma cada proceso antes de escribirlo (memoria acotada)
+BLOCK_ROWS = 1000000
+
+
+def workdays(start_date, end_date):
+    """Días laborables (Lunes a Viernes) entre start_date y end_date como datetime64[D]."""
+    days = np.arange(np.datetime64(start_date.date()), np.datetime64(end_date.date()) + 1, dtype='datetime64[D]')
+    return days[np.is_busday(days)]
+
+
+def daily_counts(num_days, rng, num_rows=None):
+    """
+    Transacciones por día: entre 15 y 45 (variabilidad para patrones).
+    Con num_rows se reescalan para que sumen exactamente num_rows.
+    """
+    counts = rng.integers(15, 46, num_days).astype(np.int64)
+    if num_rows is not None:
+        total = counts.sum()
+        counts = counts * num_rows // total
+        counts[:num_rows - counts.sum()] += 1
+    return counts
+
+
+def _needs_quoting(values):
+    return any(c in str(v) for v in values for c in ',"\r\n')
+
+
+def _dimension_column(values, codes):
+    """Columna de texto a partir de índices; categórica si los valores no se repiten."""
+    if pa is not None:
+        return pa.DictionaryArray.from_arrays(pa.array(codes.astype(np.int32)), pa.array(values))
+    if len(set(values)) == len(values):
+        return pd.Categorical.from_codes(codes, categories=values)
+    return np.asarray(values, dtype=object)[codes]
+
+
+def _write_block(binary_file, columns, quoting):
+    """Escribir un bloque de columnas como CSV sin encabezado (fechas y precio con 2 decimales)."""
+    if pa is not None:
+        table = pa.table({
+            name: (pa.array(np.round(values, 2)).cast(pa.decimal128(18, 2), safe=False)
+                   if name == "PrecioVenta" else values)
+            for name, values in columns.items()
+        })
+        pa_csv.write_csv(table, binary_file, write_options=pa_csv.WriteOptions(
+            include_header=False, quoting_style='needed' if quoting else 'none'
+        ))
+    else:
+        text = pd.DataFrame(columns, columns=SALES_HEADERS).to_csv(
+            header=False, index=False, lineterminator='\n',
+            date_format='%Y-%m-%d %H:%M:%S', float_format='%.2f'
+        )
+        binary_file.write(text.encode('utf-8'))
+
+
+def _slice(columns, start, end):
+    return {name: values[start:end] for name, values in columns.items()}
+
+
+def _day_blocks(counts, block_rows):
+    """Rangos [inicio, fin) de días consecutivos con hasta block_rows filas cada uno."""
+    start = 0
+    rows = 0
+    for i, count in enumerate(counts):
+        rows += count
+        if rows >= block_rows:
+            yield start, i + 1
+            start = i + 1
+            rows = 0
+    if start < len(counts):
+        yield start, len(counts)
+
+
+def _generate_year(task):
+    """
+    Generar las ventas de un año (se ejecuta en un proceso aparte).
+    Escribe dos archivos parciales sin encabezado: antes y desde split_date.
+    """
+    year, days, counts, seed, dims, split_date, part_main, part_add, block_rows = task
+    rng = np.random.default_rng([seed, year])
+
+    client_codes, client_names, product_codes, product_names, product_prices, store_codes, store_names = dims
+    product_prices = np.asarray(product_prices, dtype=float)
+    split = np.datetime64(split_date, 's')
+
+    # Las comillas solo se usan si algún texto de las dimensiones las necesita
+    quoting = any(_needs_quoting(values) for values in (client_names, product_names, store_names))
+
+    rows_main = rows_add = 0
+    with open(part_main, 'wb') as f_main, open(part_add, 'wb') as f_add:
+        for start, end in _day_blocks(counts, block_rows):
+            n = int(counts[start:end].sum())
+            if not n:
+                continue
+
+            # Fecha y hora: los días del bloque son consecutivos, así que alcanza
+            # con ordenar el bloque para que el archivo quede ordenado
+            seconds = rng.integers(OPENING_SECONDS, CLOSING_SECONDS, n).astype('timedelta64[s]')
+            fechas = np.repeat(days[start:end], counts[start:end]).astype('datetime64[s]') + seconds
+            fechas.sort()
+
+            # Seleccionar dimensiones aleatorias
+            producto = rng.integers(0, len(product_codes), n)
+            cliente = rng.integers(0, len(client_codes), n)
+            tienda = rng.integers(0, len(store_codes), n)
+
+            # Cantidad vendida y precio de venta con variación de +-5% sobre el sugerido
+            cantidad = rng.integers(1, 6, n)
+            precio = product_prices[producto] * rng.uniform(0.95, 1.05, n) * cantidad
+
+            columns = {
+                "FechaVenta": fechas,
+                "CodigoProducto": _dimension_column(product_codes, producto),
+                "Producto": _dimension_column(product_names, producto),
+                "Cantidad": cantidad,
+                "PrecioVenta": precio,
+                "CodigoCliente": _dimension_column(client_codes, cliente),
+                "Cliente": _dimension_column(client_names, cliente),
+                "CodigoTienda": _dimension_column(store_codes, tienda),
+                "Tienda": _dimension_column(store_names, tienda)
+            }
+
+            # Bloque ordenado: las ventas desde split_date van a ventas_add.csv
+            k = int(np.searchsorted(fechas, split))
+            if k:
+                _write_block(f_main, _slice(columns, 0, k), quoting)
+            if k < n:
+                _write_block(f_add, _slice(columns, k, n), quoting)
+            rows_main += k
+            rows_add += n - k
+
+    return year, rows_main, rows_add
+
+
+def _concat(out_path, part_paths):
+    """Escribir el encabezado y concatenar los archivos parciales en orden."""
+    with open(out_path, 'wb') as out:
+        out.write((','.join(SALES_HEADERS) + '\n').encode('utf-8'))
+        for part in part_paths:
+            with open(part, 'rb') as f:
+                shutil.copyfileobj(f, out, 1 << 20)
+            os.remove(part)
+
+
+def generate_sales_files(clientes, productos, tiendas, start_date, end_date, split_date, out_dir,
+                         num_rows=None, seed=None, processes=None, block_rows=BLOCK_ROWS):
+    """
+    Generar ventas.csv (antes de split_date) y ventas_add.csv (desde split_date).
+    clientes, productos y tiendas son las listas de diccionarios de las dimensiones.
+    Devuelve (filas en ventas.csv, filas en ventas_add.csv).
+    """
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % (2 ** 32))
+
+    dims = (
+        [c['CodCliente'] for c in clientes],
+        [c['RazonSocial'] for c in clientes],
+        [p['CodigoProducto'] for p in productos],
+        [p['Descripcion'] for p in productos],
+        [float(p['PrecioVentaSugerido']) for p in productos],
+        [t['CodigoTienda'] for t in tiendas],
+        [t['Descripcion'] for t in tiendas]
+    )
+
+    days = workdays(start_date, end_date)
+    counts = daily_counts(len(days), np.random.default_rng(seed), num_rows)
+    years = days.astype('datetime64[Y]').astype(int) + 1970
+
+    tasks = []
+    for year in np.unique(years):
+        in_year = years == year
+        tasks.append((
+            int(year), days[in_year], counts[in_year], seed, dims, split_date,
+            os.path.join(out_dir, f".ventas_{year}.part"),
+            os.path.join(out_dir, f".ventas_add_{year}.part"),
+            block_rows
+        ))
+
+    workers = max(1, min(processes or os.cpu_count() or 1, len(tasks)))
+    if workers == 1:
+        results = [_generate_year(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_generate_year, tasks))
+
+    # Los años se concatenan en orden: los archivos quedan ordenados por fecha
+    _concat(os.path.join(out_dir, 'ventas.csv'), [task[6] for task in tasks])
+    _concat(os.path.join(out_dir, 'ventas_add.csv'), [task[7] for task in tasks])
+
+    rows_main = sum(r[1] for r in results)
+    rows_add = sum(r[2] for r in results)
+    return rows_main, rows_add
@@ -0,0 +1,191 @@
+"""
+Métricas de rendimiento por etapa del ETL.
+
+Cada etapa, tabla o stored procedure medido registra: tiempo, filas de entrada
+y salida, filas/s, pico de memoria (RSS), reintentos y estado. Los registros se
+agregan a un archivo JSON lines y se vuelcan como textfile de Prometheus (para
+el textfile collector de node_exporter), de modo de poder graficar y alertar
+sobre caídas de rendimiento.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+
+# psutil es opcional: permite medir el pico de RSS de cada etapa. Sin psutil
+# se usa resource (pico del proceso completo, no disponible en Windows).
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class PeakMemory:
+    """Pico de memoria residente (RSS) mientras dura el bloque with."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        process = psutil.Process()
+        while not self._stop.is_set():
+            self.peak = max(self.peak, process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if psutil is not None:
+            self.peak = psutil.Process().memory_info().rss
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, psutil.Process().memory_info().rss)
+        elif resource is not None:
+            # ru_maxrss está en KB en Linux y en bytes en macOS
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak = maxrss if sys.platform == 'darwin' else maxrss * 1024
+        return False
+
+    @property
+    def peak_mb(self):
+        return round(self.peak / (1024 * 1024), 1) if self.peak else None
+
+
+class StageMetric:
+    """
+    Medición de una etapa, usada como context manager:
+
+        with metrics.stage('extract', tabla='STG_Ventas') as m:
+            m.rows_in += ...
+            m.rows_out += ...
+
+    Si el bloque lanza una excepción la etapa se registra con estado 'error'.
+    """
+
+    def __init__(self, recorder, stage, tabla=None, procedimiento=None):
+        self.recorder = recorder
+        self.stage = stage
+        self.tabla = tabla
+        self.procedimiento = procedimiento
+        self.rows_in = None
+        self.rows_out = None
+        self.retries = 0
+        self._memory = PeakMemory()
+        self._start = None
+
+    def __enter__(self):
+        self._memory.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._start
+        self._memory.__exit__(exc_type, exc, tb)
+
+        rows = self.rows_out if self.rows_out is not None else self.rows_in
+        self.recorder.record({
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'ejecucion': self.recorder.run_id,
+            'origen': self.recorder.origin,
+            'etapa': self.stage,
+            'tabla': self.tabla,
+            'procedimiento': self.procedimiento,
+            'segundos': round(seconds, 3),
+            'filas_entrada': self.rows_in,
+            'filas_salida': self.rows_out,
+            'filas_por_segundo': round(rows / seconds, 1) if rows is not None and seconds > 0 else None,
+            'rss_pico_bytes': self._memory.peak or None,
+            'reintentos': self.retries,
+            'estado': 'error' if exc_type else 'ok',
+            'error': str(exc) if exc is not None else None
+        })
+        return False
+
+
+# Series del textfile de Prometheus: nombre, campo del registro y descripción
+PROMETHEUS_SERIES = [
+    ('etl_etapa_duracion_segundos', 'segundos', 'Duración de la última ejecución de la etapa'),
+    ('etl_etapa_filas_entrada', 'filas_entrada', 'Filas leídas por la etapa'),
+    ('etl_etapa_filas_salida', 'filas_salida', 'Filas escritas por la etapa'),
+    ('etl_etapa_filas_por_segundo', 'filas_por_segundo', 'Filas procesadas por segundo'),
+    ('etl_etapa_rss_pico_bytes', 'rss_pico_bytes', 'Pico de memoria residente durante la etapa'),
+    ('etl_etapa_reintentos', 'reintentos', 'Reintentos de la etapa'),
+    ('etl_etapa_exito', 'exito', '1 si la última ejecución de la etapa terminó bien'),
+    ('etl_etapa_ultima_ejecucion_timestamp_segundos', 'epoch', 'Momento en que terminó la etapa (epoch)'),
+]
+
+
+def _label_value(value):
+    return str(value or '').replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsRecorder:
+    """
+    Registro compartido de métricas de un proceso del ETL.
+    origin identifica quién escribe (orquestador, extract_data, ...): cada
+    origen vuelca su propio archivo <origin>.prom en prometheus_folder.
+    """
+
+    def __init__(self, config, origin):
+        self.enabled = config.getboolean('METRICAS', 'enabled', fallback=True)
+        self.jsonl_file = config.get('METRICAS', 'jsonl_file', fallback=os.path.join('metricas', 'etl_metricas.jsonl'))
+        self.prometheus_folder = config.get('METRICAS', 'prometheus_folder', fallback='metricas')
+        self.origin = origin
+        self.run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.lock = threading.Lock()
+        self.latest = {}
+
+    def stage(self, stage, tabla=None, procedimiento=None):
+        """Medir una etapa (ver StageMetric)."""
+        return StageMetric(self, stage, tabla=tabla, procedimiento=procedimiento)
+
+    def record(self, entry):
+        """Agregar un registro al JSON lines y actualizar el textfile de Prometheus."""
+        if not self.enabled:
+            return
+        with self.lock:
+            folder = os.path.dirname(self.jsonl_file)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(self.jsonl_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+            key = (entry['etapa'], entry['tabla'], entry['procedimiento'])
+            self.latest[key] = dict(entry, exito=1 if entry['estado'] == 'ok' else 0, epoch=int(time.time()))
+            self._write_prometheus()
+
+    def _write_prometheus(self):
+        """Volcar el último valor de cada serie (escritura atómica, como pide el textfile collector)."""
+        os.makedirs(self.prometheus_folder, exist_ok=True)
+        lines = []
+        for name, field, description in PROMETHEUS_SERIES:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} gauge")
+            for (etapa, tabla, procedimiento), entry in self.latest.items():
+                if entry.get(field) is None:
+                    continue
+                labels = (f'origen="{_label_value(self.origin)}",etapa="{_label_value(etapa)}",'
+                          f'tabla="{_label_value(tabla)}",procedimiento="{_label_value(procedimiento)}"')
+                lines.append(f"{name}{{{labels}}} {entry[field]}")
+
+        path = os.path.join(self.prometheus_folder, f"{self.origin}.prom")
+        tmp_file = f"{path}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_file, path)
@@ -1,340 +1,628 @@
-"""
-==============================================
-ORQUESTADOR MAESTRO - DATA WAREHOUSE
-==============================================
-Ejecuta todos los scripts en el orden correcto:
-1. SQLQuerySTAGING.sql - Crea tablas STAGING
-2. SQLQueryINT.sql - Crea tablas INT
-3. SQLQueryCreateDW.sql - Crea tablas DW (Dimensiones y Fact)
-4. SQLQueryStoreProcedures.sql - Crea Stored Procedures
-5. extract_data.py - Extrae CSV -> STAGING
-6. load_STG_to_INT.py - Carga STAGING -> INT
-7. dw_loader.py - Carga INT -> DW
-"""
-
-import pyodbc
-from configparser import ConfigParser
-import os
-import sys
-import subprocess
-from datetime import datetime
-
-# Configura codificación UTF-8 para la consola
-import io
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
-sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
-os.system('chcp 65001 >nul 2>&1')
-
-class DWMasterOrchestrator:
-    def __init__(self, config_file='config.ini'):
-        self.config = ConfigParser()
-        self.config.optionxform = str
-        
-        # Verifica si el archivo existe 
-        if not os.path.exists(config_file):
-            current_dir = os.path.abspath('.')
-            raise FileNotFoundError(f"Archivo '{config_file}' no encontrado en: {current_dir}")
-        
-        # Intenta leer el archivo
-        try:
-            files_read = self.config.read(config_file, encoding='utf-8')
-            if not files_read:
-                raise Exception(f"No se pudo leer el archivo '{config_file}'")
-            
-            # Verificar que tenga las secciones necesarias
-            if not self.config.has_section('DATABASE'):
-                raise Exception("El archivo config.ini no tiene la sección [DATABASE]")
-                
-        except Exception as e:
-            raise Exception(f"Error leyendo config.ini: {e}")
-        
-        self.connection = None
-        
-        # Define rutas de archivos
-        self.sql_files = [
-            'SQLQuerySTAGING.sql',
-            'SQLQueryINT.sql',
-            'SQLQueryCreateDW.sql',
-            'SQLQueryStoreProcedures.sql'
-        ]
-        
-        self.python_scripts = [
-            'extract_data.py',
-            'load_STG_to_INT.py',
-            'dw_loader.py'
-        ]
-        
-    def log(self, message, level="INFO"):
-        """Log con timestamp"""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        prefix = {
-            "INFO": "INFO |",
-            "SUCCESS": "OK |",
-            "ERROR": "ERROR |",
-            "WARNING": "WARN |",
-            "PROCESS": "PROC |",
-            "STEP": "STEP |"
-        }.get(level, "")
-        
-        separator = "=" * 60
-        if level == "STEP":
-            print(f"\n{separator}")
-            print(f"[{timestamp}] {prefix} {message}")
-            print(f"{separator}")
-        else:
-            print(f"[{timestamp}] {prefix} {message}")
-    
-    def connect_db(self):
-        """Conectar a SQL Server"""
-        try:
-            server = self.config.get('DATABASE', 'server').strip()
-            database = self.config.get('DATABASE', 'database').strip()
-            trusted_connection = self.config.get('DATABASE', 'trusted_connection').strip()
-            driver = self.config.get('DATABASE', 'driver', fallback='ODBC Driver 17 for SQL Server').strip()
-            
-            self.log(f"Conectando a {server} | BD: {database}", "PROCESS")
-            
-            connection_string = (
-                f"DRIVER={{{driver}}};"
-                f"SERVER={server};"
-                f"DATABASE={database};"
-                f"Trusted_Connection={trusted_connection};"
-            )
-            
-            self.connection = pyodbc.connect(connection_string, timeout=30)
-            self.connection.autocommit = False
-            self.log("Conexión exitosa a SQL Server", "SUCCESS")
-            
-        except Exception as e:
-            self.log(f"Error de conexión: {e}", "ERROR")
-            raise
-    
-    def execute_sql_file(self, sql_file):
-        """Ejecutar archivo SQL completo"""
-        self.log(f"Ejecutando archivo SQL: {sql_file}", "PROCESS")
-        
-        if not os.path.exists(sql_file):
-            self.log(f"Archivo no encontrado: {sql_file}", "ERROR")
-            raise FileNotFoundError(f"No se encontró el archivo: {sql_file}")
-        
-        try:
-            # Intentar leer con diferentes codificaciones por si acaso
-            sql_content = None
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1', 'utf-8-sig']
-            
-            for encoding in encodings:
-                try:
-                    with open(sql_file, 'r', encoding=encoding) as f:
-                        sql_content = f.read()
-                    self.log(f"Archivo leído con codificación: {encoding}", "INFO")
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if sql_content is None:
-                raise Exception(f"No se pudo leer el archivo con ninguna codificación estándar")
-            
-            # Dividir por GO (separador de lotes en SQL Server) y Usar split case-insensitive
-            import re
-            batches = re.split(r'\bGO\b', sql_content, flags=re.IGNORECASE)
-            
-            cursor = self.connection.cursor()
-            batch_count = 0
-            
-            for batch in batches:
-                batch = batch.strip()
-                if batch:  # Solo ejecutar si hay contenido
-                    try:
-                        cursor.execute(batch)
-                        self.connection.commit()
-                        batch_count += 1
-                    except Exception as e:
-                        self.log(f"Error en lote {batch_count + 1}: {str(e)[:200]}", "WARNING")
-                        self.connection.rollback()
-                        # Continuar con el siguiente lote
-                        continue
-            
-            self.log(f"{sql_file} ejecutado exitosamente ({batch_count} lotes)", "SUCCESS")
-            
-        except Exception as e:
-            self.log(f"Error ejecutando {sql_file}: {e}", "ERROR")
-            self.connection.rollback()
-            raise
-    
-    def execute_python_script(self, script_name):
-        """Ejecutar script Python"""
-        self.log(f"Ejecutando script Python: {script_name}", "PROCESS")
-    
-        try:
-            env = os.environ.copy()
-            env['PYTHONIOENCODING'] = 'utf-8'
-            env['PYTHONUTF8'] = '1'
-        
-            # Ejecutar sin capturar output (o capturar pero no mostrar todo)
-            result = subprocess.run(
-                [sys.executable, script_name],
-                capture_output=False,
-                text=True,
-                encoding='utf-8',
-                errors='replace',
-                env=env
-            )
-        
-            # Solo mostrarmuestra errores si los hay
-            if result.returncode != 0:
-                self.log(f"Error ejecutando {script_name} (código: {result.returncode})", "ERROR")
-                raise Exception(f"El script {script_name} falló con código {result.returncode}")
-        
-            self.log(f"{script_name} ejecutado exitosamente", "SUCCESS")
-        
-        except Exception as e:
-            self.log(f"Error ejecutando {script_name}: {e}", "ERROR")
-            raise
-    
-    def verify_files(self):
-        """Verificar que todos los archivos necesarios existan"""
-        self.log("Verificando archivos necesarios...", "PROCESS")
-        
-        missing_files = []
-        
-        # Verificar archivos de SQL
-        for sql_file in self.sql_files:
-            if os.path.exists(sql_file):
-                self.log(f"   {sql_file}", "INFO") 
-            else:
-                self.log(f"   {sql_file} NO ENCONTRADO", "ERROR") 
-                missing_files.append(sql_file)
-        
-        # Verificar scripts de Python
-        for py_script in self.python_scripts:
-            if os.path.exists(py_script):
-                self.log(f"   {py_script}", "INFO") 
-            else:
-                self.log(f"   {py_script} NO ENCONTRADO", "ERROR") 
-                missing_files.append(py_script)
-        
-        # Verificar archivo config.ini
-        if os.path.exists('config.ini'):
-            self.log(f"   config.ini", "INFO") 
-            
-            # Verificar contenido básico
-            try:
-                with open('config.ini', 'r', encoding='utf-8') as f:
-                    content = f.read()
-                if '[DATABASE]' in content:
-                    self.log(f"   config.ini tiene sección [DATABASE]", "INFO") 
-                else:
-                    self.log(f"   config.ini NO tiene sección [DATABASE]", "WARNING") 
-            except Exception as e:
-                self.log(f"   Error leyendo config.ini: {e}", "WARNING") 
-        else:
-            self.log(f"   config.ini NO ENCONTRADO", "ERROR") 
-            missing_files.append('config.ini')
-        
-        if missing_files:
-            self.log(f"Faltan {len(missing_files)} archivo(s)", "ERROR")
-            raise FileNotFoundError(f"Archivos faltantes: {', '.join(missing_files)}")
-        
-        self.log("Todos los archivos verificados correctamente", "SUCCESS")         
-    
-    def run(self):
-        """Ejecutar todo el proceso de orquestación"""
-        try:
-            print("\n" + "=" * 60)
-            print("          INICIANDO ORQUESTACIÓN DEL DATA WAREHOUSE")
-            print("=" * 60 + "\n")
-            
-            # Diagnóstico inicial
-            self.log("DIAGNÓSTICO INICIAL", "STEP")
-            current_dir = os.path.abspath('.')
-            self.log(f"Directorio de trabajo: {current_dir}", "INFO")
-            
-            # Verificar archivos
-            self.log("PASO 0: VERIFICACIÓN DE ARCHIVOS", "STEP")
-            self.verify_files()
-            
-            # Conectar a BD
-            self.log("PASO 1: CONEXIÓN A BASE DE DATOS", "STEP")
-            self.connect_db()
-            
-            # Ejecutar scripts SQL para crear tablas y SPs
-            self.log("PASO 2: CREACIÓN DE ESTRUCTURA (Tablas y SPs)", "STEP")
-            
-            for i, sql_file in enumerate(self.sql_files, 1):
-                self.log(f"2.{i} - Ejecutando {sql_file}", "INFO")
-                self.execute_sql_file(sql_file)
-            
-            # Cerrar conexión antes de ejecutar scripts Python
-            if self.connection:
-                self.connection.close()
-                self.log("Conexión a BD cerrada", "INFO")
-            
-            # Ejecutar scripts Python 
-            self.log("PASO 3: EJECUCIÓN DE PROCESOS ETL", "STEP")
-            
-            for i, py_script in enumerate(self.python_scripts, 1):
-                self.log(f"3.{i} - Ejecutando {py_script}", "INFO")
-                self.execute_python_script(py_script)
-            
-            # Finalización exitosa
-            print("\n" + "=" * 60)
-            print("        ORQUESTACIÓN COMPLETADA EXITOSAMENTE")
-            print("=" * 60)
-            print("\n Resumen:")
-            print(f"    Archivos SQL ejecutados: {len(self.sql_files)}")
-            print(f"    Scripts Python ejecutados: {len(self.python_scripts)}")
-            print(f"    Estado: COMPLETADO")
-            print("\n" + "=" * 60 + "\n")
-            
-        except Exception as e:
-            print("\n" + "=" * 60)
-            print("           ORQUESTACIÓN FALLIDA")
-            print("=" * 60)
-            print(f"\n Error: {e}")
-            print("\n🔍 Revisa los logs anteriores para más detalles.")
-            print("=" * 60 + "\n")
-            sys.exit(1)
-        
-        finally:
-            if self.connection:
-                try:
-                    self.connection.close()
-                    self.log("Conexión final cerrada", "INFO")
-                except:
-                    pass
-
-
-
-if __name__ == "__main__":
-    print("""
-    ╔══════════════════════════════════════════════════════════╗
-    ║         ORQUESTADOR MAESTRO - DATA WAREHOUSE             ║
-    ╚══════════════════════════════════════════════════════════╝
-    """)
-    
-    try:
-        # Cambia al directorio del script
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        os.chdir(script_dir)
-        
-        print(" Ejecutando diagnóstico inicial...")
-        current_dir = os.path.abspath('.')
-        print(f" Directorio actual: {current_dir}")
-        print(f" Archivos encontrados:")
-        files = [f for f in os.listdir('.') if f.endswith(('.py', '.sql', '.ini'))]
-        for file in files:
-            print(f"   - {file}")
-        
-        orchestrator = DWMasterOrchestrator()
-        orchestrator.run()
-        
-    except FileNotFoundError as e:
-        print(f"\n ERROR DE ARCHIVO: {e}")
-        print(f" Asegúrate de que todos los archivos estén en: {os.path.abspath('.')}")
-        sys.exit(1)
-    except KeyboardInterrupt:
-        print("\n\n Proceso interrumpido por el usuario")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n\n Error fatal: {e}")
+"""
+==============================================
+ORQUESTADOR MAESTRO - DATA WAREHOUSE
+==============================================
+Ejecuta todos los scripts respetando sus dependencias:
+1. SQLQuerySTAGING.sql - Crea tablas STAGING
+2. SQLQueryINT.sql - Crea tablas INT
+3. SQLQueryCreateDW.sql - Crea tablas DW (Dimensiones y Fact)
+4. SQLQueryStoreProcedures.sql - Crea Stored Procedures (después de 1, 2 y 3)
+5. extract_data.py - Extrae CSV -> STAGING (después de 1)
+6. load_STG_to_INT.py - Carga STAGING -> INT (después de 4 y 5)
+7. dw_loader.py - Carga INT -> DW (después de 6)
+8. parquet_export.py - Exporta el esquema estrella a Parquet (después de 7)
+
+Los pasos independientes se ejecutan en paralelo. Los pasos completados se
+registran en un archivo de checkpoint; con --resume se saltean. Los scripts
+SQL que no cambiaron desde el último despliegue (Deploy_Ledger) no se vuelven
+a ejecutar; con --redeploy se ejecutan todos. En carga incremental
+([ETL] incremental = yes) el DW se conserva entre corridas: SQLQueryCreateDW.sql
+solo se ejecuta cuando hay que reconstruirlo (ver plan_dw_rebuild).
+
+Los pasos Python se ejecutan dentro del mismo proceso, compartiendo la
+configuración y la conexión; todas las conexiones salen de un pool compartido
+(conexion.py) que las reutiliza y reintenta los cortes transitorios. Con un
+motor embebido ([DATABASE] backend = sqlite o duckdb, ver backends.py) los
+scripts SQL se reemplazan por las tablas equivalentes y los procedures
+portados. Uso:
+    python orquestador.py [all|extract|stg-to-int|dw-load|parquet-export] [--resume] [--redeploy]
+"""
+
+from configparser import ConfigParser
+import os
+import sys
+import json
+import importlib
+from conexion import get_pool
+from metricas import MetricsRecorder
+from sql_batches import read_sql_file, split_batches, checksum, is_session_batch, used_database, DeployLedger
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+# Configura codificación UTF-8 para la consola
+import io
+sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+if os.name == 'nt':
+    os.system('chcp 65001 >nul 2>&1')
+
+class DWMasterOrchestrator:
+    def __init__(self, config_file='config.ini'):
+        self.config = ConfigParser()
+        self.config.optionxform = str
+        
+        # Verifica si el archivo existe 
+        if not os.path.exists(config_file):
+            current_dir = os.path.abspath('.')
+            raise FileNotFoundError(f"Archivo '{config_file}' no encontrado en: {current_dir}")
+        
+        # Intenta leer el archivo
+        try:
+            files_read = self.config.read(config_file, encoding='utf-8')
+            if not files_read:
+                raise Exception(f"No se pudo leer el archivo '{config_file}'")
+            
+            # Verificar que tenga las secciones necesarias
+            if not self.config.has_section('DATABASE'):
+                raise Exception("El archivo config.ini no tiene la sección [DATABASE]")
+                
+        except Exception as e:
+            raise Exception(f"Error leyendo config.ini: {e}")
+        
+        self.connection = None
+        
+        # Motor de la base ([DATABASE] backend). Con los embebidos (sqlite, duckdb)
+        # los scripts T-SQL no se ejecutan: el motor crea las tablas equivalentes
+        self.pool = get_pool(self.config)
+        self.backend = self.pool.backend
+        
+        # Define rutas de archivos
+        self.sql_files = [
+            'SQLQuerySTAGING.sql',
+            'SQLQueryINT.sql',
+            'SQLQueryCreateDW.sql',
+            'SQLQueryStoreProcedures.sql'
+        ]
+        
+        self.python_scripts = [
+            'extract_data.py',
+            'load_STG_to_INT.py',
+            'dw_loader.py',
+            'parquet_export.py'
+        ]
+        
+        # Grafo del pipeline: cada paso indica de qué pasos depende
+        self.pipeline = {
+            'SQLQuerySTAGING.sql': [],
+            'SQLQueryINT.sql': [],
+            'SQLQueryCreateDW.sql': [],
+            'SQLQueryStoreProcedures.sql': ['SQLQuerySTAGING.sql', 'SQLQueryINT.sql', 'SQLQueryCreateDW.sql'],
+            'extract_data.py': ['SQLQuerySTAGING.sql'],
+            'load_STG_to_INT.py': ['extract_data.py', 'SQLQueryStoreProcedures.sql'],
+            'dw_loader.py': ['load_STG_to_INT.py'],
+            'parquet_export.py': ['dw_loader.py']
+        }
+        
+        # Pasos Python: módulo, clase y método que se ejecutan en el mismo proceso
+        self.python_steps = {
+            'extract_data.py': ('extract_data', 'CSVToSQLServer', 'run_etl'),
+            'load_STG_to_INT.py': ('load_STG_to_INT', 'DWLoader', 'run'),
+            'dw_loader.py': ('dw_loader', 'ELTDataWarehouseLoader', 'run_load_dw'),
+            'parquet_export.py': ('parquet_export', 'ParquetExporter', 'run_export')
+        }
+        
+        # Comandos de línea de comandos para ejecutar un solo paso
+        self.commands = {
+            'extract': 'extract_data.py',
+            'stg-to-int': 'load_STG_to_INT.py',
+            'dw-load': 'dw_loader.py',
+            'parquet-export': 'parquet_export.py'
+        }
+        
+        self.max_workers = self.config.getint('ORQUESTADOR', 'max_workers', fallback=4)
+        self.checkpoint_file = self.config.get('ORQUESTADOR', 'checkpoint_file', fallback='orquestador_checkpoint.json')
+        self.checkpoint_lock = threading.Lock()
+        self.connection_lock = threading.Lock()
+        
+        # Métricas por paso (JSON lines y textfile de Prometheus), compartidas con los pasos Python
+        self.metrics = MetricsRecorder(self.config, 'orquestador')
+        
+        # Registro de despliegues (Deploy_Ledger): los scripts SQL sin cambios no se vuelven a ejecutar
+        self.ledger = None
+        if self.config.getboolean('ORQUESTADOR', 'ledger', fallback=True) and not self.backend.embedded:
+            self.ledger = DeployLedger(self.config.get('DATABASE', 'database').strip())
+        self.batch_deploy_files = [
+            f.strip() for f in self.config.get('ORQUESTADOR', 'deploy_por_lote',
+                                               fallback='SQLQuerySTAGING.sql, SQLQueryINT.sql, SQLQueryStoreProcedures.sql').split(',') if f.strip()
+        ]
+        # Scripts destructivos (SQLQueryCreateDW.sql reconstruye el DW): el registro
+        # nunca los saltea, así volver a correr la carga completa no duplica ventas
+        self.always_run_files = [
+            f.strip() for f in self.config.get('ORQUESTADOR', 'siempre_ejecutar',
+                                               fallback='SQLQueryCreateDW.sql').split(',') if f.strip()
+        ]
+        self.ledger_lock = threading.Lock()
+        self.ledger_ready = False
+        # Carga incremental ([ETL] incremental = yes): STAGING solo trae las ventas
+        # nuevas, así que el DW se conserva y los scripts de siempre_ejecutar solo
+        # se ejecutan cuando hay que reconstruirlo (ver plan_dw_rebuild)
+        self.incremental = self.config.getboolean('ETL', 'incremental', fallback=False)
+        self.keep_dw = False
+        # --redeploy: ejecutar todos los lotes aunque no hayan cambiado
+        self.redeploy = False
+        
+    def log(self, message, level="INFO"):
+        """Log con timestamp"""
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        prefix = {
+            "INFO": "INFO |",
+            "SUCCESS": "OK |",
+            "ERROR": "ERROR |",
+            "WARNING": "WARN |",
+            "PROCESS": "PROC |",
+            "STEP": "STEP |"
+        }.get(level, "")
+        
+        separator = "=" * 60
+        if level == "STEP":
+            print(f"\n{separator}")
+            print(f"[{timestamp}] {prefix} {message}")
+            print(f"{separator}")
+        else:
+            print(f"[{timestamp}] {prefix} {message}")
+    
+    def open_connection(self, metric=None):
+        """Pedir una conexión al pool compartido (reintenta los cortes transitorios)"""
+        try:
+            self.log(f"Conectando a {self.backend.describe()}", "PROCESS")
+            connection = self.pool.acquire(metric)
+            self.log(f"Conexión exitosa a {self.backend.name}", "SUCCESS")
+            return connection
+            
+        except Exception as e:
+            self.log(f"Error de conexión: {e}", "ERROR")
+            raise
+    
+    def connect_db(self):
+        """Abrir la conexión compartida, medida como una etapa más (sus reintentos quedan en las métricas)"""
+        with self.metrics.stage('conexion') as metric:
+            self.connection = self.open_connection(metric)
+    
+    def get_shared_connection(self):
+        """Conexión compartida por los pasos Python (se abre la primera vez que se pide)"""
+        with self.connection_lock:
+            if self.connection is None:
+                self.connect_db()
+            return self.connection
+    
+    def execute_sql_file(self, sql_file, connection=None):
+        """
+        Ejecutar un archivo SQL lote por lote. Con el registro de despliegues
+        activo se saltea el archivo si no cambió desde el último despliegue
+        (salvo los de siempre_ejecutar), y en los archivos de deploy_por_lote
+        solo se ejecutan los lotes que cambiaron.
+        """
+        connection = connection or self.connection
+        self.log(f"Ejecutando archivo SQL: {sql_file}", "PROCESS")
+        
+        if not os.path.exists(sql_file):
+            self.log(f"Archivo no encontrado: {sql_file}", "ERROR")
+            raise FileNotFoundError(f"No se encontró el archivo: {sql_file}")
+        
+        if self.keep_dw and sql_file in self.always_run_files:
+            self.log(f"{sql_file}: carga incremental, se conserva el DW", "SUCCESS")
+            return
+        
+        if self.backend.embedded:
+            self.create_embedded_schema(sql_file, connection)
+            return
+        
+        try:
+            sql_content, encoding = read_sql_file(sql_file)
+            self.log(f"Archivo leído con codificación: {encoding}", "INFO")
+            
+            # Lotes separados por GO (fuera de strings, identificadores y comentarios)
+            batches = split_batches(sql_content)
+            file_checksum = checksum(sql_content)
+            
+            cursor = connection.cursor()
+            deployed_file, deployed_batches = None, set()
+            if self.ledger is not None:
+                self.ensure_ledger(cursor)
+            if self.ledger is not None and not self.redeploy and sql_file not in self.always_run_files:
+                deployed_file, deployed_batches = self.ledger.load(cursor, sql_file)
+                if deployed_file == file_checksum:
+                    self.log(f"{sql_file} sin cambios desde el último despliegue: se saltea", "SUCCESS")
+                    return
+                if sql_file not in self.batch_deploy_files:
+                    deployed_batches = set()
+            
+            batch_count = 0
+            skipped = 0
+            failed = 0
+            succeeded = {}
+            
+            for number, (line, batch, repeat) in enumerate(batches, start=1):
+                batch_checksum = checksum(batch)
+                if batch_checksum in deployed_batches and not is_session_batch(batch):
+                    succeeded[batch_checksum] = number
+                    skipped += 1
+                    continue
+                try:
+                    # GO n: el lote se ejecuta n veces
+                    for _ in range(repeat):
+                        cursor.execute(batch)
+                        while cursor.nextset():
+                            pass
+                    connection.commit()
+                    succeeded[batch_checksum] = number
+                    batch_count += 1
+                except Exception as e:
+                    self.log(f"Error en lote {number} (línea {line}): {str(e)[:200]}", "WARNING")
+                    connection.rollback()
+                    failed += 1
+                    # Continuar con el siguiente lote
+                    continue
+            
+            if self.ledger is not None:
+                # El archivo queda registrado como desplegado solo si no falló ningún lote
+                self.ledger.save(cursor, sql_file, file_checksum if not failed else None, succeeded)
+                connection.commit()
+            
+            detail = f", {skipped} sin cambios" if skipped else ""
+            self.log(f"{sql_file} ejecutado exitosamente ({batch_count} lotes{detail})", "SUCCESS")
+            
+        except Exception as e:
+            self.log(f"Error ejecutando {sql_file}: {e}", "ERROR")
+            connection.rollback()
+            raise
+    
+    def create_embedded_schema(self, sql_file, connection):
+        """Crear en el motor embebido las tablas equivalentes a un script T-SQL"""
+        try:
+            statements = self.backend.create_schema(connection.cursor(), sql_file)
+            connection.commit()
+        except Exception as e:
+            self.log(f"Error creando la estructura de {sql_file} en {self.backend.name}: {e}", "ERROR")
+            connection.rollback()
+            raise
+        
+        if statements:
+            self.log(f"{sql_file}: {statements} sentencias equivalentes ejecutadas en {self.backend.name}", "SUCCESS")
+        else:
+            self.log(f"{sql_file}: los procedures de {self.backend.name} están portados en backends.py", "SUCCESS")
+    
+    def ensure_ledger(self, cursor):
+        """Crear Deploy_Ledger una sola vez (los archivos SQL se ejecutan en paralelo)"""
+        with self.ledger_lock:
+            if not self.ledger_ready:
+                self.ledger.ensure_table(cursor)
+                cursor.connection.commit()
+                self.ledger_ready = True
+    
+    def dw_exists(self, connection):
+        """¿Existe Fact_Ventas? En SQL Server se busca en la base que usan los scripts que crean el DW"""
+        cursor = connection.cursor()
+        if self.backend.embedded:
+            return self.backend.has_table(cursor, 'Fact_Ventas')
+        database = None
+        for sql_file in self.always_run_files:
+            if os.path.exists(sql_file):
+                database = used_database(read_sql_file(sql_file)[0]) or database
+        table = f"{database}.dbo.Fact_Ventas" if database else 'Fact_Ventas'
+        return cursor.execute("SELECT OBJECT_ID(?)", table).fetchone()[0] is not None
+    
+    def plan_dw_rebuild(self, pending):
+        """
+        Decidir, antes de lanzar los pasos, si los scripts de siempre_ejecutar
+        reconstruyen el DW. En carga incremental el DW se conserva (dimensiones
+        con MERGE y Fact_Ventas con las ventas nuevas) salvo que falte, que no
+        haya marcas de agua (primera carga) o que un archivo con marca haya
+        sido reescrito. Las marcas y el índice persistente de deduplicación
+        describen lo que ya está en el DW: cada reconstrucción los borra, así
+        la extracción vuelve a leer los archivos completos.
+        """
+        if not any(sql_file in pending for sql_file in self.always_run_files):
+            return
+        from watermarks import WatermarkStore
+        watermarks = WatermarkStore(self.config.get('ETL', 'watermark_file', fallback='etl_watermarks.json'))
+        
+        if self.incremental:
+            changed = watermarks.changed_files()
+            if not self.dw_exists(self.get_shared_connection()):
+                reason = "el DW no existe"
+            elif not watermarks.state:
+                reason = "no hay marcas de agua de cargas anteriores"
+            elif changed:
+                reason = f"cambiaron archivos ya cargados: {', '.join(os.path.basename(p) for p in changed)}"
+            else:
+                self.keep_dw = True
+                self.log("Carga incremental: se conserva el DW y se cargan solo las ventas nuevas", "INFO")
+                return
+            if 'extract_data.py' not in pending:
+                # La extracción de esta corrida ya cargó solo lo nuevo: reconstruir el DW perdería la historia
+                raise Exception(f"Hay que reconstruir el DW ({reason}) pero la extracción incremental ya terminó. "
+                                f"Ejecute sin --resume para recargar completo")
+            self.log(f"Carga incremental: se reconstruye el DW y se recarga completo ({reason})", "WARNING")
+        
+        watermarks.clear()
+        index_file = self.config.get('DEDUP', 'index_file', fallback='dedup_ventas.npy')
+        if os.path.exists(index_file):
+            os.remove(index_file)
+            self.log(f"Índice de deduplicación {index_file} borrado: el DW se reconstruye", "INFO")
+    
+    def execute_python_script(self, script_name):
+        """Ejecutar un paso Python en el mismo proceso, con la configuración y la conexión compartidas"""
+        self.log(f"Ejecutando paso Python: {script_name}", "PROCESS")
+    
+        try:
+            # Import diferido: el módulo del paso (y pandas) solo se carga si el paso se ejecuta
+            module_name, class_name, method_name = self.python_steps[script_name]
+            module = importlib.import_module(module_name)
+            
+            step = getattr(module, class_name)(config=self.config, connection=self.get_shared_connection(),
+                                               metrics=self.metrics)
+            if not getattr(step, method_name)():
+                raise Exception(f"El paso {script_name} terminó con error")
+        
+            self.log(f"{script_name} ejecutado exitosamente", "SUCCESS")
+        
+        except Exception as e:
+            self.log(f"Error ejecutando {script_name}: {e}", "ERROR")
+            raise
+    
+    def load_checkpoint(self):
+        """Leer los pasos completados en una ejecución anterior"""
+        if not os.path.exists(self.checkpoint_file):
+            return set()
+        with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+            return set(json.load(f).get('completados', []))
+    
+    def save_checkpoint(self, completed):
+        """Registrar los pasos completados hasta el momento"""
+        with self.checkpoint_lock:
+            tmp_file = f"{self.checkpoint_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'completados': [step for step in self.pipeline if step in completed],
+                    'actualizado': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }, f, indent=2)
+            os.replace(tmp_file, self.checkpoint_file)
+    
+    def execute_step(self, step):
+        """Ejecutar un paso del pipeline (archivo SQL o script Python)"""
+        with self.metrics.stage(step) as metric:
+            if step.endswith('.sql'):
+                # Cada archivo SQL usa su propia conexión para poder correr en paralelo
+                connection = self.open_connection(metric)
+                try:
+                    self.execute_sql_file(step, connection)
+                finally:
+                    self.pool.release(connection)
+            else:
+                self.execute_python_script(step)
+    
+    def run_pipeline(self, resume=False):
+        """
+        Ejecutar el grafo de pasos: cada paso arranca apenas terminaron sus
+        dependencias, hasta max_workers pasos a la vez.
+        """
+        if (self.config.get('DW', 'fact_loader', fallback='sp').strip().lower() == 'particiones'
+                and self.config.get('DW', 'reemplazar_meses', fallback='').strip()):
+            # dw_loader solo carga los meses de reemplazar_meses: en el pipeline completo
+            # se perderían las ventas de todos los demás
+            raise Exception("[DW] reemplazar_meses es para recargar meses puntuales con los comandos "
+                            "extract, stg-to-int y dw-load: vacíelo antes de ejecutar el pipeline completo")
+        
+        completed = self.load_checkpoint() if resume else set()
+        completed &= set(self.pipeline)
+        if completed:
+            self.log(f"Reanudando: se saltean {len(completed)} paso(s) ya completados: {', '.join(s for s in self.pipeline if s in completed)}", "INFO")
+        self.save_checkpoint(completed)
+        
+        pending = [step for step in self.pipeline if step not in completed]
+        self.plan_dw_rebuild(pending)
+        running = {}
+        failures = []
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                # Lanzar los pasos cuyas dependencias ya terminaron (salvo que algo haya fallado)
+                if not failures:
+                    ready = [step for step in pending if all(dep in completed for dep in self.pipeline[step])]
+                    for step in ready:
+                        pending.remove(step)
+                        self.log(f"Iniciando paso: {step}", "INFO")
+                        running[executor.submit(self.execute_step, step)] = step
+                
+                if not running:
+                    if pending and not failures:
+                        raise Exception(f"Dependencias imposibles de satisfacer: {', '.join(pending)}")
+                    break
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step = running.pop(future)
+                    try:
+                        future.result()
+                        completed.add(step)
+                        self.save_checkpoint(completed)
+                    except Exception as e:
+                        failures.append(step)
+                        self.log(f"Paso {step} falló: {e}", "ERROR")
+        
+        if failures:
+            raise Exception(f"Fallaron los pasos: {', '.join(failures)}. Use --resume para continuar desde ahí")
+        
+        # Pipeline completo: la próxima ejecución arranca de cero
+        if os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+    
+    def verify_files(self):
+        """Verificar que todos los archivos necesarios existan"""
+        self.log("Verificando archivos necesarios...", "PROCESS")
+        
+        missing_files = []
+        
+        # Verificar archivos de SQL
+        for sql_file in self.sql_files:
+            if os.path.exists(sql_file):
+                self.log(f"   {sql_file}", "INFO") 
+            else:
+                self.log(f"   {sql_file} NO ENCONTRADO", "ERROR") 
+                missing_files.append(sql_file)
+        
+        # Verificar scripts de Python
+        for py_script in self.python_scripts:
+            if os.path.exists(py_script):
+                self.log(f"   {py_script}", "INFO") 
+            else:
+                self.log(f"   {py_script} NO ENCONTRADO", "ERROR") 
+                missing_files.append(py_script)
+        
+        # Verificar archivo config.ini
+        if os.path.exists('config.ini'):
+            self.log(f"   config.ini", "INFO") 
+            
+            # Verificar contenido básico
+            try:
+                with open('config.ini', 'r', encoding='utf-8') as f:
+                    content = f.read()
+                if '[DATABASE]' in content:
+                    self.log(f"   config.ini tiene sección [DATABASE]", "INFO") 
+                else:
+                    self.log(f"   config.ini NO tiene sección [DATABASE]", "WARNING") 
+            except Exception as e:
+                self.log(f"   Error leyendo config.ini: {e}", "WARNING") 
+        else:
+            self.log(f"   config.ini NO ENCONTRADO", "ERROR") 
+            missing_files.append('config.ini')
+        
+        if missing_files:
+            self.log(f"Faltan {len(missing_files)} archivo(s)", "ERROR")
+            raise FileNotFoundError(f"Archivos faltantes: {', '.join(missing_files)}")
+        
+        self.log("Todos los archivos verificados correctamente", "SUCCESS")         
+    
+    def run(self, resume=False):
+        """Ejecutar todo el proceso de orquestación"""
+        try:
+            print("\n" + "=" * 60)
+            print("          INICIANDO ORQUESTACIÓN DEL DATA WAREHOUSE")
+            print("=" * 60 + "\n")
+            
+            # Diagnóstico inicial
+            self.log("DIAGNÓSTICO INICIAL", "STEP")
+            current_dir = os.path.abspath('.')
+            self.log(f"Directorio de trabajo: {current_dir}", "INFO")
+            
+            # Verificar archivos
+            self.log("PASO 0: VERIFICACIÓN DE ARCHIVOS", "STEP")
+            self.verify_files()
+            
+            # Conectar a BD (la conexión la comparten los pasos Python)
+            self.log("PASO 1: CONEXIÓN A BASE DE DATOS", "STEP")
+            self.connect_db()
+            
+            # Ejecutar scripts SQL (estructura) y Python (ETL) según sus dependencias
+            self.log("PASO 2: CREACIÓN DE ESTRUCTURA Y PROCESOS ETL (grafo de dependencias)", "STEP")
+            self.run_pipeline(resume=resume)
+            
+            # Finalización exitosa
+            print("\n" + "=" * 60)
+            print("        ORQUESTACIÓN COMPLETADA EXITOSAMENTE")
+            print("=" * 60)
+            print("\n Resumen:")
+            print(f"    Archivos SQL ejecutados: {len(self.sql_files)}")
+            print(f"    Scripts Python ejecutados: {len(self.python_scripts)}")
+            print(f"    Estado: COMPLETADO")
+            print("\n" + "=" * 60 + "\n")
+            
+        except Exception as e:
+            print("\n" + "=" * 60)
+            print("           ORQUESTACIÓN FALLIDA")
+            print("=" * 60)
+            print(f"\n Error: {e}")
+            print("\n🔍 Revisa los logs anteriores para más detalles.")
+            print("=" * 60 + "\n")
+            sys.exit(1)
+        
+        finally:
+            if self.connection:
+                self.pool.release(self.connection)
+                self.connection = None
+            self.pool.close()
+            self.log("Conexiones del pool cerradas", "INFO")
+    
+    def run_command(self, command):
+        """Ejecutar un solo paso Python del pipeline (extract, stg-to-int, dw-load o parquet-export)"""
+        try:
+            self.log(f"COMANDO: {command}", "STEP")
+            self.execute_python_script(self.commands[command])
+            
+        except Exception as e:
+            self.log(f"Comando {command} fallido: {e}", "ERROR")
+            sys.exit(1)
+        
+        finally:
+            if self.connection:
+                self.pool.release(self.connection)
+                self.connection = None
+            self.pool.close()
+            self.log("Conexiones del pool cerradas", "INFO")
+
+
+
+if __name__ == "__main__":
+    print("""
+    ╔══════════════════════════════════════════════════════════╗
+    ║         ORQUESTADOR MAESTRO - DATA WAREHOUSE             ║
+    ╚══════════════════════════════════════════════════════════╝
+    """)
+    
+    parser = argparse.ArgumentParser(description="Orquestador maestro del Data Warehouse")
+    parser.add_argument('comando', nargs='?', default='all',
+                        choices=['all', 'extract', 'stg-to-int', 'dw-load', 'parquet-export'],
+                        help="all: pipeline completo (por defecto); extract: CSV -> STAGING; "
+                             "stg-to-int: STAGING -> INT; dw-load: INT -> DW; "
+                             "parquet-export: DW -> archivos Parquet")
+    parser.add_argument('--redeploy', action='store_true',
+                        help="Ejecutar todos los scripts SQL aunque no hayan cambiado desde el último despliegue")
+    parser.add_argument('--resume', action='store_true',
+                        help="Saltear los pasos completados en la última ejecución fallida")
+    parser.add_argument('--config', default='config.ini',
+                        help="Archivo de configuración (por defecto config.ini)")
+    args = parser.parse_args()
+    
+    try:
+        # Cambia al directorio del script
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        os.chdir(script_dir)
+        
+        print(" Ejecutando diagnóstico inicial...")
+        current_dir = os.path.abspath('.')
+        print(f" Directorio actual: {current_dir}")
+        print(f" Archivos encontrados:")
+        files = [f for f in os.listdir('.') if f.endswith(('.py', '.sql', '.ini'))]
+        for file in files:
+            print(f"   - {file}")
+        
+        orchestrator = DWMasterOrchestrator(args.config)
+        orchestrator.redeploy = args.redeploy
+        if args.comando == 'all':
+            orchestrator.run(resume=args.resume)
+        else:
+            orchestrator.run_command(args.comando)
+        
+    except FileNotFoundError as e:
+        print(f"\n ERROR DE ARCHIVO: {e}")
+        print(f" Asegúrate de que todos los archivos estén en: {os.path.abspath('.')}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n\n Proceso interrumpido por el usuario")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n\n Error fatal: {e}")
         sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,261 @@
+"""
+Exportación del esquema estrella a Parquet para consumo analítico.
+
+Fact_Ventas se escribe particionada por año y mes (estilo Hive:
+Fact_Ventas/Anio=2024/Mes=3/part-0.parquet) y las dimensiones como un archivo
+por tabla. Solo se reescriben las particiones de los meses tocados por la
+última carga (filas de Fact_Ventas con FechaCarga posterior a la marca de la
+exportación anterior); el resto de las particiones no se toca.
+"""
+
+from configparser import ConfigParser
+from datetime import datetime
+import json
+import os
+import shutil
+import sys
+from conexion import get_pool
+from metricas import MetricsRecorder
+
+# pyarrow es opcional: solo lo necesita este paso
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+# Dimensiones exportadas completas en cada ejecución (son chicas): tabla y columnas
+DIMENSIONS = {
+    'Dim_Tiempo': ['Tiempo_Key', 'Anio', 'Mes', 'Mes_Nombre', 'Semestre', 'Trimestre', 'Semana_Anio',
+                   'Semana_Nro_Mes', 'Dia', 'Dia_Nombre', 'Dia_Semana_Nro'],
+    'Dim_Producto': ['ID_Producto', 'CodigoProducto', 'Descripcion', 'Categoria', 'Marca',
+                     'PrecioCosto', 'PrecioVentaSugerido', 'FechaCreacion'],
+    'Dim_Cliente': ['ID_Cliente', 'CodCliente', 'RazonSocial', 'Telefono', 'Mail', 'Direccion',
+                    'Localidad', 'Provincia', 'CP', 'FechaCreacion'],
+    'Dim_Tienda': ['ID_Tienda', 'CodigoTienda', 'Descripcion', 'Direccion', 'Localidad', 'Provincia',
+                   'CP', 'TipoTienda', 'FechaCreacion']
+}
+
+FACT_COLUMNS = ['ID_Venta', 'Tiempo_Key', 'ID_Producto', 'ID_Cliente', 'ID_Tienda',
+                'Cantidad', 'PrecioVenta', 'Total_IVA', 'FechaCarga']
+
+
+def fact_schema():
+    """Esquema fijo de Fact_Ventas (igual en todos los bloques y particiones)."""
+    return pa.schema([
+        ('ID_Venta', pa.int64()),
+        ('Tiempo_Key', pa.date32()),
+        ('ID_Producto', pa.int32()),
+        ('ID_Cliente', pa.int32()),
+        ('ID_Tienda', pa.int32()),
+        ('Cantidad', pa.int32()),
+        ('PrecioVenta', pa.decimal128(18, 2)),
+        ('Total_IVA', pa.decimal128(18, 2)),
+        ('FechaCarga', pa.timestamp('ms'))
+    ])
+
+
+def rows_to_table(rows, columns, schema=None):
+    """Convertir filas de pyodbc en una tabla Arrow (por columnas, sin pasar por pandas)."""
+    values = list(zip(*rows)) if rows else [[] for _ in columns]
+    if schema is not None:
+        return pa.table([pa.array(v, type=schema.field(c).type) for c, v in zip(columns, values)], schema=schema)
+    # Columnas sin ningún valor: texto en lugar del tipo null de Arrow
+    return pa.table({
+        c: pa.array(v) if any(x is not None for x in v) else pa.array(v, type=pa.string())
+        for c, v in zip(columns, values)
+    })
+
+
+class ParquetExporter:
+    """
+    Exporta Fact_Ventas y las dimensiones a archivos Parquet para que los
+    reportes y el análisis ad-hoc no consulten el motor de la base.
+    """
+
+    def __init__(self, config_file='config.ini', config=None, connection=None, metrics=None):
+        # config y connection permiten reutilizar la configuración ya leída y una
+        # conexión abierta cuando el paso se ejecuta dentro del orquestador
+        if config is not None:
+            self.config = config
+        else:
+            self.config = ConfigParser()
+            self.config.optionxform = str
+
+            if not os.path.exists(config_file) or not self.config.read(config_file):
+                raise FileNotFoundError(f" Error: Archivo '{config_file}' no encontrado.")
+
+        self.connection = connection
+        self.owns_connection = connection is None
+        self.pool = get_pool(self.config)
+        self.backend = self.pool.backend
+
+        # Métricas por tabla exportada (el orquestador pasa su registro compartido)
+        self.metrics = metrics or MetricsRecorder(self.config, 'parquet_export')
+
+        self.enabled = self.config.getboolean('PARQUET', 'enabled', fallback=False)
+        self.output_folder = self.config.get('PARQUET', 'output_folder', fallback='parquet')
+        self.compression = self.config.get('PARQUET', 'compression', fallback='snappy').strip()
+        self.chunk_size = self.config.getint('PARQUET', 'chunk_size', fallback=self.config.getint('ETL', 'chunk_size', fallback=50000))
+        # Marca de la última exportación: FechaCarga máxima ya exportada
+        self.state_file = self.config.get('PARQUET', 'state_file', fallback=os.path.join(self.output_folder, '_export_state.json'))
+
+    def connect_db(self):
+        """Conectar a base de datos SQL."""
+        if self.connection and not self.owns_connection:
+            return
+        try:
+            # La conexión propia se mide como una etapa más, así sus reintentos quedan en las métricas
+            with self.metrics.stage('parquet_export', procedimiento='conexion') as metric:
+                self.connection = self.pool.acquire(metric)
+            print(" Conexión a BD establecida.")
+
+        except Exception as e:
+            print(f" Error de conexión: {e}")
+            raise
+
+    def load_state(self):
+        if not os.path.exists(self.state_file):
+            return None
+        with open(self.state_file, 'r', encoding='utf-8') as f:
+            mark = json.load(f).get('fecha_carga')
+        return datetime.fromisoformat(mark) if mark else None
+
+    def save_state(self, mark):
+        folder = os.path.dirname(self.state_file)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'fecha_carga': mark.isoformat() if mark else None,
+                'actualizado': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, f, indent=2)
+        os.replace(tmp_file, self.state_file)
+
+    def touched_months(self, cursor, desde, hasta):
+        """Meses (primer día) con ventas cargadas en (desde, hasta]; sin desde, todos."""
+        query = """
+            SELECT DISTINCT DATEFROMPARTS(YEAR(Tiempo_Key), MONTH(Tiempo_Key), 1)
+            FROM Fact_Ventas
+        """
+        params = []
+        if desde is not None:
+            query += " WHERE FechaCarga > ? AND FechaCarga <= ?"
+            params = [desde, hasta]
+        return sorted(row[0] for row in cursor.execute(query, *params).fetchall())
+
+    def export_dimension(self, cursor, table, columns):
+        """Reescribir el archivo de una dimensión completa."""
+        with self.metrics.stage('parquet_export', tabla=table) as metric:
+            rows = cursor.execute(f"SELECT {', '.join(columns)} FROM {table}").fetchall()
+            path = os.path.join(self.output_folder, f"{table}.parquet")
+            tmp_path = f"{path}.tmp"
+            pq.write_table(rows_to_table(rows, columns), tmp_path, compression=self.compression)
+            os.replace(tmp_path, path)
+            metric.rows_out = len(rows)
+        print(f"  {table}: {metric.rows_out} filas → {path}")
+
+    def export_month(self, cursor, mes):
+        """
+        Reescribir la partición Anio=/Mes= de un mes: se escribe en una carpeta
+        temporal (los lectores ignoran los nombres que empiezan con '_') y
+        después se reemplaza la partición anterior.
+        """
+        year_folder = os.path.join(self.output_folder, 'Fact_Ventas', f"Anio={mes.year}")
+        final_folder = os.path.join(year_folder, f"Mes={mes.month}")
+        tmp_folder = os.path.join(year_folder, f"_tmp_Mes={mes.month}")
+        old_folder = os.path.join(year_folder, f"_old_Mes={mes.month}")
+        for folder in (tmp_folder, old_folder):
+            if os.path.exists(folder):
+                shutil.rmtree(folder)
+        os.makedirs(tmp_folder)
+
+        hasta = datetime(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+        schema = fact_schema()
+
+        with self.metrics.stage('parquet_export', tabla=f"Fact_Ventas/Anio={mes.year}/Mes={mes.month}") as metric:
+            metric.rows_out = 0
+            # Rango sobre Tiempo_Key: SQL Server lee solo la partición del mes
+            cursor.execute(f"""
+                SELECT ID_Venta, CAST(Tiempo_Key AS DATE), ID_Producto, ID_Cliente, ID_Tienda,
+                       Cantidad, PrecioVenta, Total_IVA, FechaCarga
+                FROM Fact_Ventas
+                WHERE Tiempo_Key >= ? AND Tiempo_Key < ?
+            """, datetime(mes.year, mes.month, 1), hasta)
+
+            with pq.ParquetWriter(os.path.join(tmp_folder, 'part-0.parquet'), schema, compression=self.compression) as writer:
+                while True:
+                    rows = cursor.fetchmany(self.chunk_size)
+                    if not rows:
+                        break
+                    writer.write_table(rows_to_table(rows, FACT_COLUMNS, schema))
+                    metric.rows_out += len(rows)
+
+            if os.path.exists(final_folder):
+                os.rename(final_folder, old_folder)
+            os.rename(tmp_folder, final_folder)
+            if os.path.exists(old_folder):
+                shutil.rmtree(old_folder)
+
+        print(f"  Fact_Ventas {mes.year}-{mes.month:02d}: {metric.rows_out} ventas → {final_folder}")
+        return metric.rows_out
+
+    def run_export(self):
+        """Exportar las particiones tocadas y las dimensiones. Devuelve True si terminó bien."""
+        if not self.enabled:
+            print(" Exportación a Parquet deshabilitada (enabled = no en [PARQUET]).")
+            return True
+        if pa is None:
+            print(" ERROR: la exportación a Parquet necesita pyarrow (pip install pyarrow).")
+            return False
+        if self.backend.embedded:
+            print(f" ERROR: la exportación a Parquet solo está disponible con SQL Server (backend = {self.backend.name}).")
+            return False
+
+        print("INICIANDO EXPORTACIÓN A PARQUET")
+        try:
+            self.connect_db()
+            cursor = self.connection.cursor()
+            os.makedirs(self.output_folder, exist_ok=True)
+
+            desde = self.load_state()
+            hasta = cursor.execute("SELECT MAX(FechaCarga) FROM Fact_Ventas").fetchone()[0]
+
+            if hasta is None or (desde is not None and hasta <= desde):
+                print(" Fact_Ventas no tiene ventas nuevas desde la última exportación.")
+                meses = []
+            else:
+                meses = self.touched_months(cursor, desde, hasta)
+                print(f" {len(meses)} partición(es) de Fact_Ventas a reescribir")
+
+            for mes in meses:
+                self.export_month(cursor, mes)
+
+            for table, columns in DIMENSIONS.items():
+                self.export_dimension(cursor, table, columns)
+
+            # La marca se guarda solo cuando todo se escribió bien
+            if hasta is not None:
+                self.save_state(hasta)
+
+            print("\n EXPORTACIÓN A PARQUET COMPLETADA EXITOSAMENTE!")
+            return True
+
+        except Exception as e:
+            print(f" Error en la exportación a Parquet: {e}")
+            return False
+        finally:
+            if self.connection and self.owns_connection:
+                self.pool.release(self.connection)
+                self.connection = None
+                print(" Conexión a BD devuelta al pool.")
+
+
+# EJECUCIÓN
+if __name__ == "__main__":
+    exporter = ParquetExporter()
+    # Código de salida distinto de 0 si falla, para que el orquestador lo detecte
+    sys.exit(0 if exporter.run_export() else 1)
@@ -0,0 +1,169 @@
+"""
+Separación de scripts T-SQL en lotes y registro de despliegues.
+
+split_batches reconoce GO como separador solo cuando está solo en su línea
+(con un contador opcional, "GO 5", y un comentario), fuera de strings,
+identificadores entre corchetes o comillas y comentarios -- o /* */
+(anidados, como en T-SQL). DeployLedger guarda el checksum de cada archivo y
+de cada lote ejecutado, para saltear lo que no cambió desde el último
+despliegue.
+"""
+
+import hashlib
+import re
+
+# Codificaciones de los .sql, en orden: utf-8 (con o sin BOM) y luego las de
+# Windows; latin-1 acepta cualquier byte, por eso va al final
+SQL_ENCODINGS = ['utf-8-sig', 'cp1252', 'latin-1']
+
+GO_LINE = re.compile(r'^\s*GO(?:\s+(\d+))?\s*(?:--.*)?$', re.IGNORECASE)
+
+
+def read_sql_file(path):
+    """Leer un script SQL. Devuelve (texto, codificación usada)."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    for encoding in SQL_ENCODINGS:
+        try:
+            return data.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"No se pudo decodificar {path}")
+
+
+def _scan_line(line, block_depth, quote):
+    """
+    Recorrer una línea y devolver el estado al final: profundidad de
+    comentarios /* */ abiertos y delimitador del string o identificador
+    abierto (' " ]), o None.
+    """
+    i = 0
+    n = len(line)
+    while i < n:
+        c = line[i]
+        pair = line[i:i + 2]
+        if block_depth:
+            if pair == '/*':
+                block_depth += 1
+                i += 2
+            elif pair == '*/':
+                block_depth -= 1
+                i += 2
+            else:
+                i += 1
+        elif quote:
+            if c == quote:
+                # '' ]] y "" son el delimitador escapado dentro del literal
+                if line[i + 1:i + 2] == quote:
+                    i += 2
+                    continue
+                quote = None
+            i += 1
+        elif pair == '--':
+            break
+        elif pair == '/*':
+            block_depth = 1
+            i += 2
+        elif c in ("'", '"'):
+            quote = c
+            i += 1
+        elif c == '[':
+            quote = ']'
+            i += 1
+        else:
+            i += 1
+    return block_depth, quote
+
+
+def split_batches(sql_text):
+    """
+    Separar un script en lotes por GO. Devuelve una lista de
+    (número de línea inicial, texto del lote, repeticiones).
+    """
+    batches = []
+    current = []
+    start_line = 1
+    block_depth = 0
+    quote = None
+
+    for number, line in enumerate(sql_text.splitlines(), start=1):
+        match = GO_LINE.match(line) if not block_depth and not quote else None
+        if match:
+            text = '\n'.join(current).strip()
+            if text:
+                batches.append((start_line, text, int(match.group(1) or 1)))
+            current = []
+            start_line = number + 1
+            continue
+        current.append(line)
+        block_depth, quote = _scan_line(line, block_depth, quote)
+
+    text = '\n'.join(current).strip()
+    if text:
+        batches.append((start_line, text, 1))
+    return batches
+
+
+SESSION_BATCH = re.compile(r'^(?:\s|--[^\n]*\n|/\*.*?\*/)*(USE|SET)\b', re.IGNORECASE | re.DOTALL)
+
+
+def is_session_batch(text):
+    """Lotes que empiezan con USE o SET: fijan el contexto de la sesión y siempre se ejecutan."""
+    return SESSION_BATCH.match(text) is not None
+
+
+USE_STATEMENT = re.compile(r'^\s*USE\s+\[?(\w+)\]?', re.IGNORECASE | re.MULTILINE)
+
+
+def used_database(sql_text):
+    """Base que fija el último USE del script (None si no tiene)."""
+    databases = USE_STATEMENT.findall(sql_text)
+    return databases[-1] if databases else None
+
+
+def checksum(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class DeployLedger:
+    """
+    Tabla Deploy_Ledger con lo desplegado por archivo: una fila con el checksum
+    del archivo completo (Lote = 0), que solo se registra si todos sus lotes
+    terminaron bien, y una fila por lote ejecutado con su checksum.
+    Se guarda en la base de [DATABASE], con nombre completo, porque los
+    scripts cambian de base con USE.
+    """
+
+    def __init__(self, database):
+        self.table = f"[{database}].dbo.Deploy_Ledger"
+
+    def ensure_table(self, cursor):
+        cursor.execute(f"""
+            IF OBJECT_ID('{self.table}') IS NULL
+                CREATE TABLE {self.table} (
+                    Archivo NVARCHAR(260) NOT NULL,
+                    Checksum CHAR(64) NOT NULL,
+                    Lote INT NOT NULL,
+                    FechaDeploy DATETIME NOT NULL DEFAULT GETDATE(),
+                    PRIMARY KEY (Archivo, Checksum)
+                )
+        """)
+
+    def load(self, cursor, sql_file):
+        """Devolver (checksum del archivo o None, checksums de lotes desplegados)."""
+        rows = cursor.execute(f"SELECT Checksum, Lote FROM {self.table} WHERE Archivo = ?", sql_file).fetchall()
+        file_checksum = next((row[0] for row in rows if row[1] == 0), None)
+        return file_checksum, {row[0] for row in rows if row[1] != 0}
+
+    def save(self, cursor, sql_file, file_checksum, batch_checksums):
+        """
+        Reemplazar el registro del archivo por los lotes desplegados
+        (batch_checksums: {checksum: número de lote}). file_checksum es None si
+        algún lote falló: el archivo se vuelve a revisar en el próximo despliegue.
+        """
+        cursor.execute(f"DELETE FROM {self.table} WHERE Archivo = ?", sql_file)
+        rows = [(sql_file, value, number) for value, number in batch_checksums.items()]
+        if file_checksum is not None and file_checksum not in batch_checksums:
+            rows.append((sql_file, file_checksum, 0))
+        if rows:
+            cursor.executemany(f"INSERT INTO {self.table} (Archivo, Checksum, Lote) VALUES (?, ?, ?)", rows)
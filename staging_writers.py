@@ -0,0 +1,126 @@
+import os
+import time
+import uuid
+
+
+class StagingWriter:
+    """
+    Clase base para los escritores de tablas STAGING.
+    Cada backend implementa _write(); la clase base mide filas y tiempo
+    para poder comparar el rendimiento (filas/s) entre backends.
+    """
+    name = 'base'
+
+    def __init__(self, config):
+        self.config = config
+        self.rows = 0
+        self.seconds = 0.0
+
+    def write(self, cursor, table_name, batch):
+        """Insertar un bloque en columnas (ver column_buffers) y acumular estadísticas."""
+        rows = len(batch)
+        if not rows:
+            return 0
+        start = time.perf_counter()
+        self._write(cursor, table_name, batch)
+        self.seconds += time.perf_counter() - start
+        self.rows += rows
+        return rows
+
+    def _write(self, cursor, table_name, batch):
+        raise NotImplementedError
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def report(self, table_name):
+        """Mostrar el rendimiento del backend para una tabla."""
+        print(f"   [{self.name}] {table_name}: {self.rows} filas en {self.seconds:.2f}s "
+              f"({self.rows_per_second:,.0f} filas/s)")
+
+
+class ExecuteManyWriter(StagingWriter):
+    """INSERT ... VALUES (?) con executemany estándar de DB-API (ej. SQLite)."""
+    name = 'executemany'
+
+    def _insert_query(self, table_name, columns):
+        placeholders = ', '.join(['?' for _ in columns])
+        return f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+
+    def _write(self, cursor, table_name, batch):
+        # El driver solo acepta parámetros por fila: las tuplas se arman recién acá
+        cursor.executemany(self._insert_query(table_name, batch.columns), batch.to_rows())
+
+
+class FastExecuteManyWriter(ExecuteManyWriter):
+    """executemany de pyodbc con fast_executemany (parámetros enviados en lote)."""
+    name = 'fast_executemany'
+
+    def _write(self, cursor, table_name, batch):
+        cursor.fast_executemany = True # Optimización para inserción masiva
+        super()._write(cursor, table_name, batch)
+
+
+class DuckDBAppendWriter(StagingWriter):
+    """
+    Carga en DuckDB sin parámetros por fila: el bloque se registra como vista
+    sobre su DataFrame y se inserta con un solo INSERT ... SELECT columnar.
+    """
+    name = 'duckdb_append'
+
+    def _write(self, cursor, table_name, batch):
+        view = f"bloque_{uuid.uuid4().hex}"
+        cursor.register(view, batch.to_frame())
+        try:
+            columns = ', '.join(batch.columns)
+            cursor.execute(f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM {view}")
+        finally:
+            cursor.unregister(view)
+
+
+class BulkInsertWriter(StagingWriter):
+    """
+    Carga nativa de SQL Server con BULK INSERT desde un archivo CSV temporal.
+    El archivo se escribe en bulk_folder, que debe ser accesible por el servidor
+    SQL con la misma ruta. Las columnas deben estar en el orden de la tabla.
+    """
+    name = 'bulk_insert'
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.bulk_folder = os.path.abspath(config.get('ETL', 'bulk_folder', fallback='bulk_tmp'))
+        os.makedirs(self.bulk_folder, exist_ok=True)
+
+    def _write(self, cursor, table_name, batch):
+        file_path = os.path.join(self.bulk_folder, f"{table_name}_{uuid.uuid4().hex}.csv")
+        try:
+            # El bloque se vuelca en columnas, sin pasar por tuplas de Python
+            with open(file_path, 'wb') as f:
+                batch.write_csv(f)
+
+            # KEEPNULLS: los campos vacíos (nulos) quedan como NULL
+            cursor.execute(
+                f"BULK INSERT {table_name} FROM '{file_path}' WITH ("
+                f"FORMAT = 'CSV', FIELDQUOTE = '\"', ROWTERMINATOR = '0x0a', "
+                f"CODEPAGE = '65001', KEEPNULLS, TABLOCK)"
+            )
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+
+# Backends disponibles, seleccionables con [ETL] writer en config.ini
+WRITERS = {
+    ExecuteManyWriter.name: ExecuteManyWriter,
+    FastExecuteManyWriter.name: FastExecuteManyWriter,
+    BulkInsertWriter.name: BulkInsertWriter,
+}
+
+
+def create_writer(config):
+    """Crear el escritor configurado en [ETL] writer (por defecto fast_executemany)."""
+    name = config.get('ETL', 'writer', fallback=FastExecuteManyWriter.name).strip()
+    if name not in WRITERS:
+        raise ValueError(f"Writer '{name}' no soportado. Opciones: {', '.join(WRITERS)}")
+    return WRITERS[name](config)
@@ -0,0 +1,82 @@
+"""
+Prueba de punta a punta de la carga incremental con el motor sqlite: dos
+corridas del orquestador, la segunda con ventas agregadas a los CSV.
+
+Ejecutar con: python -m pytest -q
+"""
+
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+from configparser import ConfigParser
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = [
+    'SQLQuerySTAGING.sql', 'SQLQueryINT.sql', 'SQLQueryCreateDW.sql', 'SQLQueryStoreProcedures.sql',
+    'extract_data.py', 'load_STG_to_INT.py', 'dw_loader.py', 'parquet_export.py'
+]
+NUEVAS = '\n2024-03-01,1,Televisor LED 55,1,1000.00,1,ACME Corp,1,ElectroShop Online\n'
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    for name in SCRIPTS:
+        shutil.copy(os.path.join(REPO_DIR, name), tmp_path)
+    shutil.copytree(os.path.join(REPO_DIR, 'DATASET'), tmp_path / 'DATASET')
+
+    config = ConfigParser()
+    config.optionxform = str
+    config.read(os.path.join(REPO_DIR, 'config.ini'), encoding='utf-8')
+    config.set('DATABASE', 'backend', 'sqlite')
+    config.set('DATABASE', 'path', str(tmp_path / 'datashop.db'))
+    config.set('ETL', 'incremental', 'yes')
+    config.set('DEDUP', 'persistente', 'yes')
+    config.set('METRICAS', 'enabled', 'no')
+    with open(tmp_path / 'config.ini', 'w', encoding='utf-8') as f:
+        config.write(f)
+    return tmp_path
+
+
+def run_all(workdir):
+    """Pipeline completo en otro proceso (el orquestador reemplaza sys.stdout), respondiendo 's' a las preguntas."""
+    code = (f"import sys; sys.path.insert(0, {REPO_DIR!r}); "
+            "from orquestador import DWMasterOrchestrator; DWMasterOrchestrator('config.ini').run()")
+    result = subprocess.run([sys.executable, '-c', code], cwd=workdir, input='s\n' * 10,
+                            capture_output=True, text=True, encoding='utf-8')
+    assert result.returncode == 0, result.stdout[-3000:]
+
+
+def fact_ventas(workdir):
+    with sqlite3.connect(workdir / 'datashop.db') as connection:
+        return connection.execute("SELECT COUNT(*), SUM(Cantidad) FROM Fact_Ventas").fetchone()
+
+
+def test_segunda_corrida_agrega_solo_las_ventas_nuevas(workdir):
+    run_all(workdir)
+    ventas, cantidad = fact_ventas(workdir)
+    assert ventas > 0
+
+    # Corrida sin cambios: el DW se conserva y no se agrega nada
+    run_all(workdir)
+    assert fact_ventas(workdir) == (ventas, cantidad)
+
+    with open(workdir / 'DATASET' / 'ventas_add.csv', 'a', encoding='utf-8') as f:
+        f.write(NUEVAS)
+    run_all(workdir)
+    assert fact_ventas(workdir) == (ventas + 1, cantidad + 1)
+
+
+def test_archivo_reescrito_reconstruye_el_dw(workdir):
+    run_all(workdir)
+    ventas, _ = fact_ventas(workdir)
+
+    # Reescribir ventas.csv sin su última fila: las marcas ya no valen y se recarga completo
+    path = workdir / 'DATASET' / 'ventas.csv'
+    lines = path.read_text(encoding='utf-8').splitlines(keepends=True)
+    path.write_text(''.join(lines[:-1]), encoding='utf-8')
+    run_all(workdir)
+    assert fact_ventas(workdir)[0] == ventas - 1
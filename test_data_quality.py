@@ -0,0 +1,96 @@
+"""
+Pruebas de las reglas de data_quality y de VentasValidator.
+
+Ejecutar con: python -m pytest -q
+"""
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from column_buffers import NumpyBatch
+from data_quality import (
+    REJECT_FILE, VentasValidator, invalid_cantidad, invalid_fecha, invalid_precio, precio_demasiado_grande
+)
+from dq_resumen import read_summary
+
+
+def series(*values):
+    return pd.Series(list(values), dtype=object)
+
+
+def test_invalid_fecha():
+    fechas = series('2024-01-15', '15/01/2024', '2024-02-30', 'ayer', None, ' 2024-03-01 ')
+    assert invalid_fecha(fechas).tolist() == [False, False, True, True, True, False]
+
+
+def test_invalid_fecha_sin_reintentos():
+    assert invalid_fecha(series('2024-01-15', '2024-12-31')).tolist() == [False, False]
+
+
+def test_invalid_cantidad():
+    cantidades = series('3', ' -2 ', '+7', '1.5', 'x', None, '2147483647', '2147483648', '-2147483649')
+    assert invalid_cantidad(cantidades).tolist() == [False, False, False, True, True, True, False, True, True]
+
+
+def test_invalid_precio():
+    precios = series('10', '10.50', '.5', '-3.', 'abc', None, '1e5', '1' * 21)
+    assert invalid_precio(precios).tolist() == [False, False, False, False, True, True, True, True]
+
+
+def test_precio_demasiado_grande_en_ambos_sentidos():
+    precios = series('99999999999999.99', '99999999999999.991', '-99999999999999.991', '100000000000000', '5', 'abc')
+    invalid = invalid_precio(precios)
+    assert precio_demasiado_grande(precios, invalid).tolist() == [False, True, True, True, False, False]
+
+
+def ventas(*rows):
+    df = pd.DataFrame(list(rows), columns=['FechaVenta', 'CodigoProducto', 'Cantidad', 'PrecioVenta'], dtype=object)
+    return NumpyBatch.from_frame(df)
+
+
+def test_validator_separa_rechazos_y_resume(tmp_path):
+    validator = VentasValidator(str(tmp_path))
+    batch = ventas(
+        ('2024-01-15', 'P1', '2', '10.00'),
+        ('2024-13-01', 'P2', '1', '5.00'),
+        ('2024-01-16', 'P3', 'dos', '5.00'),
+        ('2024-01-17', 'P4', '1', 'caro'),
+        ('2024-01-18', 'P5', '1', '100000000000000'),
+    )
+
+    valid = validator.validate(batch, 'ventas.csv')
+    assert valid.column('CodigoProducto').tolist() == ['P1']
+
+    validator.write_summary()
+    summary = read_summary(str(tmp_path))
+    assert summary['Total_Problemas'] == 4
+    assert summary['Total_Registros'] == 5
+    assert (summary['Fecha_Invalida'], summary['Cantidad_Invalida'],
+            summary['Precio_Invalido'], summary['Precio_Demasiado_Grande']) == (1, 1, 1, 1)
+    assert summary['Rechazos_Por_Archivo'] == {'ventas.csv': 4}
+
+    rechazos = pd.read_csv(tmp_path / REJECT_FILE, dtype=str)
+    assert rechazos['Tipo_Problema'].tolist() == [
+        'FECHA_INVALIDA', 'CANTIDAD_INVALIDA', 'PRECIO_INVALIDO', 'PRECIO_DEMASIADO_GRANDE'
+    ]
+    assert set(rechazos['Archivo']) == {'ventas.csv'}
+
+
+def test_validator_sin_rechazos_devuelve_el_mismo_bloque(tmp_path):
+    validator = VentasValidator(str(tmp_path))
+    batch = ventas(('2024-01-15', 'P1', '2', '10.00'))
+    assert validator.validate(batch, 'ventas.csv') is batch
+
+    validator.write_summary()
+    assert read_summary(str(tmp_path))['Archivo_Rechazos'] is None
+    assert not os.path.exists(tmp_path / REJECT_FILE)
+
+
+def test_discard_summary(tmp_path):
+    validator = VentasValidator(str(tmp_path))
+    validator.write_summary()
+    validator.discard_summary()
+    assert read_summary(str(tmp_path)) is None
@@ -0,0 +1,96 @@
+"""
+Pruebas de dedup.HashIndex y SalesDeduplicator.
+
+Ejecutar con: python -m pytest -q
+"""
+
+from configparser import ConfigParser
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from column_buffers import NumpyBatch
+from dedup import HashIndex, SalesDeduplicator
+
+COLUMNS = ['FechaVenta', 'CodigoProducto', 'CodigoCliente', 'CodigoTienda', 'Cantidad', 'PrecioVenta']
+
+
+def make_config(tmp_path, persistente='yes', incremental='yes'):
+    config = ConfigParser()
+    config.optionxform = str
+    config.read_dict({
+        'ETL': {'incremental': incremental},
+        'DEDUP': {'persistente': persistente, 'index_file': str(tmp_path / 'dedup_ventas.npy')}
+    })
+    return config
+
+
+def ventas(*rows):
+    return NumpyBatch.from_frame(pd.DataFrame(list(rows), columns=COLUMNS, dtype=object))
+
+
+def productos(batch):
+    return batch.column('CodigoProducto').tolist()
+
+
+def test_hash_index_contains_y_add():
+    index = HashIndex(np.array([5, 1, 3], dtype=np.uint64))
+    for block in ([7, 2], [9], [4, 8, 6]):
+        index.add(np.array(block, dtype=np.uint64))
+
+    assert len(index) == 9
+    found = index.contains(np.array([1, 2, 9, 10, 0], dtype=np.uint64))
+    assert found.tolist() == [True, True, True, False, False]
+    assert index.to_array().tolist() == list(range(1, 10))
+
+
+def test_hash_index_vacio():
+    index = HashIndex()
+    assert len(index) == 0
+    assert not index.contains(np.array([1], dtype=np.uint64)).any()
+
+
+def test_descarta_repetidas_en_el_bloque_y_entre_tablas(tmp_path):
+    dedup = SalesDeduplicator(make_config(tmp_path, persistente='no'))
+    batch = ventas(
+        ('2024-01-15', 'P1', 'C1', 'T1', '1', '10.00'),
+        ('2024-01-15', 'P1', 'C1', 'T1', '1', '10.00'),
+        ('2024-01-15', 'P2', 'C1', 'T1', '1', '10.00'),
+    )
+    assert productos(dedup.filter(batch, 'STG_Ventas')) == ['P1', 'P2']
+
+    add = ventas(('2024-01-15', 'P2', 'C1', 'T1', '1', '10.00'), ('2024-01-15', 'P2', 'C1', 'T1', '2', '10.00'))
+    assert len(dedup.filter(add, 'STG_Ventas_Add')) == 1
+    assert dedup.report() == 2
+
+
+def test_un_nulo_no_es_un_campo_vacio(tmp_path):
+    dedup = SalesDeduplicator(make_config(tmp_path, persistente='no'))
+    batch = ventas(('2024-01-15', 'P1', None, 'T1', '1', '10.00'), ('2024-01-15', 'P1', '', 'T1', '1', '10.00'))
+    assert len(dedup.filter(batch, 'STG_Ventas')) == 2
+
+
+def test_indice_persistente_entre_dos_corridas(tmp_path):
+    primera = ventas(('2024-01-15', 'P1', 'C1', 'T1', '1', '10.00'), ('2024-01-16', 'P2', 'C1', 'T1', '1', '10.00'))
+    dedup = SalesDeduplicator(make_config(tmp_path))
+    assert len(dedup.filter(primera, 'STG_Ventas')) == 2
+    dedup.commit()
+
+    # Segunda corrida: solo pasa la venta nueva
+    segunda = ventas(('2024-01-16', 'P2', 'C1', 'T1', '1', '10.00'), ('2024-01-17', 'P3', 'C1', 'T1', '1', '10.00'))
+    dedup = SalesDeduplicator(make_config(tmp_path))
+    assert dedup.loaded == 2
+    assert productos(dedup.filter(segunda, 'STG_Ventas')) == ['P3']
+
+
+def test_sin_commit_el_indice_no_avanza(tmp_path):
+    dedup = SalesDeduplicator(make_config(tmp_path))
+    dedup.filter(ventas(('2024-01-15', 'P1', 'C1', 'T1', '1', '10.00')), 'STG_Ventas')
+
+    assert SalesDeduplicator(make_config(tmp_path)).loaded == 0
+
+
+def test_persistente_requiere_carga_incremental(tmp_path):
+    with pytest.raises(ValueError, match='incremental'):
+        SalesDeduplicator(make_config(tmp_path, incremental='no'))
@@ -0,0 +1,94 @@
+"""
+Pruebas de sql_batches.split_batches e is_session_batch.
+
+Ejecutar con: python -m pytest -q
+"""
+
+import os
+import re
+
+import pytest
+
+from sql_batches import read_sql_file, split_batches, is_session_batch, used_database
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_SCRIPTS = ['SQLQuerySTAGING.sql', 'SQLQueryINT.sql', 'SQLQueryCreateDW.sql', 'SQLQueryStoreProcedures.sql']
+
+
+def texts(sql):
+    return [text for _, text, _ in split_batches(sql)]
+
+
+def test_go_en_su_linea_separa_lotes():
+    sql = "SELECT 1\nGO\nSELECT 2\n  go  \nSELECT 3"
+    assert split_batches(sql) == [(1, 'SELECT 1', 1), (3, 'SELECT 2', 1), (5, 'SELECT 3', 1)]
+
+
+def test_go_con_contador_y_comentario():
+    sql = "INSERT INTO T VALUES (1)\nGO 5 -- cinco veces\nSELECT 2"
+    assert split_batches(sql) == [(1, 'INSERT INTO T VALUES (1)', 5), (3, 'SELECT 2', 1)]
+
+
+def test_lotes_vacios_se_descartan():
+    assert texts("GO\n\nGO\nSELECT 1\nGO\n   \nGO") == ['SELECT 1']
+
+
+def test_go_dentro_de_una_palabra_o_una_sentencia_no_separa():
+    sql = "SELECT 'x' AS GOTO_Col\nEXEC sp_GO_Test\nSELECT 1 GO"
+    assert texts(sql) == [sql]
+
+
+def test_go_dentro_de_un_string():
+    sql = "PRINT 'linea 1\nGO\nlinea 3'\nGO\nSELECT 2"
+    assert texts(sql) == ["PRINT 'linea 1\nGO\nlinea 3'", 'SELECT 2']
+
+
+def test_comilla_escapada_no_cierra_el_string():
+    sql = "PRINT 'it''s\nGO\nfin'\nGO\nSELECT 2"
+    assert texts(sql) == ["PRINT 'it''s\nGO\nfin'", 'SELECT 2']
+
+
+def test_go_dentro_de_identificadores():
+    sql = 'SELECT 1 AS [col\nGO\n]]x]\nGO\nSELECT 2 AS "a\nGO\nb"\nGO\nSELECT 3'
+    assert texts(sql) == ['SELECT 1 AS [col\nGO\n]]x]', 'SELECT 2 AS "a\nGO\nb"', 'SELECT 3']
+
+
+def test_go_dentro_de_comentarios_anidados():
+    sql = "/* afuera\n/* adentro\nGO\n*/\nGO\n*/\nSELECT 1\nGO\nSELECT 2"
+    assert texts(sql) == ["/* afuera\n/* adentro\nGO\n*/\nGO\n*/\nSELECT 1", 'SELECT 2']
+
+
+def test_comentario_de_linea_no_abre_string():
+    sql = "SELECT 1 -- no es un string: '\nGO\nSELECT 2"
+    assert texts(sql) == ["SELECT 1 -- no es un string: '", 'SELECT 2']
+
+
+def test_numero_de_linea_inicial():
+    sql = "SELECT 1\nGO\n\n/* comentario */\nSELECT 2\nGO"
+    assert [line for line, _, _ in split_batches(sql)] == [1, 3]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('USE DataShop', True),
+    ('SET DATEFIRST 1', True),
+    ('  -- contexto\n/* de la sesión */\nset nocount on', True),
+    ('SELECT 1', False),
+    ('SETTINGS_TABLE', False),
+    ("PRINT 'USE'", False),
+])
+def test_is_session_batch(text, expected):
+    assert is_session_batch(text) is expected
+
+
+def test_used_database():
+    assert used_database("CREATE DATABASE X\nGO\nuse [DW_DataShop1];\nGO\nSELECT 1") == 'DW_DataShop1'
+    assert used_database("SELECT 1 -- sin USE") is None
+
+
+@pytest.mark.parametrize('sql_file', REPO_SCRIPTS)
+def test_scripts_del_repo_separan_igual_que_antes(sql_file):
+    """Los scripts del repo no tienen GO dentro de strings ni comentarios: los lotes son los del split por GO anterior."""
+    sql, _ = read_sql_file(os.path.join(REPO_DIR, sql_file))
+    sql = sql.replace('\r\n', '\n')
+    before = [b.strip() for b in re.split(r'\bGO\b', sql, flags=re.IGNORECASE) if b.strip()]
+    assert texts(sql) == before
@@ -0,0 +1,90 @@
+"""
+Pruebas de watermarks.WatermarkStore y open_byte_range.
+
+Ejecutar con: python -m pytest -q
+"""
+
+from watermarks import WatermarkStore, open_byte_range
+
+HEADER = b'FechaVenta,CodigoProducto,Cantidad,PrecioVenta\n'
+
+
+def write(path, data, mode='wb'):
+    with open(path, mode) as f:
+        f.write(data)
+
+
+def load(store, path):
+    """Simular una carga confirmada: leer el rango pendiente y guardar la marca."""
+    start, end = store.read_range(str(path))
+    with open_byte_range(str(path), start, end) as f:
+        data = f.read()
+    store.stage(str(path), end)
+    store.commit()
+    return data
+
+
+def test_primera_carga_completa_y_luego_solo_lo_agregado(tmp_path):
+    csv = tmp_path / 'ventas.csv'
+    write(csv, HEADER + b'2024-01-01,P1,1,10\n')
+    store = WatermarkStore(str(tmp_path / 'marcas.json'))
+    assert load(store, csv) == HEADER + b'2024-01-01,P1,1,10\n'
+
+    write(csv, b'2024-01-02,P2,2,20\n', 'ab')
+    store = WatermarkStore(str(tmp_path / 'marcas.json'))
+    assert load(store, csv) == b'2024-01-02,P2,2,20\n'
+    assert store.read_range(str(csv)) == (csv.stat().st_size, csv.stat().st_size)
+
+
+def test_ultima_linea_sin_salto_se_carga(tmp_path):
+    csv = tmp_path / 'ventas.csv'
+    write(csv, HEADER + b'2024-01-01,P1,1,10')
+    store = WatermarkStore(str(tmp_path / 'marcas.json'))
+    assert load(store, csv).endswith(b'2024-01-01,P1,1,10')
+
+    # Lo agregado empieza con el salto de línea que faltaba: solo suma una línea vacía
+    write(csv, b'\n2024-01-02,P2,2,20\n', 'ab')
+    assert load(store, csv) == b'\n2024-01-02,P2,2,20\n'
+
+
+def test_agregar_sin_salto_tras_linea_abierta_recarga_completo(tmp_path):
+    csv = tmp_path / 'ventas.csv'
+    write(csv, HEADER + b'2024-01-01,P1,1,1')
+    store = WatermarkStore(str(tmp_path / 'marcas.json'))
+    load(store, csv)
+
+    # La última fila cargada cambió (PrecioVenta 1 -> 10): no se puede cargar solo lo nuevo
+    write(csv, b'0\n2024-01-02,P2,2,20\n', 'ab')
+    assert store.read_range(str(csv)) == (0, csv.stat().st_size)
+
+
+def test_archivo_reescrito_recarga_completo(tmp_path):
+    csv = tmp_path / 'ventas.csv'
+    write(csv, HEADER + b'2024-01-01,P1,1,10\n')
+    store = WatermarkStore(str(tmp_path / 'marcas.json'))
+    load(store, csv)
+
+    write(csv, HEADER + b'2024-01-01,P9,9,90\n2024-01-02,P2,2,20\n')
+    assert store.read_range(str(csv)) == (0, csv.stat().st_size)
+
+
+def test_archivo_truncado_recarga_completo(tmp_path):
+    csv = tmp_path / 'ventas.csv'
+    write(csv, HEADER + b'2024-01-01,P1,1,10\n2024-01-02,P2,2,20\n')
+    store = WatermarkStore(str(tmp_path / 'marcas.json'))
+    load(store, csv)
+
+    write(csv, HEADER)
+    assert store.read_range(str(csv)) == (0, len(HEADER))
+
+
+def test_discard_no_guarda_la_marca(tmp_path):
+    csv = tmp_path / 'ventas.csv'
+    write(csv, HEADER + b'2024-01-01,P1,1,10\n')
+    store = WatermarkStore(str(tmp_path / 'marcas.json'))
+    store.stage(str(csv), csv.stat().st_size)
+    store.discard()
+    store.commit()
+
+    assert not (tmp_path / 'marcas.json').exists()
+    assert WatermarkStore(str(tmp_path / 'marcas.json')).read_range(str(csv)) == (0, csv.stat().st_size)
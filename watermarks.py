@@ -0,0 +1,149 @@
+import hashlib
+import io
+import json
+import os
+import threading
+from datetime import datetime
+
+
+class ByteRangeReader(io.RawIOBase):
+    """Lector de solo lectura limitado al rango de bytes [start, end) de un archivo."""
+
+    def __init__(self, path, start, end):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._remaining <= 0:
+            return 0
+        size = min(len(buffer), self._remaining)
+        data = self._file.read(size)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_byte_range(path, start, end):
+    """Abrir un archivo para leer solo los bytes entre start y end."""
+    return io.BufferedReader(ByteRangeReader(path, start, end))
+
+
+class WatermarkStore:
+    """
+    Marcas de agua por archivo CSV para la carga incremental.
+    Para cada archivo se guarda hasta qué byte se cargó y una huella (hash del
+    inicio del archivo y de los bytes previos a la marca) para detectar si el
+    archivo fue reescrito en lugar de solo crecer.
+    """
+    FINGERPRINT_BYTES = 64 * 1024
+
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self.state = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+
+        if os.path.exists(state_file):
+            with open(state_file, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    def _key(self, path):
+        return os.path.normpath(path)
+
+    def _fingerprint(self, path, offset):
+        """Hash del inicio del archivo y del bloque que termina en offset."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            digest.update(f.read(min(self.FINGERPRINT_BYTES, offset)))
+            tail_start = max(0, offset - self.FINGERPRINT_BYTES)
+            f.seek(tail_start)
+            digest.update(f.read(offset - tail_start))
+        return digest.hexdigest()
+
+    def _extends_last_line(self, path, offset, size):
+        """
+        ¿Lo agregado continúa la última línea cargada? La carga llega hasta el
+        fin del archivo, incluida una última línea sin salto final; si después
+        se agrega empezando con un salto de línea queda solo una línea vacía
+        (se ignora), pero si se agrega sin él esa fila ya cargada cambió.
+        """
+        if offset == 0 or offset >= size:
+            return False
+        with open(path, 'rb') as f:
+            f.seek(offset - 1)
+            previous, following = f.read(2)
+        return previous != ord('\n') and following not in b'\r\n'
+
+    def _is_valid(self, path, mark, size):
+        """La marca sigue siendo válida si el archivo solo creció desde ella."""
+        offset = mark['offset']
+        return (offset <= size
+                and self._fingerprint(path, offset) == mark['fingerprint']
+                and not self._extends_last_line(path, offset, size))
+
+    def read_range(self, path):
+        """
+        Devolver (inicio, fin) en bytes de lo que falta cargar del archivo.
+        inicio = 0 significa carga completa (primera vez o archivo reescrito).
+        """
+        end = os.path.getsize(path)
+        mark = self.state.get(self._key(path))
+
+        if not mark:
+            return 0, end
+
+        if self._is_valid(path, mark, end):
+            return mark['offset'], end
+
+        print(f"  {path} cambió desde la última carga. Se recarga completo.")
+        return 0, end
+
+    def changed_files(self):
+        """Archivos con marca que desaparecieron o fueron reescritos desde la última carga."""
+        return [
+            path for path, mark in self.state.items()
+            if not os.path.exists(path) or not self._is_valid(path, mark, os.path.getsize(path))
+        ]
+
+    def clear(self):
+        """Borrar todas las marcas: la próxima carga de cada archivo es completa."""
+        with self.lock:
+            self.state = {}
+            self.pending = {}
+            if os.path.exists(self.state_file):
+                os.remove(self.state_file)
+
+    def stage(self, path, offset):
+        """Registrar una nueva marca, que se guarda solo al confirmar la carga."""
+        with self.lock:
+            self.pending[self._key(path)] = {
+                'offset': offset,
+                'fingerprint': self._fingerprint(path, offset),
+                'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+
+    def commit(self):
+        """Guardar las marcas pendientes (llamar después del COMMIT en la BD)."""
+        with self.lock:
+            if not self.pending:
+                return
+            self.state.update(self.pending)
+            self.pending = {}
+
+            tmp_file = f"{self.state_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, indent=2)
+            os.replace(tmp_file, self.state_file)
+
+    def discard(self):
+        """Descartar las marcas pendientes (la carga se revirtió)."""
+        with self.lock:
+            self.pending = {}